@@ -0,0 +1,114 @@
+"""
+bench_affiliation.py
+
+Scaling benchmark for derive_dev_affiliation.py.
+
+Generates synthetic developer_info-shaped data (skewed developer activity and project popularity, ~10 rows per
+developer) and times the vectorized affiliation derivation at each size. Up to --legacy-max rows, the former
+per-developer groupby().apply/iterrows implementation is timed too and its AffiliationType column is checked against
+the vectorized one.
+
+Usage (from the benchmarks directory):
+    python bench_affiliation.py [--sizes 10000 1000000 10000000] [--legacy-max 100000] [--seed 42]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts-data-generation"))
+
+import derive_dev_affiliation as dda  # noqa: E402
+
+ROLE_COLUMNS = ["PR-author", "BugReport-author", "Commented", "Reviewer"]
+# Probability of each role flag on a row
+ROLE_RATES = [0.15, 0.10, 0.85, 0.10]
+
+
+def synthetic_developer_info(n_rows, seed=42):
+    """developer_info-shaped frame with Zipf-like developer and project frequencies."""
+    rng = np.random.default_rng(seed)
+    n_devs = max(10, n_rows // 10)
+    n_projects = max(5, int(np.sqrt(n_rows)) // 4)
+    devs = rng.zipf(1.3, n_rows) % n_devs
+    projects = rng.zipf(1.4, n_rows) % n_projects
+    issues = rng.integers(1, 2_000, n_rows)
+    # Rows share their string objects (as rows parsed from a CSV with repeated values would after interning),
+    # which keeps 10^7 rows within a few GB; the issue column is categorical for the same reason.
+    usernames = np.array([f"dev{i}" for i in range(n_devs)], dtype=object)
+    issue_codes = projects * 2_000 + issues
+    unique_codes, inverse = np.unique(issue_codes, return_inverse=True)
+    issue_names = [f"org{c // 2_000}/repo{c // 2_000}#{c % 2_000}" for c in unique_codes]
+    df = pd.DataFrame({
+        "Username": usernames[devs],
+        "Issue": pd.Categorical.from_codes(inverse.ravel(), issue_names),
+    })
+    for col, rate in zip(ROLE_COLUMNS, ROLE_RATES):
+        df[col] = rng.random(n_rows) < rate
+    # A mined row always has at least one role
+    df["Commented"] |= ~df[ROLE_COLUMNS].any(axis=1)
+    return df
+
+
+# --- Former implementation, kept for comparison ---
+
+def legacy_assign_affiliation_types(scores):
+    def assign(subdf):
+        max_pct = subdf["AffiliationPct"].max()
+        tied = subdf[subdf["AffiliationPct"] == max_pct].copy()
+        tied = tied[tied["RowCount"] == tied["RowCount"].max()]
+        tied = tied[tied["ParticipationScore"] == tied["ParticipationScore"].max()]
+        primary_project = tied.sort_values("Project").iloc[0]["Project"]
+        types = []
+        for _, row in subdf.iterrows():
+            if row["Project"] == primary_project:
+                types.append("primary")
+            elif row["AffiliationPct"] >= dda.SECONDARY_THRESHOLD:
+                types.append("secondary")
+            elif row["AffiliationPct"] < dda.INCIDENTAL_THRESHOLD:
+                types.append("incidental")
+            else:
+                types.append("other")
+        return pd.Series(types, index=subdf.index)
+
+    return scores.groupby("Username", group_keys=False)[scores.columns.tolist()].apply(assign)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(sizes, legacy_max, seed):
+    print(f"{'rows':>12} {'developers':>11} {'vectorized':>11} {'rows/s':>12} {'legacy':>10} {'speedup':>8} match")
+    for n in sizes:
+        df = synthetic_developer_info(n, seed)
+        scores, t_vec = timed(dda.derive_affiliations, df)
+        line = f"{n:>12,} {scores['Username'].nunique():>11,} {t_vec:>10.2f}s {n / t_vec:>12,.0f}"
+        if n <= legacy_max:
+            base = scores.drop(columns=["AffiliationType", "DriveBy"])
+            legacy, t_old = timed(legacy_assign_affiliation_types, base)
+            match = legacy.reindex(scores.index).equals(scores["AffiliationType"])
+            line += f" {t_old:>9.2f}s {t_old / t_vec:>7.1f}x {match}"
+        else:
+            line += f" {'-':>10} {'-':>8} -"
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark derive_dev_affiliation at increasing sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest size at which the former implementation is also timed")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(args.sizes, args.legacy_max, args.seed)
@@ -0,0 +1,113 @@
+"""
+bench_involvement.py
+
+Scaling benchmark for process_developer_involvement.py.
+
+Writes synthetic developer_info_cleaned-shaped CSVs (the developer rows of bench_affiliation.py plus a scenario per
+issue) and times the in-memory and the chunked streaming mode at each size, checking that both write the same files.
+Up to --legacy-max rows, the former row-wise apply implementation is timed too and compared byte for byte.
+
+Usage (from the benchmarks directory):
+    python bench_involvement.py [--sizes 10000 1000000 10000000] [--chunksize 1000000] [--legacy-max 100000]
+"""
+
+import os
+import sys
+import time
+import filecmp
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts-data-generation"))
+
+import process_developer_involvement as pdi  # noqa: E402
+from bench_affiliation import synthetic_developer_info  # noqa: E402
+
+OUTPUT_FILES = ["downstream_driven.csv", "upstream_driven.csv"]
+# Scenarios are numbered 1..N_SCENARIOS; odd ones are downstream-driven
+N_SCENARIOS = 60
+
+
+def write_synthetic_input(path, n_rows, seed=42):
+    df = synthetic_developer_info(n_rows, seed)
+    scenario = pd.Series(df["Issue"].cat.codes % N_SCENARIOS + 1, index=df.index)
+    df["Downstream-driven-fix"] = (scenario % 2 == 1).to_numpy()
+    df["Scenario"] = scenario.astype(np.int64)
+    df.to_csv(path, index=False)
+
+
+# --- Former implementation, kept for comparison ---
+
+def legacy_process_developer_info(input_file, output_dir):
+    def involvement(row):
+        if row['PR-author']:
+            return 3
+        elif row['BugReport-author'] or row['Commented'] or row['Reviewer']:
+            return 2
+        return 0
+
+    df = pd.read_csv(input_file)
+    df['project'] = df['Issue'].apply(lambda issue: issue.split('#')[0])
+    df['involvement'] = df.apply(involvement, axis=1)
+    grouped = df.groupby(['Username', 'Scenario', 'project', 'Downstream-driven-fix']).agg({
+        'involvement': 'max'
+    }).reset_index()
+    grouped = grouped.rename(columns={'Username': 'username', 'involvement': 'max_inv', 'Scenario': 'scenario'})
+    columns = ['username', 'project', 'scenario', 'max_inv']
+    grouped[grouped['Downstream-driven-fix'] == True][columns].to_csv(
+        os.path.join(output_dir, OUTPUT_FILES[0]), index=False)
+    grouped[grouped['Downstream-driven-fix'] == False][columns].to_csv(
+        os.path.join(output_dir, OUTPUT_FILES[1]), index=False)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        fn(*args)
+    return time.perf_counter() - start
+
+
+def same_outputs(dir_a, dir_b):
+    return all(filecmp.cmp(os.path.join(dir_a, f), os.path.join(dir_b, f), shallow=False) for f in OUTPUT_FILES)
+
+
+def run(sizes, chunksize, legacy_max, seed):
+    print(f"{'rows':>12} {'in-memory':>10} {'chunked':>10} {'rows/s':>12} {'legacy':>10} {'speedup':>8} match")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            input_file = os.path.join(tmp, "developer_info_cleaned.csv")
+            write_synthetic_input(input_file, n, seed)
+            dirs = {name: os.path.join(tmp, name) for name in ("memory", "chunked", "legacy")}
+            for d in dirs.values():
+                os.makedirs(d, exist_ok=True)
+
+            t_mem = timed(pdi.process_developer_info, input_file, dirs["memory"])
+            t_chunk = timed(pdi.process_developer_info, input_file, dirs["chunked"], chunksize)
+            match = same_outputs(dirs["memory"], dirs["chunked"])
+            line = f"{n:>12,} {t_mem:>9.2f}s {t_chunk:>9.2f}s {n / t_chunk:>12,.0f}"
+            if n <= legacy_max:
+                t_old = timed(legacy_process_developer_info, input_file, dirs["legacy"])
+                match = match and same_outputs(dirs["memory"], dirs["legacy"])
+                line += f" {t_old:>9.2f}s {t_old / t_mem:>7.1f}x"
+            else:
+                line += f" {'-':>10} {'-':>8}"
+            print(f"{line} {match}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark process_developer_involvement at increasing sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="rows per chunk in the streaming mode")
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest size at which the former implementation is also timed")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(args.sizes, args.chunksize, args.legacy_max, args.seed)
@@ -0,0 +1,513 @@
+"""
+bench_pipeline.py
+
+Synthetic-scale benchmark of every pipeline stage, from the workbook extraction to the network analysis.
+
+For each size (number of developer_info rows), a seeded generator writes data shaped like the committed data:
+~3.5 developer rows per issue, ~3 issues per scenario, ~3.4 rows per developer, Zipf-like developer activity
+(a few developers appear on a large share of the issues) and project popularity, role flags at the observed rates,
+and a sprinkling of bot accounts. From it come developer_info.csv, developer_info_cleaned.csv, combined_issues.csv
+and a CPCB-style workbook. Every stage then runs in a fresh process (so imports and memory do not carry over between
+stages) and reports its wall time, its peak RSS (sampled over its whole process tree, so the memory of any worker
+processes it starts is added to its own) and its throughput in developer rows per second. Stages that read another
+stage's output (the network analysis reads the involvement and affiliation tables) run after it; selecting them
+selects their prerequisites.
+
+mine_dev_info.py is measured separately, against the local mock GitHub server of mock_github_server.py with an
+injected per-request latency, on --mine-issues issues of the synthetic combined_issues.csv (throughput in issues/s).
+
+Results can be saved as a baseline (--save-baseline) and later runs compared against it: a stage whose time or peak
+RSS grows by more than --tolerance (relative, plus a small absolute noise allowance) over the baseline is reported as
+a regression and the exit status is 1.
+Timings depend on the machine, so baselines are only comparable on the machine that recorded them.
+
+Usage (from the benchmarks directory):
+    python bench_pipeline.py [--sizes 1000 100000 10000000] [--stages STAGE ...] [--seed 42]
+                             [--network-max 100000] [--workbook-max 1000000]
+                             [--mine-issues 200] [--latency 0.02] [--workers 8]
+                             [--baseline pipeline_baseline.json] [--save-baseline] [--tolerance 0.25] [--output PATH]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BENCH_DIR, "..", "scripts-data-generation")
+NETWORK_DIR = os.path.join(BENCH_DIR, "..", "network-analysis")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, NETWORK_DIR)
+
+BASELINE_JSON = os.path.join(BENCH_DIR, "pipeline_baseline.json")
+
+ROLE_COLUMNS = ["PR-author", "BugReport-author", "Commented", "Reviewer"]
+# Probability of each role flag on a row, as in the committed developer_info_cleaned.csv
+ROLE_RATES = [0.14, 0.15, 0.93, 0.02]
+FIX_TYPES = ["PF1", "PF2", "PF4", "PF5", "PF6", "PF8", "PF9"]
+FIX_RATES = [0.04, 0.40, 0.29, 0.06, 0.11, 0.07, 0.03]
+DOWNSTREAM_FIXES = ["PF1", "PF4", "PF5"]
+N_PATTERNS = 12
+BOT_NAMES = ["dependabot[bot]", "codecov-io", "coveralls", "github-actions[bot]", "pre-commit-ci[bot]"]
+BOT_RATE = 0.01
+
+# Differences below these are noise, whatever the relative change
+NOISE = {"seconds": 0.1, "peak_rss_mb": 10.0}
+# Seconds between samples of a stage's process tree memory
+RSS_SAMPLE_INTERVAL = 0.02
+
+ROWS_PER_ISSUE = 3.5
+ISSUES_PER_SCENARIO = 3
+ROWS_PER_DEVELOPER = 3.4
+
+
+# --- Synthetic data ---
+
+def zipf_choice(rng, n_values, size, exponent=1.0):
+    """Indices in [0, n_values) with probability proportional to 1 / (rank + 1)^exponent."""
+    weights = 1.0 / np.arange(1, n_values + 1) ** exponent
+    return np.searchsorted(np.cumsum(weights / weights.sum()), rng.random(size), side="right").clip(0, n_values - 1)
+
+
+def synthetic_tables(n_rows, seed=42):
+    """(developer_info, combined_issues) frames; developer_info includes bot rows."""
+    rng = np.random.default_rng(seed)
+    n_issues = max(10, int(n_rows / ROWS_PER_ISSUE))
+    n_devs = max(10, int(n_rows / ROWS_PER_DEVELOPER))
+    n_projects = max(5, int(np.sqrt(n_issues)))
+
+    # Issues: project popularity is skewed, scenarios group consecutive issues
+    projects = zipf_choice(rng, n_projects, n_issues, 1.1)
+    numbers = rng.integers(1, 100_000, n_issues)
+    scenario = np.arange(n_issues) // ISSUES_PER_SCENARIO + 1
+    n_scenarios = int(scenario[-1])
+    fix_of_scenario = rng.choice(FIX_TYPES, size=n_scenarios + 1, p=FIX_RATES)
+    pattern_of_scenario = rng.integers(1, N_PATTERNS + 1, n_scenarios + 1)
+    refs = np.array([f"org{p}/repo{p}#{k}" for p, k in zip(projects, numbers)], dtype=object)
+    fix = fix_of_scenario[scenario]
+    pattern = np.array([f"PS{p}" for p in pattern_of_scenario[scenario]], dtype=object)
+    combined = pd.DataFrame({
+        "GitHub-Issue": refs,
+        "PR": rng.random(n_issues) < 0.46,
+        "Fix-type": fix,
+        "Pattern-Structure": pattern,
+        "Downstream-driven-fix": np.isin(fix, DOWNSTREAM_FIXES),
+        "Scenario": scenario,
+        "ID": [f"{p}-{s}" for p, s in zip(pattern, scenario)],
+    }).drop_duplicates(subset=["GitHub-Issue"])
+    issue_index = combined.index.to_numpy()
+
+    # Developer rows: uniform issues, Zipf-like developer activity, some bot accounts
+    issues = issue_index[rng.integers(0, len(issue_index), n_rows)]
+    usernames = np.array([f"dev{i}" for i in range(n_devs)], dtype=object)[zipf_choice(rng, n_devs, n_rows)]
+    bots = rng.random(n_rows) < BOT_RATE
+    usernames[bots] = np.array(BOT_NAMES, dtype=object)[rng.integers(0, len(BOT_NAMES), bots.sum())]
+    developer_info = pd.DataFrame({"Username": usernames, "Issue": refs[issues]})
+    for col, rate in zip(ROLE_COLUMNS, ROLE_RATES):
+        developer_info[col] = rng.random(n_rows) < rate
+    developer_info["Commented"] |= ~developer_info[ROLE_COLUMNS].any(axis=1)
+    for col in ["Fix-type", "Pattern-Structure", "Downstream-driven-fix", "Scenario"]:
+        developer_info[col] = combined[col].to_numpy()[np.searchsorted(issue_index, issues)]
+    developer_info = developer_info.drop_duplicates(subset=["Username", "Issue"])
+    return developer_info, combined.reset_index(drop=True)
+
+
+def write_workbook(combined, path):
+    """CPCB-style workbook: one row per scenario on the sheet of its pattern, issue and PR columns side by side."""
+    from openpyxl import Workbook
+
+    scenarios = {}
+    for scenario, pattern, fix, ref, is_pr in zip(combined["Scenario"], combined["Pattern-Structure"],
+                                                  combined["Fix-type"], combined["GitHub-Issue"], combined["PR"]):
+        entry = scenarios.setdefault(int(scenario), (pattern, fix, [], []))
+        entry[3 if is_pr else 2].append(ref)
+
+    headers = ["#", "Scenario", "Fix-type", "Issue", "PR", "Issue 2", "PR 2", "Notes"]
+    workbook = Workbook(write_only=True)
+    sheets = {}
+    for scenario, (pattern, fix, issues, prs) in sorted(scenarios.items()):
+        if pattern not in sheets:
+            sheets[pattern] = workbook.create_sheet(pattern)
+            sheets[pattern].append(headers)
+        issues, prs = (issues + [None, None])[:2], (prs + [None, None])[:2]
+        sheets[pattern].append([scenario, scenario % 7 + 1, fix, issues[0], prs[0], issues[1], prs[1],
+                                "see commit abc" if scenario % 50 == 0 else None])
+    workbook.save(path)
+
+
+def data_paths(directory):
+    names = {
+        "developer_info": "developer_info.csv", "cleaned": "developer_info_cleaned.csv",
+        "combined": "combined_issues.csv", "workbook": "CPCB_patterns_final.xlsx",
+        "extracted": "combined_issues_extracted.csv", "suspicious": "suspicious_bots.csv",
+        "filtered": "developer_info_filtered.csv", "audit": "bot_audit.csv",
+        "downstream": "downstream_driven.csv", "upstream": "upstream_driven.csv",
+        "affiliations": "dev_affiliations_v2.csv", "analysis": "data_analysis.json",
+        "metrics": "network_metrics.json", "communities": "community_stability.json",
+    }
+    return {key: os.path.join(directory, name) for key, name in names.items()}
+
+
+def write_synthetic_data(directory, n_rows, seed=42, workbook=True):
+    paths = data_paths(directory)
+    developer_info, combined = synthetic_tables(n_rows, seed)
+    developer_info.to_csv(paths["developer_info"], index=False)
+    developer_info[~developer_info["Username"].isin(BOT_NAMES)].to_csv(paths["cleaned"], index=False)
+    combined.to_csv(paths["combined"], index=False)
+    if workbook:
+        write_workbook(combined, paths["workbook"])
+    return paths
+
+
+# --- Stages (run in a fresh process each) ---
+
+def run_extract_issues(paths, options):
+    import extract_issues
+    extract_issues.main(paths["workbook"], paths["extracted"], options["workers"], cache_dir=None)
+
+
+def run_detect_bots(paths, options):
+    import detect_bots
+    detect_bots.INPUT_FILE, detect_bots.OUTPUT_FILE = paths["developer_info"], paths["suspicious"]
+    detect_bots.main()
+
+
+def run_filter_bots(paths, options):
+    import filter_bots
+    filter_bots.main(paths["developer_info"], paths["filtered"], paths["audit"])
+
+
+def run_process_developer_involvement(paths, options):
+    import process_developer_involvement
+    process_developer_involvement.process_developer_info(paths["cleaned"], os.path.dirname(paths["downstream"]))
+
+
+def run_derive_dev_affiliation(paths, options):
+    import columnar
+    import derive_dev_affiliation
+    scores = derive_dev_affiliation.derive_affiliations(derive_dev_affiliation.load_developer_info(paths["cleaned"]))
+    columnar.write_stage(scores, paths["affiliations"])
+
+
+def run_data_analysis(paths, options):
+    import data_analysis
+    data_analysis.main(paths["combined"], paths["cleaned"], paths["analysis"])
+
+
+def run_network_metrics(paths, options):
+    import network_metrics
+    network_metrics.main([paths["downstream"], paths["upstream"]], path_sources=options["path_sources"],
+                         output_json=paths["metrics"])
+
+
+def run_betweenness(paths, options):
+    import betweenness
+    betweenness.main([paths["downstream"], paths["upstream"]], options["workers"], options["pivots"],
+                     output_dir=os.path.dirname(paths["downstream"]))
+
+
+def run_communities(paths, options):
+    import communities
+    communities.main([paths["downstream"], paths["upstream"]], options["restarts"], workers=options["workers"],
+                     affiliations_csv=paths["affiliations"], output_dir=os.path.dirname(paths["downstream"]),
+                     output_json=paths["communities"])
+
+
+# name -> (runner, prerequisite stages, is a network stage)
+STAGES = {
+    "extract_issues": (run_extract_issues, [], False),
+    "detect_bots": (run_detect_bots, [], False),
+    "filter_bots": (run_filter_bots, [], False),
+    "process_developer_involvement": (run_process_developer_involvement, [], False),
+    "derive_dev_affiliation": (run_derive_dev_affiliation, [], False),
+    "data_analysis": (run_data_analysis, [], False),
+    "network_metrics": (run_network_metrics, ["process_developer_involvement"], True),
+    "betweenness": (run_betweenness, ["process_developer_involvement"], True),
+    "communities": (run_communities, ["process_developer_involvement", "derive_dev_affiliation"], True),
+}
+
+
+def _tree_rss_kib(root):
+    """Current RSS of a process and all its descendants (worker processes included), from /proc/*/stat (Linux)."""
+    page_kib = os.sysconf("SC_PAGE_SIZE") // 1024
+    children, rss = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue  # exited meanwhile
+        fields = stat[stat.rfind(b")") + 2:].split()  # after "pid (comm) ": state, ppid, ..., rss is the 22nd
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss[int(entry)] = int(fields[21]) * page_kib
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, ()))
+    return total
+
+
+@contextlib.contextmanager
+def tree_peak_rss():
+    """
+    Sample the summed RSS of this process and its descendants every RSS_SAMPLE_INTERVAL while the block runs;
+    yields a dict whose "kib" is the peak (0 without /proc).
+    """
+    peak = {"kib": 0}
+    if not os.path.isdir(f"/proc/{os.getpid()}"):
+        yield peak
+        return
+    done = threading.Event()
+
+    def sample():
+        while True:
+            peak["kib"] = max(peak["kib"], _tree_rss_kib(os.getpid()))
+            if done.wait(RSS_SAMPLE_INTERVAL):
+                break
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield peak
+    finally:
+        done.set()
+        thread.join()
+
+
+def _peak_rss_mb(tree_kib=0):
+    """
+    Peak memory of a stage: the sampled peak of its whole process tree (the stage and its worker processes
+    together), and at least the peak of this process or of its largest finished child (ru_maxrss, KiB on Linux),
+    which also covers spikes between samples.
+    """
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return max(peak_mb, tree_kib / 1024)
+
+
+def _as_script():
+    """Set up a spawned process like a script run: in the scripts directory, with the platform's start method."""
+    os.chdir(SCRIPTS_DIR)
+    # A spawned process starts its own pools with spawn too; the stages' pools would then re-import everything
+    multiprocessing.set_start_method(None, force=True)
+
+
+def _stage_process(name, paths, options, conn):
+    runner = STAGES[name][0]
+    _as_script()
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), tree_peak_rss() as tree:
+            runner(paths, options)
+        conn.send({"seconds": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb(tree["kib"])})
+    except Exception as e:  # reported in the results table
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def run_in_process(target, *args):
+    """Run target(*args, conn) in a fresh interpreter and return what it sends back."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=target, args=args + (sender,))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": "stage process died"}
+    process.join()
+    return result
+
+
+def run_stage(name, paths, options):
+    return run_in_process(_stage_process, name, paths, options)
+
+
+# --- mine_dev_info against the mock server ---
+
+def _mine_process(input_csv, output_csv, workers, conn):
+    _as_script()
+    try:
+        import github_api
+        import mine_dev_info
+        github_api.configure_cache("")  # every request goes to the server
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), tree_peak_rss() as tree:
+            mine_dev_info.main(input_csv, output_csv, workers)
+        conn.send({"seconds": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb(tree["kib"])})
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def bench_mining(n_issues, latency, workers, seed=42):
+    from mock_github_server import MockGitHubServer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, combined = synthetic_tables(int(n_issues * ROWS_PER_ISSUE), seed)
+        input_csv = os.path.join(tmp, "combined_issues.csv")
+        combined.head(n_issues).to_csv(input_csv, index=False)
+        with MockGitHubServer(latency=latency) as server:
+            # The API root is read when github_api is imported, i.e. in the spawned process
+            previous = os.environ.get("GITHUB_API_URL")
+            os.environ["GITHUB_API_URL"] = server.base_url
+            try:
+                result = run_in_process(_mine_process, input_csv, os.path.join(tmp, "developer_info.csv"), workers)
+            finally:
+                if previous is None:
+                    del os.environ["GITHUB_API_URL"]
+                else:
+                    os.environ["GITHUB_API_URL"] = previous
+            result["requests"] = server.request_count
+    result.update({"stage": "mine_dev_info", "rows": min(n_issues, len(combined)), "unit": "issues",
+                   "latency": latency, "workers": workers})
+    if "seconds" in result:
+        result["throughput"] = result["rows"] / result["seconds"]
+    return result
+
+
+# --- Suite ---
+
+def select(stages):
+    """The selected stages plus their prerequisites, in STAGES order."""
+    wanted = set(stages)
+    for name in stages:
+        wanted.update(STAGES[name][1])
+    return [name for name in STAGES if name in wanted]
+
+
+def run_suite(sizes, stages, options, seed=42, network_max=100_000, workbook_max=1_000_000):
+    results = []
+    print(f"{'stage':<30} {'rows':>12} {'time':>9} {'rows/s':>12} {'peak RSS':>10}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_synthetic_data(tmp, n, seed, workbook="extract_issues" in stages and n <= workbook_max)
+            for name in stages:
+                if (STAGES[name][2] and n > network_max) or (name == "extract_issues" and n > workbook_max):
+                    result = {"skipped": f"above --{'network' if STAGES[name][2] else 'workbook'}-max"}
+                else:
+                    result = run_stage(name, paths, options)
+                result.update({"stage": name, "rows": n, "unit": "rows"})
+                if "seconds" in result:
+                    result["throughput"] = n / result["seconds"]
+                results.append(result)
+                print_result(result)
+    return results
+
+
+def print_result(result):
+    head = f"{result['stage']:<30} {result['rows']:>12,}"
+    if "seconds" in result:
+        print(f"{head} {result['seconds']:>8.2f}s {result['throughput']:>12,.0f} {result['peak_rss_mb']:>7.0f} MB"
+              + (f"  {result['unit']}/s" if result["unit"] != "rows" else ""))
+    else:
+        print(f"{head}  {result.get('error') or result.get('skipped')}")
+
+
+def _key(result):
+    return f"{result['stage']}@{result['rows']}"
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against a baseline: [(key, metric, baseline value, new value)]."""
+    known = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = known.get(_key(result))
+        if before is None or "seconds" not in before:
+            continue
+        if "seconds" not in result:
+            regressions.append((_key(result), "status", "ok", result.get("error") or result.get("skipped")))
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if result[metric] > before[metric] * (1 + tolerance) + NOISE[metric]:
+                regressions.append((_key(result), metric, before[metric], result[metric]))
+    return regressions
+
+
+def environment():
+    import columnar
+    return {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "pandas": pd.__version__, "numpy": np.__version__, "data_format": columnar.DATA_FORMAT}
+
+
+def main(args):
+    options = {"workers": args.workers, "pivots": args.pivots, "path_sources": args.path_sources,
+               "restarts": args.restarts}
+    results = run_suite(args.sizes, select(args.stages), options, args.seed, args.network_max, args.workbook_max)
+    if args.mine_issues:
+        result = bench_mining(args.mine_issues, args.latency, args.workers, args.seed)
+        print_result(result)
+        results.append(result)
+
+    report = {"environment": environment(), "seed": args.seed, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}: nothing was compared (record one with --save-baseline)")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if not regressions:
+        print(f"✅ No regression beyond {args.tolerance:.0%} against {args.baseline}")
+        return 0
+    print(f"❌ Regressions against {args.baseline}:")
+    for key, metric, before, after in regressions:
+        if metric == "status":
+            print(f"  {key}: {after}")
+        else:
+            print(f"  {key} {metric}: {before:.3g} -> {after:.3g} ({after / before - 1:+.0%})")
+    return 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 10_000_000],
+                        help="developer_info rows")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--network-max", type=int, default=100_000,
+                        help="largest size at which the network stages run")
+    parser.add_argument("--workbook-max", type=int, default=1_000_000,
+                        help="largest size at which a workbook is written and extract_issues runs")
+    parser.add_argument("--workers", type=int, default=8, help="worker processes/threads of the parallel stages")
+    parser.add_argument("--pivots", type=int, default=64, help="sampled sources of the betweenness approximation")
+    parser.add_argument("--path-sources", type=int, default=256, help="sampled sources of the average path length")
+    parser.add_argument("--restarts", type=int, default=8, help="Louvain restarts")
+    parser.add_argument("--mine-issues", type=int, default=200, help="issues mined against the mock (0 = skip)")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock server latency per request (seconds)")
+    parser.add_argument("--baseline", default=BASELINE_JSON)
+    parser.add_argument("--save-baseline", action="store_true", help="record this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative growth of time or peak RSS reported as a regression")
+    parser.add_argument("--output", default=None, help="also write this run's results to a JSON file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,274 @@
+"""
+betweenness.py
+
+Betweenness centrality of the collaboration networks built by dev_network.py, as dev-network.R computes it with
+betweenness(g, weights = inv_weight, normalized = TRUE).
+
+Exact mode runs weighted Brandes (one Dijkstra + dependency accumulation per source) with 1/weight edge lengths.
+The sources are split across a process pool; the CSR arrays of the graph (indptr, indices, lengths) are placed in
+shared memory once and attached by every worker, so the graph is never pickled per task. Each worker returns the sum
+of its sources' dependencies and the partial sums are added up.
+
+Approximate mode (pivots=k) runs Brandes from k sources sampled without replacement and scales the dependencies up
+(Brandes & Pich, 2007). Every node's normalized score is then a mean of k per-source terms bounded by n/(n-1), so
+Hoeffding's inequality with a union bound over the n nodes gives an error bound that holds for all nodes at once
+with the requested confidence; the per-node standard error of the sample mean is reported too.
+
+Normalization follows igraph for undirected graphs: the pairwise betweenness times 2 / ((n-1)(n-2)), with n the
+number of nodes of the whole graph (isolated developers included). Shortest path ties are detected with igraph's
+relative epsilon, so paths of equal length through different developers are all counted. Rankings break ties by
+node order, like R's sort(decreasing = TRUE).
+
+Usage:
+    python betweenness.py [--inputs PATH ...] [--workers N] [--pivots K] [--confidence 0.95] [--top 10]
+
+Writes one CSV per network to ../data/<input>_betweenness.csv (username, betweenness[, stderr]).
+"""
+
+import os
+import math
+import heapq
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import dev_network
+import instrumentation  # importable once dev_network has put scripts-data-generation on the path
+from network_metrics import distance_matrix, load_graph
+
+# Relative tolerance under which two path lengths are equal (igraph's IGRAPH_SHORTEST_PATH_EPSILON)
+EPSILON = 1e-10
+# Below this many sources, Brandes runs in the calling process (a pool costs more than it saves)
+MIN_PARALLEL_SOURCES = 256
+# Source chunks per worker, so that uneven chunks even out
+CHUNKS_PER_WORKER = 4
+
+RANK_GROUPS = (("Top 1", 1), ("Top 2-5", 5), ("Top 6-10", 10))
+
+
+# --- Brandes ---
+
+def _compare(a, b):
+    """-1, 0 or 1 as a < b, a == b or a > b, with path lengths within EPSILON (relative) counted as equal."""
+    if a == b:
+        return 0
+    if abs(a - b) <= EPSILON * (abs(a) + abs(b)):
+        return 0
+    return -1 if a < b else 1
+
+
+def accumulate_dependencies(indptr, indices, lengths, sources, squares=False):
+    """
+    Sum over the given sources of each node's dependency (Brandes' delta_s), and optionally of its square.
+
+    indptr, indices and lengths are the CSR arrays of a symmetric graph with positive edge lengths.
+    """
+    n = len(indptr) - 1
+    total = np.zeros(n)
+    total_sq = np.zeros(n) if squares else None
+    for s in sources:
+        dist = [math.inf] * n
+        sigma = [0.0] * n
+        preds = [[] for _ in range(n)]
+        done = [False] * n
+        order = []
+        dist[s] = 0.0
+        sigma[s] = 1.0
+        heap = [(0.0, s)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if done[v]:
+                continue
+            done[v] = True
+            order.append(v)
+            start, end = indptr[v], indptr[v + 1]
+            for w, length in zip(indices[start:end].tolist(), lengths[start:end].tolist()):
+                if done[w]:
+                    continue
+                alt = d + length
+                cmp = -1 if dist[w] == math.inf else _compare(alt, dist[w])
+                if cmp < 0:
+                    dist[w] = alt
+                    sigma[w] = sigma[v]
+                    preds[w] = [v]
+                    heapq.heappush(heap, (alt, w))
+                elif cmp == 0:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+
+        delta = [0.0] * n
+        for w in reversed(order):
+            coefficient = (1.0 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coefficient
+        delta[s] = 0.0
+        delta = np.array(delta)
+        total += delta
+        if squares:
+            total_sq += delta * delta
+    return total, total_sq
+
+
+# --- Shared memory process pool ---
+
+_SHARED = {}
+
+
+def _share(arrays):
+    """Copy arrays into new shared memory blocks; return the blocks and the specs workers attach with."""
+    blocks, specs = [], {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def _attach(specs):
+    """Pool initializer: map the shared graph arrays into this worker."""
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _SHARED[name] = (block, np.ndarray(shape, np.dtype(dtype), buffer=block.buf))
+
+
+def _worker_dependencies(sources, squares):
+    return accumulate_dependencies(_SHARED["indptr"][1], _SHARED["indices"][1], _SHARED["lengths"][1],
+                                   sources, squares)
+
+
+def dependencies(graph, sources, workers=None, squares=False):
+    """accumulate_dependencies over the given sources, split across a process pool when there are enough of them."""
+    distances = distance_matrix(graph)
+    arrays = {"indptr": distances.indptr, "indices": distances.indices, "lengths": distances.data}
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(sources) < MIN_PARALLEL_SOURCES:
+        return accumulate_dependencies(arrays["indptr"], arrays["indices"], arrays["lengths"], sources, squares)
+
+    # Interleaved chunks: neighbouring sources (often in the same dense region) go to different tasks
+    n_chunks = workers * CHUNKS_PER_WORKER
+    chunks = [sources[k::n_chunks] for k in range(n_chunks) if len(sources[k::n_chunks])]
+    blocks, specs = _share(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+            total = np.zeros(graph.n_nodes)
+            total_sq = np.zeros(graph.n_nodes) if squares else None
+            for part, part_sq in pool.map(_worker_dependencies, chunks, [squares] * len(chunks)):
+                total += part
+                if squares:
+                    total_sq += part_sq
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return total, total_sq
+
+
+# --- Betweenness ---
+
+def _normalizer(n):
+    """Scale from summed source dependencies to igraph's normalized undirected betweenness."""
+    return 1.0 / ((n - 1) * (n - 2)) if n > 2 else 0.0
+
+
+def exact_betweenness(graph, workers=None):
+    """Normalized betweenness of every node (igraph's betweenness(normalized = TRUE) with 1/weight lengths)."""
+    total, _ = dependencies(graph, np.arange(graph.n_nodes), workers)
+    return total * _normalizer(graph.n_nodes)
+
+
+def approximate_betweenness(graph, pivots, workers=None, seed=0, confidence=0.95):
+    """
+    Normalized betweenness estimated from `pivots` sampled sources.
+
+    Returns (scores, stderr, error_bound): the estimates, their per-node standard errors, and a bound that holds for
+    every node simultaneously with probability at least `confidence`.
+    """
+    n = graph.n_nodes
+    if pivots >= n:
+        return exact_betweenness(graph, workers), np.zeros(n), 0.0
+    sources = np.sort(np.random.default_rng(seed).choice(n, size=pivots, replace=False))
+    total, total_sq = dependencies(graph, sources, workers, squares=True)
+    # Per-source terms Y_s = n * delta_s * normalizer: the exact score is their mean over all n sources
+    scale = n * _normalizer(n)
+    scores = total * scale / pivots
+    variance = np.maximum(total_sq * scale ** 2 / pivots - scores ** 2, 0.0)
+    # Sample variance, with the finite population correction for sampling without replacement
+    stderr = np.sqrt(variance * pivots / max(pivots - 1, 1) / pivots * (n - pivots) / (n - 1))
+    term_range = n / (n - 1)
+    error_bound = term_range * math.sqrt(math.log(2 * n / (1 - confidence)) / (2 * pivots))
+    return scores, stderr, error_bound
+
+
+@instrumentation.timed()
+def betweenness(graph, workers=None, pivots=None, seed=0, confidence=0.95):
+    """Exact betweenness, or the approximation from `pivots` sources (see approximate_betweenness)."""
+    if pivots:
+        return approximate_betweenness(graph, pivots, workers, seed, confidence)
+    return exact_betweenness(graph, workers), None, 0.0
+
+
+# --- Rankings ---
+
+def ranking(scores):
+    """Node indices by decreasing betweenness; ties keep node order (R's sort(decreasing = TRUE))."""
+    return np.argsort(-np.asarray(scores), kind="stable")
+
+
+def rank_groups(scores):
+    """Label of every node for the betweenness rank plot: Top 1, Top 2-5, Top 6-10 or Other."""
+    labels = np.full(len(scores), "Other", dtype=object)
+    order = ranking(scores)
+    start = 0
+    for label, end in RANK_GROUPS:
+        labels[order[start:end]] = label
+        start = end
+    return labels
+
+
+def output_path(input_path, output_dir):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"{stem}_betweenness.csv")
+
+
+def main(inputs=dev_network.INPUT_CSVS, workers=None, pivots=None, confidence=0.95, top=10,
+         output_dir=dev_network.DATA_DIR):
+    for path in inputs:
+        graph = load_graph(path)
+        scores, stderr, bound = betweenness(graph, workers, pivots, confidence=confidence)
+        name = os.path.splitext(os.path.basename(path))[0]
+        mode = f"{pivots} pivots, error <= {bound:.4g} at {confidence:.0%}" if pivots else "exact"
+        print(f"\nTop {top} betweenness centrality ({name}, inv_weight, {mode}):")
+        for k in ranking(scores)[:top]:
+            print(f"  {graph.names[k]:<30} {scores[k]:.6f}")
+        print(f"Mean: {scores.mean():.6g}")
+        print(f"Variance: {scores.var(ddof=1):.6g}")
+
+        table = pd.DataFrame({"username": graph.names, "betweenness": scores, "rank_group": rank_groups(scores)})
+        if stderr is not None:
+            table["stderr"] = stderr
+        out = output_path(path, output_dir)
+        table.to_csv(out, index=False)
+        print(f"✅ Betweenness saved to {out}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Betweenness centrality of the collaboration networks.")
+    parser.add_argument("--inputs", nargs="+", default=dev_network.INPUT_CSVS,
+                        help="involvement CSVs or .npz graph files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--pivots", type=int, default=None,
+                        help="approximate from this many sampled sources (default: exact)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="confidence of the approximation bound")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output-dir", default=dev_network.DATA_DIR)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('betweenness'):
+        main(args.inputs, args.workers, args.pivots, args.confidence, args.top, args.output_dir)
@@ -0,0 +1,320 @@
+"""
+communities.py
+
+Louvain communities of the collaboration networks built by dev_network.py, and their agreement (NMI) with the
+developers' primary project affiliations, as in the community and NMI sections of dev-network.R.
+
+Louvain alternates a local moving phase (nodes visited in a seeded random order, each moved to the neighbouring
+community with the largest modularity gain) with an aggregation phase (communities collapsed into nodes with one
+sparse product P^T A P), until no node moves. A run is fully determined by its seed.
+
+A single run says little about how stable the communities are, so many seeded restarts run in parallel worker
+processes (the graph arrays are sent once per worker). For every restart the modularity, the number of communities
+and the NMI against the affiliations are reported, plus the NMI between restarts. NMI is computed as igraph's
+compare(method = "nmi"), 2 I(X; Y) / (H(X) + H(Y)), over the developers that have a primary affiliation, from
+the contingency counts of all restarts at once (one count over restart x community x label codes; the pairs of
+restarts are counted in blocks).
+
+Affiliations are the AffiliationType == "primary" rows of derive_dev_affiliation.py's output
+(../data/dev_affiliations_primary.csv).
+
+Usage:
+    python communities.py [--inputs PATH ...] [--restarts N] [--seed S] [--workers N] [--affiliations PATH]
+
+Writes the membership of the highest-modularity restart to ../data/<input>_communities.csv and the restart
+statistics to ../data/community_stability.json.
+"""
+
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import xlogy
+
+import dev_network
+import columnar  # importable once dev_network has put scripts-data-generation on the path
+import instrumentation
+from network_metrics import load_graph
+
+AFFILIATIONS_CSV = os.path.join(dev_network.DATA_DIR, "dev_affiliations_primary.csv")
+OUTPUT_JSON = os.path.join(dev_network.DATA_DIR, "community_stability.json")
+
+# Smallest modularity gain worth a move (guards against cycling on floating point noise)
+MIN_GAIN = 1e-12
+# Labels per block of the pairwise NMI contingency counts (bounds their memory)
+PAIR_BLOCK = 1 << 22
+
+
+# --- Louvain ---
+
+def _local_moving(adjacency, resolution, rng):
+    """One Louvain level: move nodes between communities until no move improves modularity."""
+    n = adjacency.shape[0]
+    indptr, indices, weights = adjacency.indptr.tolist(), adjacency.indices.tolist(), adjacency.data.tolist()
+    strength = np.asarray(adjacency.sum(axis=1)).ravel().tolist()
+    m2 = sum(strength)
+    community = list(range(n))
+    total = strength[:]  # summed strength of each community
+    improved = False
+    order = rng.permutation(n).tolist()
+    moved = True
+    while moved:
+        moved = False
+        for i in order:
+            links = {}
+            for j, w in zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]):
+                if j != i:
+                    links[community[j]] = links.get(community[j], 0.0) + w
+            current = community[i]
+            k_i = strength[i] * resolution / m2
+            total[current] -= strength[i]
+            best, best_gain = current, links.get(current, 0.0) - total[current] * k_i
+            for c, w in links.items():
+                gain = w - total[c] * k_i
+                if gain > best_gain + MIN_GAIN:
+                    best, best_gain = c, gain
+            total[best] += strength[i]
+            if best != current:
+                community[i] = best
+                moved = improved = True
+    return np.array(community), improved
+
+
+def _relabel(membership):
+    """Number communities 0, 1, ... by first appearance in node order."""
+    _, first, inverse = np.unique(membership, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse.ravel()]
+
+
+def louvain(adjacency, seed=0, resolution=1.0):
+    """Louvain community of every node of a symmetric weighted adjacency matrix."""
+    rng = np.random.default_rng(seed)
+    adjacency = sp.csr_matrix(adjacency, dtype=np.float64)
+    membership = np.arange(adjacency.shape[0])
+    if adjacency.nnz == 0:
+        return membership
+    while True:
+        community, improved = _local_moving(adjacency, resolution, rng)
+        if not improved:
+            break
+        community = _relabel(community)
+        membership = community[membership]
+        # Aggregate: one node per community, internal weights on the diagonal
+        assign = sp.csr_matrix((np.ones(len(community)), (np.arange(len(community)), community)))
+        adjacency = (assign.T @ adjacency @ assign).tocsr()
+    return _relabel(membership)
+
+
+def modularity(adjacency, membership, resolution=1.0):
+    adjacency = sp.coo_matrix(adjacency)
+    m2 = adjacency.sum()
+    if m2 == 0:
+        return float("nan")
+    internal = adjacency.data[membership[adjacency.row] == membership[adjacency.col]].sum()
+    strength = np.asarray(sp.csr_matrix(adjacency).sum(axis=1)).ravel()
+    totals = np.bincount(membership, weights=strength)
+    return internal / m2 - resolution * np.sum((totals / m2) ** 2)
+
+
+# --- NMI ---
+
+def _entropy(counts, n):
+    p = counts[counts > 0] / n
+    return -np.sum(p * np.log(p))
+
+
+def nmi(a, b):
+    """Normalized mutual information of two labelings, 2 I / (H(a) + H(b)) (1 if both are constant)."""
+    _, a = np.unique(a, return_inverse=True)
+    _, b = np.unique(b, return_inverse=True)
+    n = len(a)
+    if n == 0:
+        return float("nan")
+    joint = np.bincount(a.ravel() * (b.max() + 1) + b.ravel()).astype(np.float64)
+    h_a, h_b = _entropy(np.bincount(a.ravel()), n), _entropy(np.bincount(b.ravel()), n)
+    if h_a + h_b == 0:
+        return 1.0
+    mutual = h_a + h_b - _entropy(joint, n)
+    return 2 * mutual / (h_a + h_b)
+
+
+def _entropies(keys, span, n, groups):
+    """
+    Entropy of every labeling packed into `keys` = group * span + label (n labels per group), for groups
+    0 .. groups-1: one count of all keys, summed per group.
+    """
+    uniques, counts = np.unique(keys, return_counts=True)
+    p = counts / n
+    return -np.bincount(uniques // span, weights=xlogy(p, p), minlength=groups)
+
+
+def _normalized(h_a, h_b, h_joint):
+    """2 I / (H(a) + H(b)) from the entropies, I = H(a) + H(b) - H(a, b); 1 where both labelings are constant."""
+    total = h_a + h_b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = 2 * (total - h_joint) / total
+    return np.where(total == 0, 1.0, score)
+
+
+def batch_nmi(memberships, labels):
+    """NMI of every row of `memberships` against `labels`, over the nodes whose label is not missing."""
+    labels = pd.Series(labels)
+    known = labels.notna().to_numpy()
+    codes = pd.factorize(labels[known])[0]
+    memberships = np.asarray(memberships)[:, known]
+    r, n = memberships.shape
+    if n == 0:
+        return np.full(r, np.nan)
+    # Contingency counts of all restarts at once: restart x community x label
+    k, l = memberships.max() + 1, codes.max() + 1
+    cells = np.arange(r)[:, None] * k + memberships
+    h_communities = _entropies(cells.ravel(), k, n, r)
+    h_labels = _entropies(codes, l, n, 1)[0]
+    h_joint = _entropies((cells * l + codes).ravel(), k * l, n, r)
+    return _normalized(h_communities, h_labels, h_joint)
+
+
+def pairwise_nmi(memberships):
+    """NMI between every pair of restarts (upper triangle, row-major)."""
+    memberships = np.asarray(memberships)
+    r, n = memberships.shape
+    first, second = np.triu_indices(r, 1)
+    if n == 0:
+        return np.full(len(first), np.nan)
+    k = memberships.max() + 1
+    h = _entropies((np.arange(r)[:, None] * k + memberships).ravel(), k, n, r)
+    # Contingency counts of many pairs at once: pair x community x community, in blocks of PAIR_BLOCK labels
+    h_joint = np.empty(len(first))
+    step = max(1, PAIR_BLOCK // n)
+    for start in range(0, len(first), step):
+        a, b = memberships[first[start:start + step]], memberships[second[start:start + step]]
+        cells = (np.arange(len(a))[:, None] * k + a) * k + b
+        h_joint[start:start + step] = _entropies(cells.ravel(), k * k, n, len(a))
+    return _normalized(h[first], h[second], h_joint)
+
+
+def primary_affiliations(path=AFFILIATIONS_CSV):
+    """Username -> primary project, from derive_dev_affiliation.py's output."""
+    df = columnar.read_stage(path, columns=["Username", "Project", "AffiliationType"])
+    primary = df[df["AffiliationType"] == "primary"]
+    return pd.Series(primary["Project"].to_numpy(), index=primary["Username"].to_numpy())
+
+
+# --- Seeded restarts ---
+
+_GRAPH = {}
+
+
+def _set_graph(indptr, indices, data, n):
+    _GRAPH["adjacency"] = sp.csr_matrix((data, indices, indptr), shape=(n, n))
+
+
+def _restart(seed, resolution):
+    adjacency = _GRAPH["adjacency"]
+    membership = louvain(adjacency, seed, resolution)
+    return membership, modularity(adjacency, membership, resolution)
+
+
+def restarts(graph, seeds, workers=None, resolution=1.0):
+    """(memberships, modularities) of one Louvain run per seed, in seed order."""
+    args = (graph.indptr, graph.indices, graph.data.astype(np.float64), graph.n_nodes)
+    workers = min(workers or os.cpu_count() or 1, len(seeds))
+    if workers <= 1:
+        _set_graph(*args)
+        results = [_restart(seed, resolution) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_set_graph, initargs=args) as pool:
+            results = list(pool.map(_restart, seeds, [resolution] * len(seeds)))
+    memberships = np.array([membership for membership, _ in results])
+    return memberships, np.array([q for _, q in results])
+
+
+@instrumentation.timed()
+def stability(graph, affiliations, seeds, workers=None, resolution=1.0):
+    """Louvain restarts of one graph and their agreement with each other and with the affiliations."""
+    memberships, modularities = restarts(graph, seeds, workers, resolution)
+    labels = pd.Series(graph.names).map(affiliations).to_numpy()
+    affiliation_nmi = batch_nmi(memberships, labels)
+    between = pairwise_nmi(memberships)
+    n_communities = memberships.max(axis=1) + 1
+    best = int(np.argmax(modularities))
+    summary = {
+        "restarts": len(seeds),
+        "seeds": [int(s) for s in seeds],
+        "best_seed": int(seeds[best]),
+        "modularity": {"best": float(modularities[best]), "mean": float(modularities.mean()),
+                       "std": float(modularities.std())},
+        "communities": {"best": int(n_communities[best]), "min": int(n_communities.min()),
+                        "max": int(n_communities.max()), "mean": float(n_communities.mean())},
+        "nmi_affiliation": {"best": float(affiliation_nmi[best]), "mean": float(affiliation_nmi.mean()),
+                            "std": float(affiliation_nmi.std())},
+        "nmi_between_restarts": {"mean": float(between.mean()) if len(between) else None,
+                                 "min": float(between.min()) if len(between) else None},
+        "nodes_with_affiliation": int(pd.notna(labels).sum()),
+        "project_affiliations": int(pd.Series(labels).nunique()),
+    }
+    return memberships[best], labels, summary
+
+
+def output_path(input_path, output_dir):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"{stem}_communities.csv")
+
+
+def main(inputs=dev_network.INPUT_CSVS, restarts_count=100, seed=42, workers=None,
+         affiliations_csv=AFFILIATIONS_CSV, output_dir=dev_network.DATA_DIR, output_json=OUTPUT_JSON):
+    affiliations = primary_affiliations(affiliations_csv)
+    seeds = list(range(seed, seed + restarts_count))
+    results = {}
+    for path in inputs:
+        name = os.path.splitext(os.path.basename(path))[0]
+        graph = load_graph(path)
+        membership, labels, summary = stability(graph, affiliations, seeds, workers)
+        results[name] = summary
+
+        print(f"\nLouvain community detection ({name}, {summary['restarts']} restarts):")
+        print(f"  Modularity: best {summary['modularity']['best']:.4f} (seed {summary['best_seed']}), "
+              f"mean {summary['modularity']['mean']:.4f} ± {summary['modularity']['std']:.4f}")
+        print(f"  Communities: best {summary['communities']['best']}, "
+              f"range {summary['communities']['min']}-{summary['communities']['max']}")
+        print(f"  NMI with project affiliations: best {summary['nmi_affiliation']['best']:.4f}, "
+              f"mean {summary['nmi_affiliation']['mean']:.4f} ± {summary['nmi_affiliation']['std']:.4f}")
+        if summary["nmi_between_restarts"]["mean"] is not None:
+            print(f"  NMI between restarts: mean {summary['nmi_between_restarts']['mean']:.4f}, "
+                  f"min {summary['nmi_between_restarts']['min']:.4f}")
+        print(f"  Nodes with affiliation: {summary['nodes_with_affiliation']} / {graph.n_nodes}")
+
+        out = output_path(path, output_dir)
+        pd.DataFrame({"username": graph.names, "community": membership + 1, "primary_affiliation": labels}) \
+            .to_csv(out, index=False)
+        print(f"✅ Communities saved to {out}")
+
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Community stability saved to {output_json}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Louvain communities and NMI against primary affiliations.")
+    parser.add_argument("--inputs", nargs="+", default=dev_network.INPUT_CSVS,
+                        help="involvement CSVs or .npz graph files")
+    parser.add_argument("--restarts", type=int, default=100, help="number of seeded Louvain runs")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the first run (runs use seed, seed+1, ...)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--affiliations", default=AFFILIATIONS_CSV, help="derive_dev_affiliation.py output")
+    parser.add_argument("--output-dir", default=dev_network.DATA_DIR)
+    parser.add_argument("--output", default=OUTPUT_JSON)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('communities'):
+        main(args.inputs, args.restarts, args.seed, args.workers, args.affiliations, args.output_dir,
+             args.output)
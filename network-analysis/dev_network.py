@@ -0,0 +1,197 @@
+"""
+dev_network.py
+
+Builds the developer collaboration networks of dev-network.R in Python, from downstream_driven.csv and
+upstream_driven.csv.
+
+Each file is turned into a developer x scenario incidence matrix B, whose entry is the developer's involvement in the
+scenario (the sum of max_inv over the projects they appear in for that scenario, as in dev-network.R). The
+developer-developer graph is a sparse projection of B: two developers are connected if they share a scenario, and the
+edge weight sums, over the shared scenarios, one of
+    - min:     min(inv1, inv2)   (dev-network.R's weight)
+    - sum:     inv1 + inv2
+    - product: inv1 * inv2
+The product weight is B B^T and the sum weight is B A^T + A B^T (A = B != 0). The min weight uses
+min(a, b) = sum over the distinct involvement levels v_k <= min(a, b) of (v_k - v_{k-1}), i.e. one sparse product of
+the thresholded indicator (B >= v_k) per level. Scenarios with hundreds of participants are handled by the sparse
+products, never by a loop over developer pairs.
+
+Nodes are the developers in order of first appearance in the file (R's unique()). The graph is kept as a symmetric
+CSR adjacency matrix without self-loops, and exported either as an edge list CSV (from, to, weight; one row per
+undirected edge, from < to in node order) that igraph's graph_from_data_frame reads directly, or as a compact .npz
+graph file (node names plus the CSR arrays). Inputs may also be stored in the columnar formats of
+scripts-data-generation/columnar.py.
+
+Usage:
+    python dev_network.py [--weight min|sum|product] [--format csv|npz] [--inputs PATH ...] [--output-dir DIR]
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts-data-generation"))
+
+import columnar  # noqa: E402
+import instrumentation  # noqa: E402
+
+DATA_DIR = "../data"
+INPUT_CSVS = [os.path.join(DATA_DIR, "downstream_driven.csv"), os.path.join(DATA_DIR, "upstream_driven.csv")]
+
+WEIGHTS = ("min", "sum", "product")
+
+
+class CollabGraph:
+    """Undirected weighted developer graph: node names and a symmetric CSR adjacency matrix."""
+
+    __slots__ = ("names", "adjacency", "weight")
+
+    def __init__(self, names, adjacency, weight="min"):
+        self.names = np.asarray(names, dtype=str)
+        self.adjacency = sp.csr_matrix(adjacency)
+        self.weight = weight
+
+    @property
+    def n_nodes(self):
+        return len(self.names)
+
+    @property
+    def n_edges(self):
+        return self.adjacency.nnz // 2
+
+    @property
+    def indptr(self):
+        return self.adjacency.indptr
+
+    @property
+    def indices(self):
+        return self.adjacency.indices
+
+    @property
+    def data(self):
+        return self.adjacency.data
+
+    def edges(self):
+        """(from, to, weight) arrays of node indices, one entry per undirected edge, from < to."""
+        upper = sp.triu(self.adjacency, k=1).tocoo()
+        order = np.lexsort((upper.col, upper.row))
+        return upper.row[order], upper.col[order], upper.data[order]
+
+    def subgraph(self, nodes):
+        """Graph induced by the given node indices (in that order)."""
+        nodes = np.asarray(nodes)
+        return CollabGraph(self.names[nodes], self.adjacency[nodes][:, nodes], self.weight)
+
+    def edge_list(self):
+        src, dst, weight = self.edges()
+        return pd.DataFrame({"from": self.names[src], "to": self.names[dst], "weight": weight})
+
+    def to_csv(self, path):
+        self.edge_list().to_csv(path, index=False)
+
+    def save_npz(self, path):
+        np.savez_compressed(path, names=self.names, indptr=self.indptr, indices=self.indices, data=self.data,
+                            weight=np.array(self.weight))
+
+    @classmethod
+    def load_npz(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            n = len(f["names"])
+            adjacency = sp.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=(n, n))
+            return cls(f["names"], adjacency, str(f["weight"]))
+
+
+def read_involvement(path):
+    """An involvement table: the CSV, its DATA_FORMAT version (see columnar.py), or a .cols/.parquet path."""
+    return columnar.read_stage(path, columns=["username", "scenario", "max_inv"])
+
+
+def incidence_matrix(df):
+    """Developer x scenario matrix of involvement (max_inv summed over projects), with its row and column labels."""
+    dev_codes, names = pd.factorize(df["username"], sort=False)
+    scenario_codes, scenarios = pd.factorize(df["scenario"], sort=False)
+    # Duplicate (developer, scenario) entries are summed by the COO -> CSR conversion
+    incidence = sp.csr_matrix((df["max_inv"].to_numpy(), (dev_codes, scenario_codes)),
+                              shape=(len(names), len(scenarios)))
+    incidence.sum_duplicates()
+    incidence.eliminate_zeros()
+    return np.asarray(names, dtype=str), np.asarray(scenarios), incidence
+
+
+def _indicator(matrix):
+    indicator = matrix.copy()
+    indicator.data = np.ones_like(indicator.data)
+    return indicator
+
+
+def project(incidence, weight="min"):
+    """Symmetric developer-developer weight matrix (no diagonal) of an incidence matrix."""
+    incidence = sp.csr_matrix(incidence)
+    if weight == "product":
+        projected = incidence @ incidence.T
+    elif weight == "sum":
+        mixed = incidence @ _indicator(incidence).T
+        projected = mixed + mixed.T
+    elif weight == "min":
+        projected = sp.csr_matrix(incidence.shape[:1] * 2, dtype=incidence.dtype)
+        previous = 0
+        for level in np.unique(incidence.data):
+            indicator = incidence.copy()
+            indicator.data = (indicator.data >= level).astype(incidence.dtype)
+            indicator.eliminate_zeros()
+            projected = projected + (level - previous) * (indicator @ indicator.T)
+            previous = level
+    else:
+        raise ValueError(f"unknown edge weight {weight!r}, expected one of {WEIGHTS}")
+    projected = sp.csr_matrix(projected)
+    projected.setdiag(0)
+    projected.eliminate_zeros()
+    projected.sort_indices()
+    return projected
+
+
+@instrumentation.timed()
+def build_graph(df, weight="min"):
+    """Collaboration graph of one involvement table (downstream_driven.csv / upstream_driven.csv)."""
+    names, _, incidence = incidence_matrix(df)
+    return CollabGraph(names, project(incidence, weight), weight)
+
+
+def output_path(input_csv, output_dir, fmt):
+    stem = os.path.splitext(os.path.basename(input_csv))[0]
+    return os.path.join(output_dir, f"{stem}_network.{fmt}")
+
+
+def main(inputs=INPUT_CSVS, weight="min", fmt="csv", output_dir=DATA_DIR):
+    for input_csv in inputs:
+        graph = build_graph(read_involvement(input_csv), weight)
+        path = output_path(input_csv, output_dir, fmt)
+        if fmt == "npz":
+            graph.save_npz(path)
+        else:
+            graph.to_csv(path)
+        print(f"{input_csv}: {graph.n_nodes} nodes, {graph.n_edges} edges", end="")
+        if graph.n_edges:
+            print(f", edge weight ({weight}) {graph.data.min():g} to {graph.data.max():g}", end="")
+        print(f" -> {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build developer collaboration networks from involvement CSVs.")
+    parser.add_argument("--inputs", nargs="+", default=INPUT_CSVS, help="involvement CSVs, one network each")
+    parser.add_argument("--weight", choices=WEIGHTS, default="min",
+                        help="per-scenario edge weight of two developers' involvements (default: min, as in R)")
+    parser.add_argument("--format", dest="fmt", choices=("csv", "npz"), default="csv",
+                        help="edge list CSV or compact .npz graph file")
+    parser.add_argument("--output-dir", default=DATA_DIR)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('dev_network'):
+        main(args.inputs, args.weight, args.fmt, args.output_dir)
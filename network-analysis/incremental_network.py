@@ -0,0 +1,543 @@
+"""
+incremental_network.py
+
+Keeps the collaboration networks of dev_network.py up to date when scenarios are added to downstream_driven.csv or
+upstream_driven.csv, instead of rebuilding every edge and recomputing every metric.
+
+The edge weight of two developers is a sum over the scenarios they share (min(inv1, inv2) by default, see
+dev_network.py), so a change to some scenarios changes the graph by
+    project(B_new[:, S]) - project(B_old[:, S])
+where S are the changed scenarios (columns of the developer x scenario involvement matrix B). Only the developers of
+those scenarios take part in the projection, and the result is applied to the graph as edge-weight increments.
+Involvement only grows when rows are added, so edges are only ever added or made heavier, never removed. Maintaining
+the graph under those updates is cheap:
+    - connected components: union-find (union by size, path compression) over the new edges, which also tracks the
+      size and smallest node of every component, hence the giant component;
+    - degree, strength, edge count, density, the degree histogram (for the Gini coefficient) and the edge weight
+      range: updated per changed edge;
+    - betweenness and the average path length: cached, and marked stale only for the components an update touched.
+      refresh() recomputes them for the stale components alone. Raw (unnormalized) betweenness is cached per node,
+      because within a component it does not depend on the rest of the graph; the igraph normalization by the total
+      node count is applied when reporting.
+The edges are kept as sorted integer keys (u << 32 | v, u < v) with their weights, plus a dictionary of pending
+increments that is merged into the arrays when the graph is exported or saved.
+
+Node indices are stable: new developers get the next index. The graph is therefore the same as a rebuild by
+dev_network.py up to node order, which matches dev_network.py exactly when rows are only ever appended to the table.
+A table in which involvement went down or rows disappeared cannot be applied as increments, and the network is
+rebuilt from scratch.
+
+Usage:
+    python incremental_network.py [--inputs PATH ...] [--weight min|sum|product] [--refresh] [--workers N]
+                                  [--export csv|npz] [--rebuild] [--state-dir DIR]
+
+For each input the state is kept in ../data/<input>_network_state.npz: the first run builds it, later runs diff the
+table against it and apply the changed scenarios. --refresh recomputes the stale betweenness scores and path length
+(written to ../data/<input>_betweenness.csv). The metrics, in the format of network_metrics.py plus the number of
+stale components, are written to ../data/network_metrics_incremental.json.
+"""
+
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import dev_network
+import betweenness
+import identity  # importable once dev_network has put scripts-data-generation on the path
+import instrumentation
+from dev_network import CollabGraph
+from network_metrics import mean_shortest_path
+
+OUTPUT_JSON = os.path.join(dev_network.DATA_DIR, "network_metrics_incremental.json")
+
+KEY_SHIFT = 32
+KEY_MASK = (1 << KEY_SHIFT) - 1
+
+
+def state_path(input_path, state_dir):
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(state_dir, f"{stem}_network_state.npz")
+
+
+def _keys(u, v):
+    return (np.minimum(u, v).astype(np.int64) << KEY_SHIFT) | np.maximum(u, v).astype(np.int64)
+
+
+def _merge(keys, values, new_keys, increments):
+    """Add increments to the values of sorted keys, inserting the keys not present yet; returns (keys, values)."""
+    order = np.argsort(new_keys, kind="stable")
+    new_keys, increments = new_keys[order], increments[order]
+    positions = np.searchsorted(keys, new_keys)
+    found = positions < len(keys)
+    found[found] = keys[positions[found]] == new_keys[found]
+    values = values.copy()
+    np.add.at(values, positions[found], increments[found])
+    return (np.insert(keys, positions[~found], new_keys[~found]),
+            np.insert(values, positions[~found], increments[~found]))
+
+
+class IncrementalNetwork:
+    """A collaboration graph with its cheap metrics maintained and its expensive ones cached, under added rows."""
+
+    def __init__(self, weight="min", dtype=np.int64):
+        if weight not in dev_network.WEIGHTS:
+            raise ValueError(f"unknown edge weight {weight!r}, expected one of {dev_network.WEIGHTS}")
+        self.weight = weight
+        self.names = identity.Interner()       # node index <-> username
+        self.scenarios = identity.Interner()   # scenario ID <-> scenario label
+        # Involvement matrix B as sorted (scenario ID << 32 | node index) keys and values
+        self.entry_keys = np.empty(0, dtype=np.int64)
+        self.entry_inv = np.empty(0, dtype=dtype)
+        self.edge_keys = np.empty(0, dtype=np.int64)
+        self.edge_weights = np.empty(0, dtype=dtype)
+        self.pending = {}                      # edge key -> weight increment not yet merged into the arrays
+        # Per node; union-find fields are meaningful at component roots
+        self.parent, self.size, self.low = [], [], []
+        self.degree, self.strength = [], []
+        self.raw_betweenness = []              # unnormalized; valid for nodes outside stale components
+        self.n_edges = 0
+        self.n_components = 0
+        self.total_strength = 0
+        self.degree_counts = {}                # degree -> number of nodes
+        self.weight_max = None
+        self.weight_min = None
+        self.weight_min_stale = False
+        self.giant = None                      # root of the giant component
+        self.stale = set()                     # nodes whose component's expensive metrics are out of date
+        self.path_length = float("nan")
+        self.path_root = None                  # giant component root when path_length was computed
+
+    # --- Building ---
+
+    @classmethod
+    def from_table(cls, df, weight="min"):
+        """The network of a whole involvement table (username, scenario, max_inv)."""
+        network = cls(weight, np.asarray(df["max_inv"]).dtype)
+        network.apply_rows(df)
+        return network
+
+    def _add_nodes(self, n):
+        start = len(self.parent)
+        for k in range(start, n):
+            self.parent.append(k)
+            self.size.append(1)
+            self.low.append(k)
+            self.degree.append(0)
+            self.strength.append(0)
+            self.raw_betweenness.append(0.0)
+            self.stale.add(k)
+        self.n_components += n - start
+        self.degree_counts[0] = self.degree_counts.get(0, 0) + (n - start)
+        if self.giant is None and n:
+            self.giant = 0
+
+    @instrumentation.timed()
+    def apply_rows(self, df):
+        """
+        Add involvement rows (username, scenario, max_inv >= 0) to the network.
+
+        Returns the number of edges whose weight changed. The work is proportional to the rows and to the developer
+        pairs of the scenarios they touch.
+        """
+        users = self.names.encode(df["username"].to_numpy())
+        scenarios = self.scenarios.encode(df["scenario"].to_numpy())
+        involvement = np.asarray(df["max_inv"])
+        if (involvement < 0).any():
+            raise ValueError("involvement increments must not be negative")
+        self._add_nodes(len(self.names))
+
+        # Involvement per (scenario, developer) key, summed over projects as in dev_network.py
+        keys = (scenarios.astype(np.int64) << KEY_SHIFT) | users
+        delta = pd.Series(involvement).groupby(keys).sum()
+        delta = delta[delta.to_numpy() != 0]
+        changed = np.unique(delta.index.to_numpy() >> KEY_SHIFT)
+        old_keys, old_inv = self._scenario_entries(changed)
+        self.entry_keys, self.entry_inv = _merge(self.entry_keys, self.entry_inv, delta.index.to_numpy(),
+                                                 delta.to_numpy().astype(self.entry_inv.dtype))
+        new_keys, new_inv = self._scenario_entries(changed)
+
+        # Edge increments: the projection of the changed scenarios after, minus before
+        nodes, local_new = np.unique(new_keys & KEY_MASK, return_inverse=True)
+        if len(nodes) < 2:
+            return 0
+        local_old = np.searchsorted(nodes, old_keys & KEY_MASK)
+        shape = (len(nodes), len(changed))
+        after = sp.csr_matrix((new_inv, (local_new.ravel(), np.searchsorted(changed, new_keys >> KEY_SHIFT))),
+                              shape=shape)
+        before = sp.csr_matrix((old_inv, (local_old, np.searchsorted(changed, old_keys >> KEY_SHIFT))), shape=shape)
+        increments = sp.triu(dev_network.project(after, self.weight) - dev_network.project(before, self.weight),
+                             k=1).tocoo()
+        nonzero = increments.data != 0
+        keys = _keys(nodes[increments.row[nonzero]], nodes[increments.col[nonzero]])
+        self._add_edges(keys, increments.data[nonzero])
+        return len(keys)
+
+    def _scenario_entries(self, scenarios):
+        """(keys, involvement) of the current entries of the given (sorted) scenario IDs."""
+        lo = np.searchsorted(self.entry_keys, scenarios.astype(np.int64) << KEY_SHIFT)
+        hi = np.searchsorted(self.entry_keys, (scenarios.astype(np.int64) + 1) << KEY_SHIFT)
+        lengths = hi - lo
+        index = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return self.entry_keys[index], self.entry_inv[index]
+
+    def _base_weights(self, keys):
+        """Weights of the given keys in the merged arrays (0 where absent)."""
+        if not len(self.edge_keys):
+            return np.zeros(len(keys), dtype=self.edge_weights.dtype)
+        positions = np.minimum(np.searchsorted(self.edge_keys, keys), len(self.edge_keys) - 1)
+        found = self.edge_keys[positions] == keys
+        return np.where(found, self.edge_weights[positions], 0)
+
+    def _add_edges(self, keys, increments):
+        base = self._base_weights(keys)
+        parent, degree, strength = self.parent, self.degree, self.strength
+        counts, pending = self.degree_counts, self.pending
+        touched = []
+        for key, increment, base_weight in zip(keys.tolist(), increments.tolist(), base.tolist()):
+            u, v = key >> KEY_SHIFT, key & KEY_MASK
+            previous = base_weight + pending.get(key, 0)
+            pending[key] = pending.get(key, 0) + increment
+            weight = previous + increment
+            if previous == 0:
+                self.n_edges += 1
+                for node in (u, v):
+                    counts[degree[node]] -= 1
+                    degree[node] += 1
+                    counts[degree[node]] = counts.get(degree[node], 0) + 1
+                if self.weight_min is None or weight < self.weight_min:
+                    self.weight_min = weight
+                self._union(u, v)
+            elif previous == self.weight_min:
+                self.weight_min_stale = True
+            if self.weight_max is None or weight > self.weight_max:
+                self.weight_max = weight
+            strength[u] += increment
+            strength[v] += increment
+            self.total_strength += 2 * increment
+            touched.append(u)
+
+        # Expensive metrics of every component an update reached are out of date
+        self.stale = {self._find(node) for node in self.stale} | {self._find(node) for node in touched}
+        candidates = {self._find(self.giant)} | {self._find(node) for node in touched}
+        self.giant = min(candidates, key=lambda root: (-self.size[root], self.low[root]))
+
+    # --- Union-find ---
+
+    def _find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return ra
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        self.low[ra] = min(self.low[ra], self.low[rb])
+        self.n_components -= 1
+        return ra
+
+    def roots(self):
+        """Component root of every node (array)."""
+        parent = np.asarray(self.parent, dtype=np.int64)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return parent
+            parent = grandparent
+
+    # --- Updates from a whole table ---
+
+    def _entries(self):
+        """Current involvement per (scenario ID << 32 | node index) key, as a Series."""
+        return pd.Series(self.entry_inv, index=self.entry_keys)
+
+    @instrumentation.timed()
+    def table_delta(self, df):
+        """
+        The rows that turn this network into the network of the table `df` (username, scenario, max_inv), in table
+        order; None if `df` is not the current table plus added involvement.
+        """
+        username = df["username"].to_numpy()
+        scenario = df["scenario"].to_numpy()
+        involvement = np.asarray(df["max_inv"])
+        users = pd.Index(self.names.values, dtype=object).get_indexer(username)
+        scenarios = pd.Index(self.scenarios.values, dtype=object).get_indexer(scenario)
+        known = (users >= 0) & (scenarios >= 0)
+
+        # Rows of new developers or scenarios are all new; known (scenario, developer) pairs are compared
+        keys = (scenarios[known].astype(np.int64) << KEY_SHIFT) | users[known]
+        table = pd.Series(involvement[known]).groupby(keys).sum()
+        difference = table.sub(self._entries(), fill_value=0)
+        if (difference < 0).any():
+            return None
+        # The increment of a pair goes on its first row
+        increment = difference.reindex(keys).to_numpy()
+        increment[pd.Series(keys).duplicated().to_numpy()] = 0
+        delta = involvement.copy()
+        delta[known] = increment.astype(involvement.dtype)
+        keep = ~known
+        keep[known] = increment > 0
+        return pd.DataFrame({"username": username[keep], "scenario": scenario[keep], "max_inv": delta[keep]})
+
+    # --- Edges ---
+
+    def compact(self):
+        """Merge the pending increments into the sorted edge arrays."""
+        if not self.pending:
+            return
+        keys = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+        increments = np.fromiter(self.pending.values(), dtype=self.edge_weights.dtype, count=len(self.pending))
+        self.edge_keys, self.edge_weights = _merge(self.edge_keys, self.edge_weights, keys, increments)
+        self.pending = {}
+
+    def graph(self):
+        """The network as a dev_network.CollabGraph."""
+        self.compact()
+        n = len(self.names)
+        u, v = self.edge_keys >> KEY_SHIFT, self.edge_keys & KEY_MASK
+        adjacency = sp.csr_matrix((np.concatenate([self.edge_weights, self.edge_weights]),
+                                   (np.concatenate([u, v]), np.concatenate([v, u]))), shape=(n, n))
+        adjacency.sort_indices()
+        return CollabGraph(np.asarray(self.names.values, dtype=str), adjacency, self.weight)
+
+    # --- Metrics ---
+
+    def _weight_min(self):
+        if self.weight_min_stale:
+            self.compact()
+            self.weight_min = self.edge_weights.min() if len(self.edge_weights) else None
+            self.weight_min_stale = False
+        return self.weight_min
+
+    def degree_gini(self):
+        """Gini coefficient of the degrees (network_metrics.gini), from the degree histogram."""
+        n = len(self.names)
+        total = sum(d * c for d, c in self.degree_counts.items())
+        if n == 0 or total == 0:
+            return float("nan")
+        weighted, position = 0.0, 0
+        for d in sorted(self.degree_counts):
+            c = self.degree_counts[d]
+            # Ranks position+1 .. position+c, all with value d
+            weighted += d * (c * position + c * (c + 1) / 2)
+            position += c
+        return 2 * weighted / (n * total) - (n + 1) / n
+
+    def stale_roots(self):
+        self.stale = {self._find(node) for node in self.stale}
+        return self.stale
+
+    def metrics(self):
+        """The statistics of network_metrics.network_metrics, from the maintained values and the caches."""
+        n = len(self.names)
+        giant = self._find(self.giant) if self.giant is not None else None
+        path_stale = giant is not None and (giant in self.stale_roots() or self.path_root is None
+                                            or self._find(self.path_root) != giant)
+        weight_min = self._weight_min()
+        return {
+            "nodes": n,
+            "edges": self.n_edges,
+            "weight": self.weight,
+            "edge_weight_min": float(weight_min) if self.n_edges else None,
+            "edge_weight_max": float(self.weight_max) if self.n_edges else None,
+            "components": self.n_components,
+            "giant_component_size": self.size[giant] if giant is not None else 0,
+            "density": self.n_edges / (n * (n - 1) / 2) if n > 1 else float("nan"),
+            "avg_weighted_degree": self.total_strength / n if n else float("nan"),
+            "degree_gini": self.degree_gini(),
+            "avg_path_length": None if path_stale else self.path_length,
+            "avg_path_length_giant_component": giant is not None and self.size[giant] < n,
+            "avg_path_length_sources": None,
+            "stale_components": len(self.stale_roots()),
+        }
+
+    def betweenness(self):
+        """Normalized betweenness of every node (NaN for nodes of stale components)."""
+        raw = np.asarray(self.raw_betweenness, dtype=np.float64) * betweenness._normalizer(len(self.names))
+        stale = self.stale_roots()
+        if stale:
+            raw[np.isin(self.roots(), list(stale))] = np.nan
+        return raw
+
+    @instrumentation.timed()
+    def refresh(self, workers=None):
+        """Recompute betweenness and the giant component's path length for the stale components only."""
+        stale = self.stale_roots()
+        if not stale:
+            return 0
+        graph = self.graph()
+        roots = self.roots()
+        giant = self._find(self.giant)
+        refreshed = 0
+        for root in stale:
+            nodes = np.flatnonzero(roots == root)
+            if len(nodes) > 2:
+                sub = graph.subgraph(nodes)
+                total, _ = betweenness.dependencies(sub, np.arange(len(nodes)), workers)
+                refreshed += len(nodes)
+            else:
+                total = np.zeros(len(nodes))
+            for node, value in zip(nodes.tolist(), total.tolist()):
+                self.raw_betweenness[node] = value
+            if root == giant:
+                self.path_length = mean_shortest_path(graph.subgraph(nodes))
+                self.path_root = giant
+        self.stale = set()
+        instrumentation.count("betweenness_nodes_refreshed", refreshed)
+        return refreshed
+
+    # --- Persistence ---
+
+    def save(self, path):
+        self.compact()
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path,
+                 weight=np.array(self.weight),
+                 names=np.asarray(self.names.values, dtype=str),
+                 scenarios=np.asarray(self.scenarios.values),
+                 entry_keys=self.entry_keys, entry_inv=self.entry_inv,
+                 edge_keys=self.edge_keys, edge_weights=self.edge_weights,
+                 parent=np.asarray(self.parent, dtype=np.int64),
+                 raw_betweenness=np.asarray(self.raw_betweenness, dtype=np.float64),
+                 stale=np.asarray(sorted(self.stale_roots()), dtype=np.int64),
+                 path_length=np.array(self.path_length),
+                 path_root=np.array(-1 if self.path_root is None else self.path_root))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """A saved network; the maintained values are recomputed from the edges in a few array passes."""
+        with np.load(path, allow_pickle=False) as f:
+            network = cls(str(f["weight"]), f["edge_weights"].dtype)
+            network.names = identity.Interner(f["names"].tolist())
+            network.scenarios = identity.Interner(f["scenarios"].tolist())
+            network.entry_keys, network.entry_inv = f["entry_keys"], f["entry_inv"]
+            network.edge_keys, network.edge_weights = f["edge_keys"], f["edge_weights"]
+            parent = f["parent"]
+            network.raw_betweenness = f["raw_betweenness"].tolist()
+            network.stale = set(f["stale"].tolist())
+            network.path_length = float(f["path_length"])
+            path_root = int(f["path_root"])
+            network.path_root = None if path_root < 0 else path_root
+        network._restore(parent)
+        return network
+
+    def _restore(self, parent):
+        n = len(self.names)
+        graph = self.graph()
+        degree = np.diff(graph.indptr)
+        strength = np.asarray(graph.adjacency.sum(axis=1)).ravel()
+        self.parent = parent.tolist()
+        roots = self.roots()
+        self.size = np.bincount(roots, minlength=n).tolist()
+        low = np.full(n, n, dtype=np.int64)
+        np.minimum.at(low, roots, np.arange(n))
+        self.low = low.tolist()
+        self.degree, self.strength = degree.tolist(), strength.tolist()
+        self.n_edges = len(self.edge_keys)
+        self.n_components = int((roots == np.arange(n)).sum())
+        self.total_strength = strength.sum().item()
+        values, counts = np.unique(degree, return_counts=True)
+        self.degree_counts = dict(zip(values.tolist(), counts.tolist()))
+        self.weight_min = self.edge_weights.min().item() if self.n_edges else None
+        self.weight_max = self.edge_weights.max().item() if self.n_edges else None
+        if n:
+            sizes = np.asarray(self.size)
+            # Largest component; on ties the one with the smallest node, as network_metrics.giant_component
+            candidates = np.flatnonzero((sizes == sizes.max()) & (roots == np.arange(n)))
+            self.giant = int(candidates[np.argmin(low[candidates])])
+
+
+# --- Script ---
+
+def update(input_path, weight="min", state_dir=dev_network.DATA_DIR, rebuild=False):
+    """Load (or build) the state of one input, bring it up to date with the table, save it; returns the network."""
+    path = state_path(input_path, state_dir)
+    df = dev_network.read_involvement(input_path)
+    start = time.perf_counter()
+    network = IncrementalNetwork.load(path) if os.path.exists(path) and not rebuild else None
+    if network is not None and network.weight != weight:
+        print(f"{input_path}: state built with weight {network.weight!r}, rebuilding with {weight!r}")
+        network = None
+    delta = network.table_delta(df) if network is not None else None
+    if network is not None and delta is None:
+        print(f"{input_path}: involvement went down or rows were removed, rebuilding")
+        network = None
+
+    if network is None:
+        network = IncrementalNetwork.from_table(df, weight)
+        instrumentation.count("network_rebuilds")
+        print(f"{input_path}: built {network.n_edges} edges over {len(network.names)} developers "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        changed = network.apply_rows(delta)
+        instrumentation.count("delta_rows", len(delta))
+        print(f"{input_path}: {len(delta)} changed rows, {changed} edges added or reweighted "
+              f"in {time.perf_counter() - start:.2f}s")
+    network.save(path)
+    return network
+
+
+def main(inputs=dev_network.INPUT_CSVS, weight="min", refresh=False, workers=None, export=None, rebuild=False,
+         state_dir=dev_network.DATA_DIR, output_json=OUTPUT_JSON):
+    results = {}
+    for input_path in inputs:
+        network = update(input_path, weight, state_dir, rebuild)
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        if refresh:
+            refreshed = network.refresh(workers)
+            network.save(state_path(input_path, state_dir))
+            scores = network.betweenness()
+            table = pd.DataFrame({"username": network.names.values, "betweenness": scores,
+                                  "rank_group": betweenness.rank_groups(scores)})
+            out = betweenness.output_path(input_path, dev_network.DATA_DIR)
+            table.to_csv(out, index=False)
+            print(f"  betweenness recomputed for {refreshed} nodes -> {out}")
+        if export:
+            out = dev_network.output_path(input_path, dev_network.DATA_DIR, export)
+            graph = network.graph()
+            graph.save_npz(out) if export == "npz" else graph.to_csv(out)
+            print(f"  network -> {out}")
+        results[name] = network.metrics()
+        stale = results[name]["stale_components"]
+        print(f"  {results[name]['nodes']} nodes, {results[name]['edges']} edges, "
+              f"{results[name]['components']} components"
+              + (f", {stale} with stale betweenness/path length (use --refresh)" if stale else ""))
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Network metrics saved to {output_json}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Update the collaboration networks with the changed scenarios.")
+    parser.add_argument("--inputs", nargs="+", default=dev_network.INPUT_CSVS, help="involvement CSVs")
+    parser.add_argument("--weight", choices=dev_network.WEIGHTS, default="min")
+    parser.add_argument("--refresh", action="store_true",
+                        help="recompute betweenness and path length of the components the updates touched")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --refresh")
+    parser.add_argument("--export", choices=("csv", "npz"), default=None,
+                        help="also write the network like dev_network.py")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the saved state and build from scratch")
+    parser.add_argument("--state-dir", default=dev_network.DATA_DIR)
+    parser.add_argument("--output", default=OUTPUT_JSON)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('incremental_network'):
+        main(args.inputs, args.weight, args.refresh, args.workers, args.export, args.rebuild, args.state_dir,
+             args.output)
@@ -0,0 +1,208 @@
+"""
+network_metrics.py
+
+Graph metrics of the collaboration networks built by dev_network.py, without R.
+
+Computes, for each network, the statistics dev-network.R reports:
+    - number of connected components and giant component size (array-based union-find: every round hooks each
+      component root onto the smallest root it shares an edge with, then compresses the parent array by pointer
+      jumping; a handful of vectorized rounds replace a Python loop over the edges)
+    - density (edges over possible edges, igraph's edge_density)
+    - average weighted degree (mean strength) and the Gini coefficient of the degree distribution
+    - average shortest path length on the giant component, with 1/weight as the edge length (igraph's
+      mean_distance with inv_weight): one heap-based Dijkstra per source (scipy.sparse.csgraph), run in blocks of
+      sources so memory stays linear in the number of nodes.
+All metrics but the path length are a few passes over the CSR arrays. The exact path length needs a Dijkstra from
+every node of the giant component; on large graphs path_sources=k estimates it from k random sources instead.
+
+Usage:
+    python network_metrics.py [--inputs PATH ...] [--weight min|sum|product] [--path-sources K] [--output PATH]
+
+Inputs are involvement CSVs (downstream_driven.csv, upstream_driven.csv) or .npz graph files from dev_network.py.
+The metrics are printed and written to ../data/network_metrics.json.
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+import dev_network
+import instrumentation  # importable once dev_network has put scripts-data-generation on the path
+from dev_network import CollabGraph
+
+OUTPUT_JSON = os.path.join(dev_network.DATA_DIR, "network_metrics.json")
+
+# Dijkstra sources per block when averaging path lengths (memory: block x nodes distances)
+PATH_BLOCK = 256
+
+
+# --- Components ---
+
+def connected_components(graph):
+    """Component label of every node; components are numbered by their smallest node index."""
+    src = np.repeat(np.arange(graph.n_nodes), degree(graph))
+    upper = graph.indices > src
+    src, dst = src[upper], graph.indices[upper]
+    parent = np.arange(graph.n_nodes)
+    while True:
+        root_src, root_dst = parent[src], parent[dst]
+        low, high = np.minimum(root_src, root_dst), np.maximum(root_src, root_dst)
+        crossing = low != high
+        if not crossing.any():
+            break
+        # Hook: every root adopts the smallest root it is linked to (roots only ever point to smaller indices)
+        np.minimum.at(parent, high[crossing], low[crossing])
+        # Compress: jump pointers until every node points at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    _, labels = np.unique(parent, return_inverse=True)
+    return labels
+
+
+def giant_component(graph, labels=None):
+    """Node indices of the largest connected component (the first one, on ties, like R's which.max)."""
+    labels = connected_components(graph) if labels is None else labels
+    sizes = np.bincount(labels)
+    return np.flatnonzero(labels == np.argmax(sizes))
+
+
+# --- Degree statistics ---
+
+def degree(graph):
+    return np.diff(graph.indptr)
+
+
+def strength(graph):
+    """Weighted degree: sum of the weights of each node's edges."""
+    return np.asarray(graph.adjacency.sum(axis=1)).ravel()
+
+
+def density(graph):
+    n = graph.n_nodes
+    return graph.n_edges / (n * (n - 1) / 2) if n > 1 else float("nan")
+
+
+def gini(values):
+    """Gini coefficient, as gini_coeff in dev-network.R."""
+    x = np.sort(np.asarray(values, dtype=np.float64))
+    n = len(x)
+    total = x.sum()
+    if n == 0 or total == 0:
+        return float("nan")
+    index = np.arange(1, n + 1)
+    return 2 * np.dot(index, x) / (n * total) - (n + 1) / n
+
+
+# --- Shortest paths ---
+
+def distance_matrix(graph):
+    """Adjacency with 1/weight as the edge length (symmetric, so it can be searched as a directed graph)."""
+    distances = graph.adjacency.copy().astype(np.float64)
+    distances.data = 1.0 / distances.data
+    return distances
+
+
+def mean_shortest_path(graph, sources=None, seed=0):
+    """
+    Mean weighted distance (1/weight) over ordered pairs of distinct, connected nodes.
+
+    sources=None averages over every source (exact); an integer k averages over k sources drawn at random.
+    """
+    n = graph.n_nodes
+    if n < 2:
+        return float("nan")
+    if sources is None or sources >= n:
+        chosen = np.arange(n)
+    else:
+        chosen = np.sort(np.random.default_rng(seed).choice(n, size=sources, replace=False))
+    distances = distance_matrix(graph)
+    total, pairs = 0.0, 0
+    for start in range(0, len(chosen), PATH_BLOCK):
+        block = dijkstra(distances, directed=True, indices=chosen[start:start + PATH_BLOCK])
+        reachable = np.isfinite(block) & (block > 0)
+        total += block[reachable].sum()
+        pairs += int(reachable.sum())
+    return total / pairs if pairs else float("nan")
+
+
+# --- All metrics ---
+
+@instrumentation.timed()
+def network_metrics(graph, path_sources=None, seed=0):
+    labels = connected_components(graph)
+    sizes = np.bincount(labels) if graph.n_nodes else np.array([0])
+    giant = giant_component(graph, labels) if graph.n_nodes else np.array([], dtype=int)
+    metrics = {
+        "nodes": graph.n_nodes,
+        "edges": graph.n_edges,
+        "weight": graph.weight,
+        "edge_weight_min": float(graph.data.min()) if graph.n_edges else None,
+        "edge_weight_max": float(graph.data.max()) if graph.n_edges else None,
+        "components": int(labels.max() + 1) if graph.n_nodes else 0,
+        "giant_component_size": int(sizes.max()),
+        "density": density(graph),
+        "avg_weighted_degree": float(strength(graph).mean()) if graph.n_nodes else float("nan"),
+        "degree_gini": gini(degree(graph)),
+        "avg_path_length": mean_shortest_path(graph.subgraph(giant), path_sources, seed),
+        "avg_path_length_giant_component": len(giant) < graph.n_nodes,
+        "avg_path_length_sources": path_sources,
+    }
+    return metrics
+
+
+def print_metrics(name, metrics):
+    print(f"\n--- {name} Graph Metrics ---")
+    print(f"Number of nodes: {metrics['nodes']}")
+    print(f"Number of edges: {metrics['edges']}")
+    if metrics["edges"]:
+        print(f"Edge weight range: {metrics['edge_weight_min']:g} to {metrics['edge_weight_max']:g}")
+    print(f"Number of connected components: {metrics['components']}")
+    print(f"Giant component size: {metrics['giant_component_size']}")
+    print(f"Graph density: {metrics['density']:.6g}")
+    print(f"Average weighted degree: {metrics['avg_weighted_degree']:.6g}")
+    print(f"Gini coefficient (degree distribution): {metrics['degree_gini']:.6g}")
+    scope = ", giant component" if metrics["avg_path_length_giant_component"] else ""
+    sampled = f", {metrics['avg_path_length_sources']} sampled sources" if metrics["avg_path_length_sources"] else ""
+    print(f"Average path length (inv_weight{scope}{sampled}): {metrics['avg_path_length']:.6g}")
+
+
+def load_graph(path, weight="min"):
+    """A graph from an involvement table (see dev_network.read_involvement) or a dev_network.py .npz file."""
+    if path.endswith(".npz"):
+        return CollabGraph.load_npz(path)
+    return dev_network.build_graph(dev_network.read_involvement(path), weight)
+
+
+def main(inputs=dev_network.INPUT_CSVS, weight="min", path_sources=None, output_json=OUTPUT_JSON):
+    results = {}
+    for path in inputs:
+        name = os.path.splitext(os.path.basename(path))[0]
+        results[name] = network_metrics(load_graph(path, weight), path_sources)
+        print_metrics(name, results[name])
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Network metrics saved to {output_json}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compute collaboration network metrics without R.")
+    parser.add_argument("--inputs", nargs="+", default=dev_network.INPUT_CSVS,
+                        help="involvement CSVs or .npz graph files")
+    parser.add_argument("--weight", choices=dev_network.WEIGHTS, default="min",
+                        help="edge weight used when building graphs from CSVs")
+    parser.add_argument("--path-sources", type=int, default=None,
+                        help="estimate the average path length from this many random sources (default: exact)")
+    parser.add_argument("--output", default=OUTPUT_JSON)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('network_metrics'):
+        main(args.inputs, args.weight, args.path_sources, args.output)
@@ -0,0 +1,278 @@
+"""
+resampling.py
+
+Permutation and bootstrap tests for the comparison of the downstream-driven and upstream-involved networks, which
+dev-network.R makes with a single wilcox.test / ks.test on their degree and betweenness vectors, without a null model.
+
+The units resampled are the scenarios of the two involvement tables: a scenario of downstream_driven.csv or of
+upstream_driven.csv (a scenario whose issues were fixed both ways is one unit in each). Both tables are held as one
+developer x unit involvement matrix B, plus the matching presence matrix (developers with involvement 0 are still
+nodes). The network of any multiset of units is dev_network.project(B[:, units]) over the developers present in them,
+so a replicate rebuilds its networks with one sparse projection each and never goes back to the tables.
+    - Permutation test (null hypothesis: the Downstream-driven-fix label does not matter): the labels are shuffled
+      across units, keeping the number of units of each kind, and both networks are rebuilt. The statistic is the
+      difference downstream - upstream, and the two-sided p-value is (1 + #{|T*| >= |T|}) / (R + 1) over the R
+      replicates where it is defined.
+    - Bootstrap: the units of each network are resampled with replacement (a unit drawn twice counts its scenario
+      twice), which gives percentile confidence intervals for each network's statistic and for their difference.
+The statistics are the density, the degree Gini coefficient, the average path length (giant component, 1/weight)
+and the mean normalized betweenness (1/weight), as network_metrics.py and betweenness.py compute them.
+
+Replicates are drawn in batches. Each batch has its own Generator, seeded with (seed, test, batch index), which
+shuffles or resamples the labels of the whole batch in one call. For a given seed and --batch, the results therefore do
+not depend on the number of workers. The batches run on a process pool, and every worker receives the involvement
+matrix once (pool initializer).
+On large networks, --path-sources estimates the path length from sampled sources.
+
+Betweenness is the expensive statistic: the observed networks get exact Brandes, but the replicates estimate it from
+--pivots sampled sources (REPLICATE_PIVOTS by default, see betweenness.approximate_betweenness). Exact replicates
+(--pivots 0) run pure-Python Brandes on every rebuilt network, about 0.5 s per replicate on one core with the committed
+data, i.e. some 15 CPU minutes for the default 1000 permutations and 1000 bootstrap resamples; with 32 pivots a
+replicate takes about 0.05 s.
+
+Usage:
+    python resampling.py [--inputs DOWNSTREAM UPSTREAM] [--permutations N] [--bootstrap N] [--batch N]
+                         [--workers N] [--seed S] [--weight min|sum|product] [--confidence 0.95]
+                         [--path-sources K] [--pivots K] [--output PATH]
+
+The observed statistics, permutation p-values and bootstrap confidence intervals are printed and written to
+../data/resampling_tests.json.
+"""
+
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import dev_network
+import betweenness
+import instrumentation  # importable once dev_network has put scripts-data-generation on the path
+import network_metrics
+from dev_network import CollabGraph
+
+OUTPUT_JSON = os.path.join(dev_network.DATA_DIR, "resampling_tests.json")
+
+STATISTICS = ("density", "degree_gini", "avg_path_length", "mean_betweenness")
+GROUPS = ("downstream_driven", "upstream_driven")  # label 1, label 0
+TESTS = ("permutation", "bootstrap")
+REPLICATE_PIVOTS = 32  # sampled sources for the betweenness of the replicates (0 = exact)
+
+
+# --- Units ---
+
+def unit_matrices(tables):
+    """
+    Developer x unit matrices of the involvement tables (downstream first, then upstream).
+
+    Returns (names, involvement, presence, labels): involvement is B (max_inv summed over projects), presence has a 1
+    wherever a developer has a row, and labels is 1 for the units of the first table and 0 for those of the second.
+    """
+    frames = [df.assign(label=1 - k) for k, df in enumerate(tables)]
+    df = pd.concat(frames, ignore_index=True)
+    dev_codes, names = pd.factorize(df["username"], sort=False)
+    unit_codes, units = pd.factorize(pd.MultiIndex.from_arrays([df["label"], df["scenario"]]), sort=False)
+    shape = (len(names), len(units))
+    involvement = sp.csr_matrix((df["max_inv"].to_numpy(), (dev_codes, unit_codes)), shape=shape)
+    involvement.sum_duplicates()
+    involvement.eliminate_zeros()
+    presence = sp.csr_matrix((np.ones(len(df), dtype=np.int32), (dev_codes, unit_codes)), shape=shape)
+    presence.sum_duplicates()
+    labels = np.asarray(units.get_level_values(0), dtype=np.int8)
+    return np.asarray(names, dtype=str), involvement, presence, labels
+
+
+def network(names, involvement, presence, counts, weight="min"):
+    """The network of a multiset of units, given as a count per unit (0 = left out)."""
+    columns = np.repeat(np.arange(len(counts)), counts)
+    nodes = np.flatnonzero(presence[:, columns].getnnz(axis=1))
+    return CollabGraph(names[nodes], dev_network.project(involvement[nodes][:, columns], weight), weight)
+
+
+def statistics(graph, path_sources=None, pivots=None, seed=0):
+    """The STATISTICS of one network (NaN where undefined, e.g. the path length of a graph without edges)."""
+    if graph.n_nodes == 0:
+        return np.full(len(STATISTICS), np.nan)
+    giant = network_metrics.giant_component(graph)
+    scores, _, _ = betweenness.betweenness(graph, workers=1, pivots=pivots, seed=seed)
+    return np.array([
+        network_metrics.density(graph),
+        network_metrics.gini(network_metrics.degree(graph)),
+        network_metrics.mean_shortest_path(graph.subgraph(giant), path_sources, seed),
+        scores.mean(),
+    ])
+
+
+# --- Replicates ---
+
+_DATA = {}
+
+
+def _set_data(names, involvement, presence, labels, weight, path_sources, pivots):
+    """Pool initializer (also used in-process): the unit matrices and settings every replicate needs."""
+    _DATA.update(names=names, involvement=involvement, presence=presence, labels=labels, weight=weight,
+                 path_sources=path_sources, pivots=pivots)
+
+
+def draw(test, labels, rng, size):
+    """Unit counts of `size` replicates: an array (size, 2, units), downstream counts first."""
+    if test == "permutation":
+        shuffled = rng.permuted(np.tile(labels, (size, 1)), axis=1)
+        return np.stack([shuffled == 1, shuffled == 0], axis=1).astype(np.int64)
+    counts = np.zeros((size, 2, len(labels)), dtype=np.int64)
+    rows = np.arange(size)[:, None]
+    for group, label in enumerate((1, 0)):
+        units = np.flatnonzero(labels == label)
+        picks = units[rng.integers(0, len(units), size=(size, len(units)))]
+        np.add.at(counts[:, group], (rows, picks), 1)
+    return counts
+
+
+def _replicate_batch(test, seed, batch, size):
+    """Statistics (size, 2, STATISTICS) of one batch of replicates."""
+    rng = np.random.default_rng([seed, TESTS.index(test), batch])
+    counts = draw(test, _DATA["labels"], rng, size)
+    results = np.empty((size, 2, len(STATISTICS)))
+    for r in range(size):
+        for group in range(2):
+            graph = network(_DATA["names"], _DATA["involvement"], _DATA["presence"], counts[r, group],
+                            _DATA["weight"])
+            results[r, group] = statistics(graph, _DATA["path_sources"], _DATA["pivots"], seed)
+    return results
+
+
+@instrumentation.timed()
+def replicates(test, count, data, seed=0, batch=50, workers=None):
+    """Statistics (count, 2, STATISTICS) of `count` replicates of a test, computed in batches on a process pool."""
+    sizes = [min(batch, count - start) for start in range(0, count, batch)]
+    if not sizes:
+        return np.empty((0, 2, len(STATISTICS)))
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+    args = ([test] * len(sizes), [seed] * len(sizes), range(len(sizes)), sizes)
+    if workers <= 1:
+        _set_data(*data)
+        results = list(map(_replicate_batch, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_set_data, initargs=data) as pool:
+            results = list(pool.map(_replicate_batch, *args))
+    instrumentation.count("replicates", count, test=test)
+    return np.concatenate(results)
+
+
+# --- Summaries ---
+
+def p_values(observed, permuted):
+    """Two-sided permutation p-values of the differences, and the number of replicates each one is based on."""
+    difference = observed[0] - observed[1]
+    permuted = permuted[:, 0] - permuted[:, 1]
+    defined = ~np.isnan(permuted)
+    # Differences equal to the observed one up to rounding count as at least as extreme
+    extreme = defined & (np.abs(permuted) >= np.abs(difference) * (1 - 1e-9))
+    return (1 + extreme.sum(axis=0)) / (1 + defined.sum(axis=0)), defined.sum(axis=0)
+
+
+def intervals(bootstrapped, confidence=0.95):
+    """Percentile intervals (2, STATISTICS) of downstream, upstream and their difference."""
+    tails = 100 * np.array([(1 - confidence) / 2, (1 + confidence) / 2])
+    series = {GROUPS[0]: bootstrapped[:, 0], GROUPS[1]: bootstrapped[:, 1],
+              "difference": bootstrapped[:, 0] - bootstrapped[:, 1]}
+    if not len(bootstrapped):
+        return {name: np.full((2, len(STATISTICS)), np.nan) for name in series}
+    return {name: np.nanpercentile(values, tails, axis=0) for name, values in series.items()}
+
+
+def _number(value):
+    return None if np.isnan(value) else float(value)
+
+
+def summarize(observed, permuted, bootstrapped, confidence=0.95):
+    p, defined = p_values(observed, permuted) if len(permuted) else (np.full(len(STATISTICS), np.nan), [0] * len(STATISTICS))
+    ci = intervals(bootstrapped, confidence)
+    summary = {}
+    for k, name in enumerate(STATISTICS):
+        summary[name] = {
+            GROUPS[0]: _number(observed[0, k]),
+            GROUPS[1]: _number(observed[1, k]),
+            "difference": _number(observed[0, k] - observed[1, k]),
+            "p_value": _number(p[k]),
+            "permutations_defined": int(defined[k]),
+            "confidence_interval": {group: [_number(ci[group][0, k]), _number(ci[group][1, k])] for group in ci},
+        }
+    return summary
+
+
+def print_summary(summary, confidence):
+    print(f"\n{'statistic':<18} {'downstream':>11} {'upstream':>11} {'difference':>11} {'p-value':>8}   "
+          f"{confidence:.0%} CI of the difference")
+    for name, row in summary.items():
+        low, high = row["confidence_interval"]["difference"]
+        values = [row[GROUPS[0]], row[GROUPS[1]], row["difference"]]
+        cells = " ".join(f"{v:>11.5g}" if v is not None else f"{'-':>11}" for v in values)
+        p = f"{row['p_value']:>8.4f}" if row["p_value"] is not None else f"{'-':>8}"
+        ci = f"[{low:.5g}, {high:.5g}]" if low is not None else "-"
+        print(f"{name:<18} {cells} {p}   {ci}")
+
+
+def main(inputs=dev_network.INPUT_CSVS, permutations=1000, bootstrap=1000, batch=50, workers=None, seed=42,
+         weight="min", confidence=0.95, path_sources=None, pivots=REPLICATE_PIVOTS, output_json=OUTPUT_JSON):
+    if len(inputs) != 2:
+        raise ValueError("expected two involvement tables: downstream-driven, then upstream-involved")
+    names, involvement, presence, labels = unit_matrices([dev_network.read_involvement(path) for path in inputs])
+    pivots = pivots or None
+    data = (names, involvement, presence, labels, weight, path_sources, pivots)
+    print(f"{len(names)} developers, {int(labels.sum())} downstream-driven and {int((labels == 0).sum())} "
+          f"upstream-involved scenarios")
+
+    observed = np.stack([statistics(network(names, involvement, presence, (labels == label).astype(np.int64),
+                                            weight), path_sources, None, seed)
+                         for label in (1, 0)])
+    permuted = replicates("permutation", permutations, data, seed, batch, workers)
+    bootstrapped = replicates("bootstrap", bootstrap, data, seed, batch, workers)
+    summary = summarize(observed, permuted, bootstrapped, confidence)
+    print_summary(summary, confidence)
+
+    result = {
+        "inputs": list(inputs),
+        "weight": weight,
+        "units": {GROUPS[0]: int(labels.sum()), GROUPS[1]: int((labels == 0).sum())},
+        "permutations": permutations,
+        "bootstrap": bootstrap,
+        "seed": seed,
+        "confidence": confidence,
+        "avg_path_length_sources": path_sources,
+        "betweenness_pivots": pivots,
+        "statistics": summary,
+    }
+    with open(output_json, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\n✅ Resampling tests saved to {output_json}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Permutation and bootstrap tests of downstream vs upstream networks.")
+    parser.add_argument("--inputs", nargs=2, default=dev_network.INPUT_CSVS, metavar=("DOWNSTREAM", "UPSTREAM"),
+                        help="involvement tables of the two kinds of scenarios")
+    parser.add_argument("--permutations", type=int, default=1000, help="label shuffles (0 = no permutation test)")
+    parser.add_argument("--bootstrap", type=int, default=1000, help="bootstrap resamples (0 = no intervals)")
+    parser.add_argument("--batch", type=int, default=50, help="replicates drawn and computed per task")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--weight", choices=dev_network.WEIGHTS, default="min")
+    parser.add_argument("--confidence", type=float, default=0.95, help="level of the bootstrap intervals")
+    parser.add_argument("--path-sources", type=int, default=None,
+                        help="estimate path lengths from this many random sources (default: exact)")
+    parser.add_argument("--pivots", type=int, default=REPLICATE_PIVOTS,
+                        help="estimate the betweenness of the replicates from this many sampled sources "
+                             "(0 = exact, about 10x slower)")
+    parser.add_argument("--output", default=OUTPUT_JSON)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('resampling'):
+        main(args.inputs, args.permutations, args.bootstrap, args.batch, args.workers, args.seed, args.weight,
+             args.confidence, args.path_sources, args.pivots, args.output)
@@ -0,0 +1,331 @@
+"""
+temporal_network.py
+
+Collaboration networks over sliding time windows, from the timestamped participation events that mine_dev_info.py
+writes to developer_events.csv (one row per authored issue or pull request, comment and review).
+
+The network of a window is the network dev_network.py would build from the events inside it. As in
+process_developer_involvement.py, a developer's involvement in an issue is 3 for the pull request author and 2 for
+any other event, the maximum is taken per (developer, scenario, project), and the project maxima are summed per
+scenario. Developers sharing a scenario are then linked with the min (or sum, product) weight. A window covering every
+event gives the networks of downstream_driven.csv and upstream_driven.csv.
+
+The events are streamed in time order and the graph is carried from one window to the next rather than rebuilt. When
+the window slides, the events that entered it are added and the events that left it are removed:
+    - per (developer, scenario, project) the window counts the events of each score, so the maximum is still known
+      after removals;
+    - within a scenario, the edge weight of two developers only changes if the involvement of one of them did, so
+      only those pairs are visited: each contributes w(a', b') - w(a, b), where w is the per-scenario weight
+      (PAIR_WEIGHTS) and a, b and a', b' are their involvements before and after the step. This is the difference
+          project(B_new[:, S]) - project(B_old[:, S])
+      of incremental_network.py over the changed scenarios S, without projecting the unchanged pairs. The increments
+      are applied to the edges, and edges whose weight drops to 0 are removed;
+    - degrees, strengths and the edge and node counts are updated from the changed edges and entries only.
+Components are read per window from the developer x scenario incidence of the window (a developer and a scenario are
+linked when the developer is involved in it). It has the same developer components as the projection and is much
+smaller than it.
+
+Usage:
+    python temporal_network.py [--events PATH] [--developers PATH] [--window DAYS] [--step DAYS]
+                               [--weight min|sum|product] [--output PATH]
+
+Events are restricted to the (Username, Issue) pairs of developer_info_cleaned.csv, which drops the bot accounts
+removed by filter_bots.py (--developers '' keeps every event). The windows start on the day of the first event and
+advance by --step days until one reaches the last event; each covers --window days. One row per network and window is
+written to ../data/temporal_network_metrics.csv. It holds the window bounds, the number of events and the metrics of
+network_metrics.py that are cheap to maintain: nodes, edges, components, giant component size, density, total and
+average weighted degree (strength), and degree Gini.
+"""
+
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+import dev_network
+import columnar  # importable once dev_network has put scripts-data-generation on the path
+import identity
+import instrumentation
+from dev_network import CollabGraph
+from incremental_network import KEY_SHIFT, KEY_MASK, _keys, _merge
+from network_metrics import gini
+
+EVENTS_CSV = os.path.join(dev_network.DATA_DIR, "developer_events.csv")
+DEVELOPERS_CSV = os.path.join(dev_network.DATA_DIR, "developer_info_cleaned.csv")
+OUTPUT_CSV = os.path.join(dev_network.DATA_DIR, "temporal_network_metrics.csv")
+
+EVENT_COLUMNS = ["Username", "Issue", "Role", "Created-at", "Downstream-driven-fix", "Scenario"]
+NETWORKS = {"downstream_driven": True, "upstream_driven": False}  # name -> Downstream-driven-fix
+
+DAY = 86400
+# Involvement score of an event, as in process_developer_involvement.calculate_involvement
+PR_AUTHOR_SCORE, OTHER_SCORE = 3, 2
+
+# Per-scenario edge weight of two involvements (dev_network.project), 0 when either developer is not involved
+PAIR_WEIGHTS = {
+    "min": np.minimum,
+    "sum": lambda a, b: (a + b) * ((a > 0) & (b > 0)),
+    "product": np.multiply,
+}
+
+
+class WindowedNetwork:
+    """The collaboration graph of the events inside a sliding window, updated as events enter and leave it."""
+
+    def __init__(self, names, users, scenarios, projects, pr_author, weight="min"):
+        """
+        names: username of every user ID; users, scenarios, projects: IDs per event; pr_author: whether each event
+        scores PR_AUTHOR_SCORE.
+        """
+        if weight not in dev_network.WEIGHTS:
+            raise ValueError(f"unknown edge weight {weight!r}, expected one of {dev_network.WEIGHTS}")
+        self.weight = weight
+        self.names = np.asarray(names, dtype=str)
+        n_users = len(self.names)
+        self.n_scenarios = int(scenarios.max()) + 1 if len(scenarios) else 0
+
+        # Cells (developer, scenario, project) and pairs (developer, scenario) of the events, as integer keys
+        n_projects = int(projects.max()) + 1 if len(projects) else 0
+        pair_keys = users.astype(np.int64) * self.n_scenarios + scenarios
+        cells, self.event_cell = np.unique(pair_keys * n_projects + projects, return_inverse=True)
+        self.event_score = np.asarray(pr_author, dtype=np.intp)  # column of the cell counts
+        pairs, self.cell_pair = np.unique(cells // n_projects, return_inverse=True)
+        self.pair_user, self.pair_scenario = np.divmod(pairs, self.n_scenarios)
+        # Pairs grouped by scenario
+        self.scenario_pairs = np.argsort(self.pair_scenario, kind="stable")
+        self.scenario_ptr = np.searchsorted(self.pair_scenario[self.scenario_pairs], np.arange(self.n_scenarios + 1))
+
+        # Window contents
+        self.counts = np.zeros((len(cells), 2), dtype=np.int64)  # events per cell: [other, PR author]
+        self.pair_inv = np.zeros(len(pairs), dtype=np.int64)      # involvement per (developer, scenario)
+        self.user_pairs = np.zeros(n_users, dtype=np.int64)        # scenarios each developer is involved in
+        self.edge_keys = np.empty(0, dtype=np.int64)
+        self.edge_weights = np.empty(0, dtype=np.int64)
+        self.degree = np.zeros(n_users, dtype=np.int64)
+        self.strength = np.zeros(n_users, dtype=np.int64)
+        self.n_events = 0
+        self.n_edges = 0
+        self.total_weight = 0
+
+    def _cell_inv(self, cells):
+        counts = self.counts[cells]
+        return np.where(counts[:, 1] > 0, PR_AUTHOR_SCORE, np.where(counts[:, 0] > 0, OTHER_SCORE, 0))
+
+    def _scenario_members(self, scenarios):
+        """Indices of the pairs of the given (sorted) scenarios, grouped by scenario, and the size of every group."""
+        lo, hi = self.scenario_ptr[scenarios], self.scenario_ptr[scenarios + 1]
+        lengths = hi - lo
+        return self.scenario_pairs[_ranges(lo, lengths)], lengths
+
+    @instrumentation.timed()
+    def slide(self, added, removed):
+        """Add and remove events (index arrays); returns the number of edges whose weight changed."""
+        cells = np.concatenate([self.event_cell[added], self.event_cell[removed]])
+        scores = np.concatenate([self.event_score[added], self.event_score[removed]])
+        signs = np.concatenate([np.ones(len(added), dtype=np.int64), -np.ones(len(removed), dtype=np.int64)])
+        self.n_events += len(added) - len(removed)
+        changed = np.unique(cells)
+        before_cells = self._cell_inv(changed)
+        np.add.at(self.counts, (cells, scores), signs)
+        moved = self._cell_inv(changed) - before_cells
+        changed, moved = changed[moved != 0], moved[moved != 0]
+        if not len(changed):
+            return 0
+
+        # Involvement of every developer of the changed scenarios, before and after the step
+        pairs = self.cell_pair[changed]
+        members, lengths = self._scenario_members(np.unique(self.pair_scenario[pairs]))
+        before = self.pair_inv[members]
+        np.add.at(self.pair_inv, pairs, moved)
+        after = self.pair_inv[members]
+        np.add.at(self.user_pairs, self.pair_user[members], (after > 0).astype(np.int64) - (before > 0))
+
+        # Every changed member against every member of its scenario; a pair of two changed members once
+        starts = np.cumsum(lengths) - lengths
+        group = np.repeat(np.arange(len(lengths)), lengths)
+        moving = after != before
+        moved_members = np.flatnonzero(moving)
+        partners = lengths[group[moved_members]]
+        first = np.repeat(moved_members, partners)
+        second = _ranges(starts[group[moved_members]], partners)
+        keep = (second != first) & (~moving[second] | (first < second))
+        first, second = first[keep], second[keep]
+        weight = PAIR_WEIGHTS[self.weight]
+        increments = (weight(after[first], after[second]) - weight(before[first], before[second])).astype(np.int64)
+
+        # Sum the increments per edge over the scenarios
+        users = self.pair_user[members]
+        keys, inverse = np.unique(_keys(users[first], users[second]), return_inverse=True)
+        increments = np.bincount(inverse, weights=increments, minlength=len(keys)).astype(np.int64)
+        nonzero = increments != 0
+        self._update_edges(keys[nonzero], increments[nonzero])
+        return int(nonzero.sum())
+
+    def _update_edges(self, keys, increments):
+        if not len(keys):
+            return
+        previous = np.zeros(len(keys), dtype=np.int64)
+        if len(self.edge_keys):
+            positions = np.minimum(np.searchsorted(self.edge_keys, keys), len(self.edge_keys) - 1)
+            found = self.edge_keys[positions] == keys
+            previous[found] = self.edge_weights[positions[found]]
+        current = previous + increments
+        links = (current != 0).astype(np.int64) - (previous != 0)  # +1 new edge, -1 removed edge
+        for ends in (keys >> KEY_SHIFT, keys & KEY_MASK):
+            np.add.at(self.degree, ends, links)
+            np.add.at(self.strength, ends, increments)
+        self.n_edges += int(links.sum())
+        self.total_weight += int(increments.sum())
+        self.edge_keys, self.edge_weights = _merge(self.edge_keys, self.edge_weights, keys, increments)
+        if (links < 0).any():
+            kept = self.edge_weights != 0
+            self.edge_keys, self.edge_weights = self.edge_keys[kept], self.edge_weights[kept]
+
+    # --- Window metrics ---
+
+    def active(self):
+        """Mask of the developers involved in some scenario of the window."""
+        return self.user_pairs > 0
+
+    def components(self, active):
+        """(number of components, giant component size) of the window's developers."""
+        if not active.any():
+            return 0, 0
+        n_users = len(self.names)
+        live = self.pair_inv > 0
+        incidence = sp.csr_matrix((np.ones(int(live.sum()), dtype=np.int8),
+                                   (self.pair_user[live], n_users + self.pair_scenario[live])),
+                                  shape=(n_users + self.n_scenarios,) * 2)
+        _, labels = connected_components(incidence, directed=False)
+        _, sizes = np.unique(labels[:n_users][active], return_counts=True)
+        return len(sizes), int(sizes.max())
+
+    def metrics(self):
+        active = self.active()
+        n = int(active.sum())
+        components, giant = self.components(active)
+        return {
+            "events": self.n_events,
+            "nodes": n,
+            "edges": self.n_edges,
+            "components": components,
+            "giant_component_size": giant,
+            "density": self.n_edges / (n * (n - 1) / 2) if n > 1 else float("nan"),
+            "total_strength": 2 * self.total_weight,
+            "avg_weighted_degree": 2 * self.total_weight / n if n else float("nan"),
+            "degree_gini": float(gini(self.degree[active])),
+        }
+
+    def graph(self):
+        """The window's network as a dev_network.CollabGraph over its developers (in user ID order)."""
+        active = np.flatnonzero(self.active())
+        index = np.full(len(self.names), -1)
+        index[active] = np.arange(len(active))
+        u, v = index[self.edge_keys >> KEY_SHIFT], index[self.edge_keys & KEY_MASK]
+        adjacency = sp.csr_matrix((np.concatenate([self.edge_weights, self.edge_weights]),
+                                   (np.concatenate([u, v]), np.concatenate([v, u]))), shape=(len(active),) * 2)
+        adjacency.sort_indices()
+        return CollabGraph(self.names[active], adjacency, self.weight)
+
+
+def _ranges(starts, lengths):
+    """Concatenation of arange(start, start + length) for every start and length."""
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+# --- Events and windows ---
+
+def read_events(path=EVENTS_CSV, developers_path=DEVELOPERS_CSV):
+    """The events table with times in seconds, in time order, restricted to the developers of developers_path."""
+    events = columnar.read_stage(path, columns=EVENT_COLUMNS)
+    times = pd.to_datetime(events["Created-at"], utc=True, errors="coerce")
+    events = events.assign(time=(times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1))
+    # Events without a username or project have no involvement, as in process_developer_involvement.py
+    keep = (times.notna().to_numpy() & events["Username"].notna().to_numpy()
+            & identity.projects(events["Issue"]).notna().to_numpy())
+    if developers_path:
+        developers = columnar.read_stage(developers_path, columns=["Username", "Issue"])
+        keep &= pd.MultiIndex.from_frame(events[["Username", "Issue"]]).isin(
+            pd.MultiIndex.from_frame(developers))
+    events = events[keep]
+    return events.iloc[np.argsort(events["time"].to_numpy(), kind="stable")].reset_index(drop=True)
+
+
+def windows(times, window_days, step_days):
+    """Start times of the windows over sorted event times: from the first event's day until one reaches the last."""
+    if not len(times):
+        return np.empty(0, dtype=np.int64)
+    first = times[0] // DAY * DAY
+    window, step = window_days * DAY, step_days * DAY
+    count = max(int(np.ceil((times[-1] + 1 - first - window) / step)), 0) + 1
+    return first + step * np.arange(count, dtype=np.int64)
+
+
+def network_of(events, weight="min"):
+    """A WindowedNetwork over a time-ordered events table (Username, Issue, Role, Scenario)."""
+    names = identity.Interner()
+    users = names.encode(events["Username"].to_numpy())
+    scenarios = identity.Interner().encode(events["Scenario"].to_numpy())
+    projects = identity.project_ids(events["Issue"], identity.Interner())
+    pr_author = (events["Role"] == "PR-author").to_numpy()
+    return WindowedNetwork(names.values, users, scenarios, projects, pr_author, weight)
+
+
+@instrumentation.timed()
+def sweep(network, times, starts, window_days):
+    """Slide the network over the windows; yields the metrics of each window (times: sorted event times)."""
+    ends = starts + window_days * DAY
+    entered = np.searchsorted(times, ends)
+    left = np.searchsorted(times, starts)
+    added_until = removed_until = 0
+    for start, end, enter, leave in zip(starts.tolist(), ends.tolist(), entered.tolist(), left.tolist()):
+        # With steps longer than the window, events can enter and leave between two windows: skip those
+        added = np.arange(max(added_until, leave), enter)
+        removed = np.arange(removed_until, min(leave, added_until))
+        network.slide(added, removed)
+        added_until, removed_until = max(enter, added_until), leave
+        instrumentation.count("windows")
+        yield {"window_start": identity.format_time(start), "window_end": identity.format_time(end),
+               **network.metrics()}
+
+
+def main(events_csv=EVENTS_CSV, developers_csv=DEVELOPERS_CSV, window_days=90, step_days=30, weight="min",
+         output_csv=OUTPUT_CSV):
+    events = read_events(events_csv, developers_csv)
+    starts = windows(events["time"].to_numpy(), window_days, step_days)
+    downstream = events["Downstream-driven-fix"].astype(str).str.lower().eq("true").to_numpy()
+    tables = []
+    for name, is_downstream in NETWORKS.items():
+        subset = events[downstream == is_downstream]
+        table = pd.DataFrame(sweep(network_of(subset, weight), subset["time"].to_numpy(), starts, window_days))
+        table.insert(0, "network", name)
+        tables.append(table)
+        if len(table):
+            busiest = table.loc[table["nodes"].idxmax()]
+            print(f"{name}: {len(subset)} events, {len(table)} windows of {window_days} days every {step_days}; "
+                  f"largest window {busiest['window_start'][:10]}: {busiest['nodes']} developers, "
+                  f"{busiest['edges']} edges")
+    table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+    table.to_csv(output_csv, index=False)
+    print(f"\n✅ Temporal network metrics saved to {output_csv}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Collaboration network metrics over sliding time windows.")
+    parser.add_argument("--events", default=EVENTS_CSV, help="developer_events.csv written by mine_dev_info.py")
+    parser.add_argument("--developers", default=DEVELOPERS_CSV,
+                        help="keep only the (Username, Issue) pairs of this table ('' keeps every event)")
+    parser.add_argument("--window", type=int, default=90, help="window length in days")
+    parser.add_argument("--step", type=int, default=30, help="days between window starts")
+    parser.add_argument("--weight", choices=dev_network.WEIGHTS, default="min")
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('temporal_network'):
+        main(args.events, args.developers, args.window, args.step, args.weight, args.output)
@@ -15,13 +15,15 @@ Workflow:
 
 Input:  ../data/migrated_issues.csv (list of GitHub issues)
 Output: ../data/bot_comments.csv, ../data/mentioned_users.csv
+
+The bot-comment and mention extraction are consumers of comment_pass.py; run that script instead to produce these
+files together with developer_info.csv while fetching each issue's comments only once.
 """
 
 import csv
-import os
 import re
-import requests
-from dotenv import load_dotenv
+
+import instrumentation
 
 # ----------------------------
 # CONFIGURATION
@@ -31,10 +33,6 @@ INPUT_CSV = "../data/migrated_issues.csv"          # CSV listing the GitHub issu
 BOT_COMMENTS_CSV = "../data/bot_comments.csv"
 MENTIONED_USERS_CSV = "../data/mentioned_users.csv"
 
-load_dotenv()  # Loads variables from .env into environment
-GITHUB_TOKEN = os.getenv('PAC') # Get Personal Access Token
-HEADERS = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
-
 # Bot usernames (registered as normal GitHub users)
 BOT_USERNAMES = {"numpy-gitbot", "scipy-gitbot"}
 
@@ -46,85 +44,41 @@ MENTION_REGEX = re.compile(r"@([a-zA-Z0-9](?:[a-zA-Z0-9-]{0,37}[a-zA-Z0-9])?)")
 # FUNCTIONS
 # ----------------------------
 
-def parse_issue_ref(ref):
-    owner_repo, num = ref.split("#")
-    owner, repo = owner_repo.split("/")
-    return owner, repo, int(num)
-
-
-def fetch_issue_comments(owner, repo, number):
-    url = f"https://api.github.com/repos/{owner}/{repo}/issues/{number}/comments"
-    comments, page = [], 1
-
-    while True:
-        resp = requests.get(url, headers=HEADERS,
-                            params={"page": page, "per_page": 100})
-        resp.raise_for_status()
-        data = resp.json()
-        if not data:
-            break
-        comments.extend(data)
-        page += 1
-
-    return comments
-
-
 def extract_mentions(text):
     return MENTION_REGEX.findall(text)
 
+def write_bot_comments(bot_comment_rows, path=BOT_COMMENTS_CSV):
+    print(f"\nWriting {path} ...")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=["issue", "comment_id", "created_at", "user_login", "body"]
+        )
+        writer.writeheader()
+        writer.writerows(bot_comment_rows)
+
+
+def write_mentioned_users(mentioned_user_pairs, path=MENTIONED_USERS_CSV):
+    print(f"Writing {path} ...")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["issue", "username"])
+        writer.writeheader()
+        for issue, username in sorted(mentioned_user_pairs):
+            writer.writerow({"issue": issue, "username": username})
+
 # ----------------------------
 # MAIN EXTRACTION LOGIC
 # ----------------------------
 
-bot_comment_rows = []
-mentioned_user_pairs = set()   # <-- dedup set
+def main():
+    # The extraction runs as a comment pass with the bot consumers only;
+    # comment_pass.py runs the same consumers together with the developer-role extraction.
+    from comment_pass import IssueThread, BotCommentConsumer, MentionConsumer, read_issue_refs, run_pass
 
-with open(INPUT_CSV, newline="") as f:
-    reader = csv.DictReader(f)
+    threads = [IssueThread(ref, None) for ref in dict.fromkeys(read_issue_refs(INPUT_CSV))]
+    run_pass(threads, [BotCommentConsumer(), MentionConsumer()], workers=1)
 
-    for row in reader:
-        issue_ref = row["GitHub-Issue"].strip()
-        owner, repo, issue_number = parse_issue_ref(issue_ref)
-
-        print(f"Processing {issue_ref} ...")
-
-        comments = fetch_issue_comments(owner, repo, issue_number)
-
-        for c in comments:
-            user = c.get("user", {})
-            login = user.get("login")
-
-            if login in BOT_USERNAMES:
-                bot_comment_rows.append({
-                    "issue": issue_ref,
-                    "comment_id": c.get("id"),
-                    "created_at": c.get("created_at"),
-                    "user_login": login,
-                    "body": (c.get("body", "") or "").replace("\n", " ").strip()
-                })
-
-                mentions = extract_mentions(c.get("body", "") or "")
-                for m in mentions:
-                    mentioned_user_pairs.add((issue_ref, m))  # <-- dedup
-
-
-
-# ----------------------------
-# WRITE CSV OUTPUT
-# ----------------------------
 
-print(f"\nWriting {BOT_COMMENTS_CSV} ...")
-with open(BOT_COMMENTS_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(
-        f,
-        fieldnames=["issue", "comment_id", "created_at", "user_login", "body"]
-    )
-    writer.writeheader()
-    writer.writerows(bot_comment_rows)
-
-print(f"Writing {MENTIONED_USERS_CSV} ...")
-with open(MENTIONED_USERS_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=["issue", "username"])
-    writer.writeheader()
-    for issue, username in sorted(mentioned_user_pairs):
-        writer.writerow({"issue": issue, "username": username})
\ No newline at end of file
+if __name__ == "__main__":
+    with instrumentation.stage('bot_comment_parser'):
+        main()
@@ -0,0 +1,364 @@
+"""
+columnar.py
+
+Optional columnar storage for the tables passed between pipeline stages
+(combined_issues -> developer_info -> developer_info_cleaned -> downstream/upstream_driven -> dev_affiliations).
+
+The format is chosen with DATA_FORMAT in .env or the environment:
+    - csv (default): every stage reads and writes CSV exactly as before.
+    - columnar:      each table is a directory <name>.cols next to the CSV path, with one .npy file per column and a
+                     meta.json. Text columns (usernames, issues, projects) are dictionary-encoded: integer codes plus
+                     the list of distinct strings. Role flags and other booleans are stored as real booleans, so they
+                     are never re-parsed from "True"/"False" text. Readers memory-map the .npy files: ColumnarTable
+                     hands out the mapped arrays and dictionaries without copying (pandas may still copy columns
+                     of the same dtype when it assembles a DataFrame).
+    - parquet:       <name>.parquet, with text columns stored as dictionary-encoded categoricals (needs pyarrow).
+Readers fall back to the CSV when a table has not been written in the configured format yet, so the formats can be
+mixed while migrating, and when the CSV is newer than the stored copy (the copies are not tracked by git, the CSVs
+are). The scripts that process rows with the csv module (read_records, stream_records, write_records) get dict rows
+decoded block by block straight from the stored columns, and their rows are typed column by column when written, so no
+CSV text is formatted or parsed in between. Any table can be exported back to CSV:
+
+    python columnar.py export ../data/developer_info.cols         # -> ../data/developer_info.csv
+    python columnar.py import ../data/developer_info_cleaned.csv  # -> ../data/developer_info_cleaned.cols
+"""
+
+import os
+import csv
+import sys
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FORMATS = ('csv', 'columnar', 'parquet')
+DATA_FORMAT = os.getenv('DATA_FORMAT', 'csv').strip().lower()
+
+COLUMNAR_SUFFIX = '.cols'
+PARQUET_SUFFIX = '.parquet'
+META_FILE = 'meta.json'
+
+
+# --- Paths ---
+
+def stage_path(csv_path, fmt=None):
+    """Where the table for a stage CSV path lives in the given (default: configured) format."""
+    fmt = fmt or DATA_FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown data format {fmt!r}, expected one of {FORMATS}")
+    stem = os.path.splitext(csv_path)[0]
+    return {'csv': csv_path, 'columnar': stem + COLUMNAR_SUFFIX, 'parquet': stem + PARQUET_SUFFIX}[fmt]
+
+
+def format_of(path):
+    if path.endswith(COLUMNAR_SUFFIX):
+        return 'columnar'
+    if path.endswith(PARQUET_SUFFIX):
+        return 'parquet'
+    return 'csv'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("DATA_FORMAT=parquet needs pyarrow (pip install pyarrow); use DATA_FORMAT=columnar "
+                          "for the NumPy-based format") from None
+
+
+# --- Columnar directories ---
+
+def _is_text(series):
+    return series.dtype == object or isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+def write_columnar(df, path):
+    """Write a DataFrame as a directory of .npy columns; text columns are dictionary-encoded."""
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    columns = []
+    for k, name in enumerate(df.columns):
+        series = df[name]
+        entry = {'name': name, 'file': f"{k}.npy"}
+        if _is_text(series):
+            categorical = pd.Categorical(series.astype(object))
+            entry['kind'] = 'dictionary'
+            entry['dictionary'] = [str(v) for v in categorical.categories]
+            values = np.asarray(categorical.codes)  # -1 marks missing values
+        else:
+            entry['kind'] = 'values'
+            values = series.to_numpy()
+        np.save(os.path.join(tmp_path, entry['file']), values, allow_pickle=False)
+        columns.append(entry)
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'rows': len(df), 'columns': columns}, f)
+    # Replace the previous version only once the new one is complete
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+class ColumnarTable:
+    """A columnar directory opened for reading; every column is a read-only memory map."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        self.n_rows = meta['rows']
+        self.columns = {entry['name']: entry for entry in meta['columns']}
+
+    def __len__(self):
+        return self.n_rows
+
+    def values(self, name):
+        """Raw stored array of a column: the codes of a dictionary column, the values otherwise (memory-mapped)."""
+        return np.load(os.path.join(self.path, self.columns[name]['file']), mmap_mode='r', allow_pickle=False)
+
+    def dictionary(self, name):
+        """Distinct strings of a dictionary-encoded column, indexed by code."""
+        return np.array(self.columns[name]['dictionary'], dtype=object)
+
+    def is_dictionary(self, name):
+        return self.columns[name]['kind'] == 'dictionary'
+
+    def column(self, name, categorical=False):
+        """One column as a pandas-ready array: strings (or a Categorical) for dictionary columns."""
+        values = self.values(name)
+        if not self.is_dictionary(name):
+            return values
+        dictionary = self.dictionary(name)
+        if categorical:
+            return pd.Categorical.from_codes(values, categories=dictionary, validate=False)
+        decoded = dictionary.take(np.maximum(values, 0)) if len(dictionary) else np.full(len(values), np.nan, object)
+        decoded[np.asarray(values) < 0] = np.nan
+        return decoded
+
+    def to_frame(self, columns=None, categorical=False):
+        names = [name for name in self.columns if columns is None or name in columns]
+        return pd.DataFrame({name: self.column(name, categorical) for name in names}, copy=False)
+
+
+def read_columnar(path, columns=None, categorical=False):
+    return ColumnarTable(path).to_frame(columns, categorical)
+
+
+# --- Stage I/O ---
+
+def read_table(path, columns=None, categorical=False):
+    """Read a table from any of the formats, chosen by the path."""
+    fmt = format_of(path)
+    if fmt == 'columnar':
+        return read_columnar(path, columns, categorical)
+    if fmt == 'parquet':
+        _require_pyarrow()
+        df = pd.read_parquet(path, columns=columns)
+        if not categorical:
+            for name in df.columns:
+                if isinstance(df[name].dtype, pd.CategoricalDtype):
+                    df[name] = df[name].astype(object)
+        return df
+    return pd.read_csv(path, usecols=columns)
+
+
+def write_table(df, path):
+    """Write a table in the format chosen by the path."""
+    fmt = format_of(path)
+    if fmt == 'columnar':
+        write_columnar(df, path)
+    elif fmt == 'parquet':
+        _require_pyarrow()
+        df = df.copy()
+        for name in df.columns:
+            if df[name].dtype == object:
+                df[name] = df[name].astype('category')
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _mtime(path):
+    """Modification time of a stored table (a columnar table is complete once its meta.json is written)."""
+    if format_of(path) == 'columnar':
+        path = os.path.join(path, META_FILE)
+    return os.path.getmtime(path)
+
+
+def resolve(csv_path, fmt=None):
+    """
+    Path to read a stage table from: the configured format if it exists there, else the CSV. A copy older than
+    the CSV (e.g. after a git pull updated the tracked CSV) is stale and skipped.
+    """
+    path = stage_path(csv_path, fmt)
+    if path == csv_path or not os.path.exists(path):
+        return csv_path
+    if os.path.exists(csv_path) and _mtime(csv_path) > _mtime(path):
+        print(f"⚠️ {path} is older than {csv_path}, reading the CSV")
+        return csv_path
+    return path
+
+
+def read_stage(csv_path, columns=None, categorical=False, fmt=None):
+    """Read the table a stage wrote to csv_path, in whatever format it was stored."""
+    return read_table(resolve(csv_path, fmt), columns, categorical)
+
+
+def write_stage(df, csv_path, fmt=None):
+    """Write a stage table to csv_path in the configured format; returns the path written."""
+    path = stage_path(csv_path, fmt)
+    write_table(df, path)
+    return path
+
+
+# --- Records (dict rows) ---
+
+RECORD_BLOCK = 4096  # rows decoded at a time from a stored table
+
+BOOLEAN_TEXT = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+
+
+def _renderer(values, dictionary=None):
+    """Function turning a slice of a stored column into the strings csv.DictReader reads from its CSV export."""
+    if dictionary is not None:
+        labels = [str(v) for v in dictionary] + ['']  # code -1 (missing) picks the last label
+        return lambda block: [labels[code] for code in block.tolist()]
+    if values.dtype == bool:
+        return lambda block: ['True' if v else 'False' for v in block.tolist()]
+    if values.dtype.kind == 'f':
+        return lambda block: ['' if v != v else repr(v) for v in block.tolist()]
+    return lambda block: ['' if v is None or v != v else str(v) for v in block.tolist()]
+
+
+def _record_columns(path):
+    """(fieldnames, number of rows, [(stored array, renderer)]) of a columnar or Parquet table."""
+    if format_of(path) == 'columnar':
+        table = ColumnarTable(path)
+        columns = []
+        for name in table.columns:
+            values = table.values(name)
+            columns.append((values, _renderer(values, table.dictionary(name) if table.is_dictionary(name) else None)))
+        return list(table.columns), len(table), columns
+    df = read_table(path, categorical=True)
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            columns.append((series.cat.codes.to_numpy(), _renderer(None, series.cat.categories)))
+        else:
+            values = series.to_numpy()
+            columns.append((values, _renderer(values)))
+    return list(df.columns), len(df), columns
+
+
+def _iter_records(fieldnames, n_rows, columns):
+    """Dict rows of a stored table, decoded RECORD_BLOCK rows at a time straight from its column arrays."""
+    for start in range(0, n_rows, RECORD_BLOCK):
+        stop = min(start + RECORD_BLOCK, n_rows)
+        rendered = [render(values[start:stop]) for values, render in columns]
+        for row in zip(*rendered):
+            yield dict(zip(fieldnames, row))
+
+
+def _typed(values):
+    """
+    One column of dict rows, typed as pandas reads it from a CSV: booleans, integers, floats or text, with None
+    and '' as missing values. The type is decided on the distinct values, which are few for flags and numbers.
+    """
+    distinct = set(values)
+    missing = None in distinct or '' in distinct
+    distinct -= {None, ''}
+    if not distinct:
+        return np.full(len(values), np.nan)
+    if all(isinstance(v, bool) or v in BOOLEAN_TEXT for v in distinct):
+        lookup = {v: BOOLEAN_TEXT.get(v, v) for v in distinct}
+        if not missing:
+            return np.array([lookup[v] for v in values], dtype=bool)
+        return np.array([lookup.get(v, np.nan) for v in values], dtype=object)
+    if not any(isinstance(v, bool) for v in distinct):
+        distinct = list(distinct)
+        numbers = pd.to_numeric(pd.Series(distinct, dtype=object), errors='coerce')
+        if numbers.notna().all():
+            lookup = dict(zip(distinct, numbers.tolist()))
+            return np.array([lookup.get(v, np.nan) for v in values], dtype=float if missing else numbers.dtype)
+    return np.array([np.nan if v is None or v == '' else v if isinstance(v, str) else str(v) for v in values],
+                    dtype=object)
+
+
+def read_records(csv_path, fmt=None):
+    """
+    Rows of a stage table as dicts of strings, exactly as csv.DictReader returns them from the CSV.
+
+    For the scripts that process rows with the csv module; stored tables are decoded from their column arrays, with
+    booleans as "True"/"False" and missing values as "".
+    """
+    path = resolve(csv_path, fmt)
+    if format_of(path) == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    return list(_iter_records(*_record_columns(path)))
+
+
+def stream_records(csv_path, fmt=None):
+    """
+    (fieldnames, iterator over the rows) of a stage table, rows as in read_records.
+
+    CSV files are read lazily, one row at a time; stored tables are mapped and decoded RECORD_BLOCK rows at a time.
+    """
+    path = resolve(csv_path, fmt)
+    if format_of(path) != 'csv':
+        fieldnames, n_rows, columns = _record_columns(path)
+        return fieldnames, _iter_records(fieldnames, n_rows, columns)
+    f = open(path, newline='', encoding='utf-8')
+    reader = csv.DictReader(f)
+    fieldnames = reader.fieldnames or []
+
+    def rows():
+        with f:
+            yield from reader
+    return fieldnames, rows()
+
+
+def write_records(rows, fieldnames, csv_path, fmt=None):
+    """Write dict rows (csv.DictWriter style) as a stage table; returns the path written. CSV output streams."""
+    path = stage_path(csv_path, fmt)
+    if format_of(path) == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        # Collect the rows column by column and type the columns as pandas would read them from the CSV
+        columns = {name: [] for name in fieldnames}
+        for row in rows:
+            for name, column in columns.items():
+                column.append(row.get(name))
+        write_table(pd.DataFrame({name: _typed(column) for name, column in columns.items()}), path)
+    return path
+
+
+def export_csv(path, csv_path=None):
+    """Write any stored table back to CSV (next to it by default)."""
+    csv_path = csv_path or os.path.splitext(path)[0] + '.csv'
+    read_table(path).to_csv(csv_path, index=False)
+    return csv_path
+
+
+def main(argv):
+    if len(argv) < 2 or argv[0] not in ('export', 'import'):
+        print(__doc__)
+        return 1
+    for path in argv[1:]:
+        if argv[0] == 'export':
+            print(f"{path} -> {export_csv(path)}")
+        else:
+            fmt = DATA_FORMAT if DATA_FORMAT != 'csv' else 'columnar'
+            print(f"{path} -> {write_stage(pd.read_csv(path), path, fmt)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,284 @@
+"""
+comment_pass.py
+
+Single comment-processing pass over GitHub issues, replacing separate runs of mine_dev_info.py and
+bot_comment_parser.py that both downloaded /issues/{n}/comments for overlapping issues.
+
+Every issue's comment stream is fetched exactly once (through the same concurrent, cached, rate-limited machinery as
+mine_dev_info.py) and handed, in input order, to a list of pluggable consumers:
+    - RoleConsumer:        developer roles per issue          -> ../data/developer_info.csv, developer_events.csv,
+                                                                 account_types.csv
+    - BotCommentConsumer:  comments authored by bot accounts  -> ../data/bot_comments.csv
+    - MentionConsumer:     users mentioned in those comments  -> ../data/mentioned_users.csv
+Further per-comment analyzers subclass CommentConsumer and implement comment().
+
+Issues come from ../data/combined_issues.csv (roles) and ../data/migrated_issues.csv (bot comments and mentions).
+Issues only needed by the bot consumers are read without the issue and review requests. If the migrated issues file
+does not exist, the bot consumers look at every issue of the combined list. Issues whose requests fail (after the
+retries of github_api.py) are left out of every output and listed at the end of the run.
+
+Usage:
+    python comment_pass.py [--workers N] [--issues PATH] [--bot-issues PATH]
+"""
+
+import os
+import csv
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import columnar
+import github_api
+import mine_dev_info
+import instrumentation
+import bot_comment_parser
+from identity import DevRoles, parse_issue_ref
+from mine_dev_info import API_URL, issue_key, issue_rows, event_rows, safe_paginate
+
+BOT_ISSUES_CSV = bot_comment_parser.INPUT_CSV
+BOT_COMMENTS_CSV = bot_comment_parser.BOT_COMMENTS_CSV
+MENTIONED_USERS_CSV = bot_comment_parser.MENTIONED_USERS_CSV
+
+
+class IssueThread:
+    """An issue and everything fetched for it. is_pr is None for issues only read for their comments."""
+
+    __slots__ = ('ref', 'is_pr', 'issue', 'comments', 'reviews')
+
+    def __init__(self, ref, is_pr, issue=None, comments=None, reviews=None):
+        self.ref = ref
+        self.is_pr = is_pr
+        self.issue = issue
+        self.comments = comments
+        self.reviews = reviews
+
+    @property
+    def key(self):
+        return self.ref, self.is_pr
+
+
+# --- Consumers ---
+
+class CommentConsumer:
+    """Base consumer: sees every fetched thread it wants, in input order, then writes its output."""
+
+    needs_issue = False  # True if the issue payload and PR reviews are required, not just the comments
+
+    def wants(self, thread):
+        return True
+
+    def consume(self, thread):
+        for comment in thread.comments or []:
+            self.comment(thread, comment)
+
+    def comment(self, thread, comment):
+        pass
+
+    def finish(self):
+        pass
+
+
+class RoleConsumer(CommentConsumer):
+    """Developer roles (author, commenters, reviewers) for the rows of combined_issues.csv."""
+
+    needs_issue = True
+
+    def __init__(self, rows, output_csv=mine_dev_info.OUTPUT_CSV):
+        self.rows = rows
+        self.keys = {issue_key(row) for row in rows}
+        self.output_csv = output_csv
+        self.roles = {}
+
+    def wants(self, thread):
+        return thread.key in self.keys
+
+    def consume(self, thread):
+        self.roles[thread.key] = mine_dev_info.thread_roles(thread.issue, thread.comments, thread.reviews,
+                                                            thread.is_pr)
+
+    def finish(self):
+        all_rows, all_events = [], []
+        for row in self.rows:
+            dev_roles = self.roles.get(issue_key(row)) or DevRoles()
+            all_rows.extend(issue_rows(row, dev_roles))
+            all_events.extend(event_rows(row, dev_roles))
+        path = mine_dev_info.write_developer_info(all_rows, self.output_csv)
+        events_path = mine_dev_info.write_developer_events(all_events, path)
+        types_path = mine_dev_info.write_account_types(path)
+        print(f"✅ Developer information saved to {path}")
+        print(f"✅ Developer events saved to {events_path}")
+        print(f"✅ Account types saved to {types_path}")
+
+
+class BotCommentConsumer(CommentConsumer):
+    """Comments authored by known bot accounts."""
+
+    def __init__(self, issue_refs=None, bots=None, output_csv=BOT_COMMENTS_CSV):
+        self.issue_refs = issue_refs
+        self.bots = bots or bot_comment_parser.BOT_USERNAMES
+        self.output_csv = output_csv
+        self.rows = []
+        self.seen = set()
+
+    def wants(self, thread):
+        return self.issue_refs is None or thread.ref in self.issue_refs
+
+    def consume(self, thread):
+        # An issue listed both as PR and as bug report is fetched twice; report its comments once
+        if thread.ref not in self.seen:
+            self.seen.add(thread.ref)
+            super().consume(thread)
+
+    def comment(self, thread, comment):
+        login = (comment.get("user") or {}).get("login")
+        if login in self.bots:
+            self.rows.append({
+                "issue": thread.ref,
+                "comment_id": comment.get("id"),
+                "created_at": comment.get("created_at"),
+                "user_login": login,
+                "body": (comment.get("body", "") or "").replace("\n", " ").strip()
+            })
+
+    def finish(self):
+        bot_comment_parser.write_bot_comments(self.rows, self.output_csv)
+
+
+class MentionConsumer(CommentConsumer):
+    """Unique (issue, username) pairs mentioned with @ in comments by the given authors (bots by default)."""
+
+    def __init__(self, issue_refs=None, authors=None, output_csv=MENTIONED_USERS_CSV):
+        self.issue_refs = issue_refs
+        self.authors = authors or bot_comment_parser.BOT_USERNAMES
+        self.output_csv = output_csv
+        self.pairs = set()
+
+    def wants(self, thread):
+        return self.issue_refs is None or thread.ref in self.issue_refs
+
+    def comment(self, thread, comment):
+        if (comment.get("user") or {}).get("login") in self.authors:
+            for m in bot_comment_parser.extract_mentions(comment.get("body", "") or ""):
+                self.pairs.add((thread.ref, m))
+
+    def finish(self):
+        bot_comment_parser.write_mentioned_users(self.pairs, self.output_csv)
+
+
+# --- The pass ---
+
+@instrumentation.timed()
+def fetch_thread(thread, needs_issue, executor, session):
+    """
+    Fill in a thread with one request per resource it needs; return whether every request succeeded.
+
+    Missing resources (unknown references, 404s) are empty, failed requests leave their part None.
+    """
+    if needs_issue:
+        thread.issue, thread.comments, thread.reviews = mine_dev_info.fetch_issue_thread(
+            thread.ref, thread.is_pr, executor, session)
+        complete = mine_dev_info.thread_complete(thread.issue, thread.comments, thread.reviews)
+    else:
+        owner, repo, number = parse_issue_ref(thread.ref)
+        thread.comments = []
+        if owner:
+            thread.comments = safe_paginate(f"{API_URL}{owner}/{repo}/issues/{number}/comments", session, [])
+            if thread.comments is not None:
+                instrumentation.count('comments_fetched', len(thread.comments))
+        complete = thread.comments is not None
+    instrumentation.count('threads_fetched', kind='issue' if needs_issue else 'comments',
+                          outcome='ok' if complete else 'failed')
+    return complete
+
+
+@instrumentation.timed()
+def run_pass(threads, consumers, workers=mine_dev_info.MAX_WORKERS, session=None):
+    """
+    Fetch every thread wanted by at least one consumer once, feed the consumers in order, then finish them.
+
+    Threads whose requests failed are not fed to the consumers; their references are reported and returned.
+    """
+    session = session or mine_dev_info.SESSION
+    jobs = []
+    for thread in threads:
+        interested = [c for c in consumers if c.wants(thread)]
+        if interested:
+            jobs.append((thread, any(c.needs_issue for c in interested), interested))
+
+    def run_job(job, executor=None):
+        thread, needs_issue, _ = job
+        print(f"Processing {thread.ref}...")
+        return fetch_thread(thread, needs_issue, executor, session)
+
+    # Threads that could not be fetched completely are left out rather than analysed in part
+    skipped = []
+
+    def feed(fetched):
+        for (thread, _, interested), complete in zip(jobs, fetched):
+            if not complete:
+                skipped.append(thread.ref)
+                continue
+            for consumer in interested:
+                consumer.consume(thread)
+
+    if workers <= 1:
+        feed(map(run_job, jobs))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool, \
+             ThreadPoolExecutor(max_workers=workers) as detail_pool:
+            feed(pool.map(lambda job: run_job(job, detail_pool), jobs))
+
+    for consumer in consumers:
+        consumer.finish()
+    if skipped:
+        print(f"⚠️ Skipped {len(skipped)} of {len(jobs)} issues that could not be fetched completely: "
+              f"{', '.join(skipped)}")
+    return skipped
+
+
+def plan_threads(rows, bot_refs):
+    """One thread per (issue, PR) of the combined rows, plus comment-only threads for the other bot issues."""
+    threads = [IssueThread(ref, is_pr) for ref, is_pr in dict.fromkeys(issue_key(row) for row in rows)]
+    known = {t.ref for t in threads}
+    threads += [IssueThread(ref, None) for ref in dict.fromkeys(bot_refs or []) if ref not in known]
+    return threads
+
+
+def read_issue_refs(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["GitHub-Issue"].strip() for row in csv.DictReader(f)]
+
+
+def main(issues_csv=mine_dev_info.INPUT_CSV, bot_issues_csv=BOT_ISSUES_CSV, workers=mine_dev_info.MAX_WORKERS,
+         output_csv=mine_dev_info.OUTPUT_CSV, bot_comments_csv=BOT_COMMENTS_CSV,
+         mentioned_users_csv=MENTIONED_USERS_CSV):
+    rows = columnar.read_records(issues_csv)
+
+    if os.path.exists(bot_issues_csv):
+        bot_refs = read_issue_refs(bot_issues_csv)
+        bot_filter = set(bot_refs)
+    else:
+        print(f"{bot_issues_csv} not found: looking for bot comments in every issue")
+        bot_refs, bot_filter = None, None
+
+    consumers = [
+        RoleConsumer(rows, output_csv),
+        BotCommentConsumer(bot_filter, output_csv=bot_comments_csv),
+        MentionConsumer(bot_filter, output_csv=mentioned_users_csv),
+    ]
+    run_pass(plan_threads(rows, bot_refs), consumers, workers)
+    print(github_api.cache_summary())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch each issue's comments once and run every comment analysis.")
+    parser.add_argument('--issues', default=mine_dev_info.INPUT_CSV, help="combined issues CSV (developer roles)")
+    parser.add_argument('--bot-issues', default=BOT_ISSUES_CSV, help="issues to scan for bot comments")
+    parser.add_argument('--workers', type=int, default=mine_dev_info.MAX_WORKERS,
+                        help="number of issues fetched in parallel (1 = sequential)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('comment_pass'):
+        main(args.issues, args.bot_issues, args.workers)
@@ -4,109 +4,230 @@ Analyze Combined Issues and Developer Info Data
 This script analyzes the combined issues and developer info datasets to extract key statistics and insights about project activity and developer participation.
 
 Workflow:
-1. Loads and analyzes combined issues data (../data/combined_issues.csv), reporting counts of issues, PRs, bug reports, projects, downstream-driven fixes, and unique IDs.
-2. Loads and analyzes developer info data (../data/developer_info.csv), reporting distinct users, average developers per issue, and breakdowns by downstream-driven-fix status.
+1. Streams the combined issues data (../data/combined_issues.csv) once, reporting counts of issues, PRs, bug reports, projects, downstream-driven fixes, and unique IDs.
+2. Streams the developer info data (../data/developer_info_cleaned.csv) once, reporting distinct users, average developers per issue, and breakdowns by downstream-driven-fix status.
 3. For each downstream-driven-fix group, reports user activity, average appearances, and top contributors.
 
-Input:  ../data/combined_issues.csv, ../data/developer_info.csv
-Output: Prints summary statistics and breakdowns to the console for further interpretation.
+Every statistic is accumulated in the same pass over each file, row by row. With --approximate, distinct counts use
+HyperLogLog and the most active users a space-saving top-k (see sketches.py), so memory stays bounded on very large
+inputs; the default exact mode prints the same report as before.
+
+Input:  ../data/combined_issues.csv, ../data/developer_info_cleaned.csv
+Output: Prints summary statistics and breakdowns to the console, and writes them to ../data/data_analysis.json.
+
+Usage:
+    python data_analysis.py [--approximate] [--precision 14] [--capacity 1000] [--top 5] [--json PATH]
 """
 
-import csv
+import json
+import argparse
 from pathlib import Path
-from collections import defaultdict, Counter
 
-def analyze_combined_issues(path):
-    with path.open(newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+import columnar
+import instrumentation
+from sketches import distinct_counter, frequency_counter
 
-        total_issues = len(rows)
-        total_prs = sum(1 for r in rows if r["PR"].lower() == "true")
-        total_bug_reports = total_issues - total_prs
-        projects = {r["GitHub-Issue"].split("#")[0] for r in rows}
-        total_projects = len(projects)
-        downstream_true = sum(1 for r in rows if r["Downstream-driven-fix"].lower() == "true")
-        total_ids = len({r["ID"] for r in rows})
+COMBINED_CSV = Path("../data/combined_issues.csv")
+DEVINFO_CSV = Path("../data/developer_info_cleaned.csv")
+OUTPUT_JSON = Path("../data/data_analysis.json")
 
-        # Scenario count classified as downstream vs upstream driven
-        scenario_downstream = set()
-        scenario_upstream = set()
-        for r in rows:
-            if r["Downstream-driven-fix"].lower() == "true":
-                scenario_downstream.add(r["ID"])
-            else:
-                scenario_upstream.add(r["ID"])
+DOWNSTREAM_GROUPS = ("true", "false")
 
-    print("📊 Combined Issues Analysis")
-    print(f"Total issues: {total_issues}")
-    print(f"PRs: {total_prs}")
-    print(f"Bug Reports: {total_bug_reports}")
-    print(f"Projects involved: {total_projects}")
-    print(f"Downstream-driven-fix Issues: {downstream_true}")
-    print(f"Upstream-driven-fix Issues: {total_issues - downstream_true}")
-    print(f"Unique IDs (Scenarios): {total_ids}")
-    print(f"Scenarios classified as downstream-driven: {len(scenario_downstream)}")
-    print(f"Scenarios classified as upstream-driven: {len(scenario_upstream)}")
-    print()
 
+class Sketches:
+    """Which distinct/frequency counters the aggregators use."""
 
-def analyze_developer_info(path):
-    with path.open(newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    __slots__ = ('approximate', 'precision', 'capacity')
 
-    # --- Overall developer stats ---
-    distinct_users = {r["Username"] for r in rows}
-    devs_per_issue = defaultdict(set)
-    for r in rows:
-        devs_per_issue[r["Issue"]].add(r["Username"])
-    avg_devs_per_issue = sum(len(devs) for devs in devs_per_issue.values()) / len(devs_per_issue)
+    def __init__(self, approximate=False, precision=14, capacity=1000):
+        self.approximate = approximate
+        self.precision = precision
+        self.capacity = capacity
 
-    print("👩‍💻 Developer Info Analysis (All Issues)")
-    print(f"Distinct users: {len(distinct_users)}")
-    print(f"Average developers per issue: {avg_devs_per_issue:.2f}")
-    print()
+    def distinct(self):
+        return distinct_counter(self.approximate, self.precision)
+
+    def frequency(self):
+        return frequency_counter(self.approximate, self.capacity)
 
-    # --- Split by Downstream-driven-fix ---
-    downstream_groups = {"true": [], "false": []}
-    for r in rows:
-        key = r["Downstream-driven-fix"].lower()
-        if key in downstream_groups:
-            downstream_groups[key].append(r)
 
-    for status, group in downstream_groups.items():
-        if not group:
-            continue
+# --- Combined issues ---
 
-        # distinct users for this group
-        users = {r["Username"] for r in group}
+class CombinedIssuesStats:
+    """Issue, PR, project and scenario counts of combined_issues.csv, one row at a time."""
 
-        # developers per issue for this group
-        devs_per_issue_group = defaultdict(set)
-        for r in group:
-            devs_per_issue_group[r["Issue"]].add(r["Username"])
-        avg_devs_per_issue_group = sum(len(devs) for devs in devs_per_issue_group.values()) / len(devs_per_issue_group)
+    def __init__(self, sketches):
+        self.rows = 0
+        self.prs = 0
+        self.downstream = 0
+        self.projects = sketches.distinct()
+        self.ids = sketches.distinct()
+        self.scenario_downstream = sketches.distinct()
+        self.scenario_upstream = sketches.distinct()
 
-        # frequency of each user (how many times they appear)
-        user_counts = Counter(r["Username"] for r in group)
-        avg_appearances_per_user = sum(user_counts.values()) / len(user_counts)
+    def add(self, r):
+        self.rows += 1
+        if r["PR"].lower() == "true":
+            self.prs += 1
+        self.projects.add(r["GitHub-Issue"].split("#")[0])
+        self.ids.add(r["ID"])
+        # Scenario count classified as downstream vs upstream driven
+        if r["Downstream-driven-fix"].lower() == "true":
+            self.downstream += 1
+            self.scenario_downstream.add(r["ID"])
+        else:
+            self.scenario_upstream.add(r["ID"])
+
+    def result(self):
+        return {
+            "total_issues": self.rows,
+            "prs": self.prs,
+            "bug_reports": self.rows - self.prs,
+            "projects": self.projects.count(),
+            "downstream_driven_fix_issues": self.downstream,
+            "upstream_driven_fix_issues": self.rows - self.downstream,
+            "unique_ids": self.ids.count(),
+            "scenarios_downstream": self.scenario_downstream.count(),
+            "scenarios_upstream": self.scenario_upstream.count(),
+        }
+
+
+def print_combined_issues(stats):
+    print("📊 Combined Issues Analysis")
+    print(f"Total issues: {stats['total_issues']}")
+    print(f"PRs: {stats['prs']}")
+    print(f"Bug Reports: {stats['bug_reports']}")
+    print(f"Projects involved: {stats['projects']}")
+    print(f"Downstream-driven-fix Issues: {stats['downstream_driven_fix_issues']}")
+    print(f"Upstream-driven-fix Issues: {stats['upstream_driven_fix_issues']}")
+    print(f"Unique IDs (Scenarios): {stats['unique_ids']}")
+    print(f"Scenarios classified as downstream-driven: {stats['scenarios_downstream']}")
+    print(f"Scenarios classified as upstream-driven: {stats['scenarios_upstream']}")
+    print()
+
+
+@instrumentation.timed()
+def analyze_combined_issues(path, sketches=None):
+    stats = CombinedIssuesStats(sketches or Sketches())
+    _, rows = columnar.stream_records(str(path))
+    for r in rows:
+        stats.add(r)
+    result = stats.result()
+    print_combined_issues(result)
+    return result
+
+
+# --- Developer info ---
+
+class DeveloperStats:
+    """Distinct users, developers per issue and user activity of a set of developer info rows."""
+
+    def __init__(self, sketches, count_users=False):
+        self.rows = 0
+        self.users = sketches.distinct()
+        self.issues = sketches.distinct()
+        # Summed over issues, the distinct developers of each issue are the distinct (issue, user) pairs
+        self.issue_users = sketches.distinct()
+        self.user_counts = sketches.frequency() if count_users else None
+
+    def add(self, r):
+        self.rows += 1
+        self.users.add(r["Username"])
+        self.issues.add(r["Issue"])
+        self.issue_users.add((r["Issue"], r["Username"]))
+        if self.user_counts is not None:
+            self.user_counts.add(r["Username"])
+
+    def result(self, top=5):
+        users, issues = self.users.count(), self.issues.count()
+        result = {
+            "rows": self.rows,
+            "distinct_users": users,
+            "avg_developers_per_issue": self.issue_users.count() / issues if issues else 0.0,
+        }
+        if self.user_counts is not None:
+            result["avg_appearances_per_user"] = self.rows / users if users else 0.0
+            result["top_users"] = [{"username": user, "count": count, "max_overcount": self.user_counts.error(user)}
+                                   for user, count in self.user_counts.most_common(top)]
+        return result
+
+
+class DeveloperInfoStats:
+    """DeveloperStats of all rows and of each Downstream-driven-fix group, in one pass."""
+
+    def __init__(self, sketches):
+        self.overall = DeveloperStats(sketches)
+        self.groups = {status: DeveloperStats(sketches, count_users=True) for status in DOWNSTREAM_GROUPS}
+
+    def add(self, r):
+        self.overall.add(r)
+        group = self.groups.get(r["Downstream-driven-fix"].lower())
+        if group is not None:
+            group.add(r)
+
+    def result(self, top=5):
+        return {
+            "all": self.overall.result(),
+            "downstream_driven_fix": {status: group.result(top) for status, group in self.groups.items()
+                                      if group.rows},
+        }
+
+
+def print_developer_info(stats, top=5):
+    print("👩‍💻 Developer Info Analysis (All Issues)")
+    print(f"Distinct users: {stats['all']['distinct_users']}")
+    print(f"Average developers per issue: {stats['all']['avg_developers_per_issue']:.2f}")
+    print()
 
+    for status, group in stats["downstream_driven_fix"].items():
+        top_users = [(entry["username"], entry["count"]) for entry in group["top_users"]]
         print(f"👥 Developer Info (Downstream-driven-fix = {status.capitalize()})")
-        print(f"Distinct users: {len(users)}")
-        print(f"Average developers per issue: {avg_devs_per_issue_group:.2f}")
-        print(f"Average times each user appears: {avg_appearances_per_user:.2f}")
-        print(f"Top 5 most active users: {user_counts.most_common(5)}")
+        print(f"Distinct users: {group['distinct_users']}")
+        print(f"Average developers per issue: {group['avg_developers_per_issue']:.2f}")
+        print(f"Average times each user appears: {group['avg_appearances_per_user']:.2f}")
+        print(f"Top {top} most active users: {top_users}")
         print()
 
 
-def main():
-    combined_path = Path("../data/combined_issues.csv")
-    devinfo_path = Path("../data/developer_info_cleaned.csv")
-
-    analyze_combined_issues(combined_path)
-    analyze_developer_info(devinfo_path)
+@instrumentation.timed()
+def analyze_developer_info(path, sketches=None, top=5):
+    stats = DeveloperInfoStats(sketches or Sketches())
+    _, rows = columnar.stream_records(str(path))
+    for r in rows:
+        stats.add(r)
+    result = stats.result(top)
+    print_developer_info(result, top)
+    return result
+
+
+def main(combined_path=COMBINED_CSV, devinfo_path=DEVINFO_CSV, output_json=OUTPUT_JSON, sketches=None, top=5):
+    sketches = sketches or Sketches()
+    report = {
+        "approximate": sketches.approximate,
+        "combined_issues": analyze_combined_issues(combined_path, sketches),
+        "developer_info": analyze_developer_info(devinfo_path, sketches, top),
+    }
+    if output_json:
+        with open(output_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Statistics saved to {output_json}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summary statistics of the combined issues and developer info.")
+    parser.add_argument("--combined", type=Path, default=COMBINED_CSV)
+    parser.add_argument("--devinfo", type=Path, default=DEVINFO_CSV)
+    parser.add_argument("--json", type=Path, default=OUTPUT_JSON, help="machine-readable copy of the report")
+    parser.add_argument("--approximate", action="store_true",
+                        help="bounded memory: HyperLogLog distinct counts and space-saving top users")
+    parser.add_argument("--precision", type=int, default=14, help="HyperLogLog precision (2^p registers)")
+    parser.add_argument("--capacity", type=int, default=1000, help="space-saving counters for the top users")
+    parser.add_argument("--top", type=int, default=5, help="most active users to report per group")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    with instrumentation.stage('data_analysis'):
+        main(args.combined, args.devinfo, args.json, Sketches(args.approximate, args.precision, args.capacity),
+             args.top)
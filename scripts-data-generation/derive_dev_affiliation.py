@@ -15,11 +15,21 @@ Workflow:
 Input:  ../data/developer_info.csv (must contain columns for participation types and issue references)
         Sample header: Username,Issue,PR-author,BugReport-author,Commented,Reviewer,Fix-type,Pattern-Structure,Downstream-driven-fix,Scenario
 Output: ../data/dev_affiliations.csv (affiliation scores and categories per developer per project)
-        Sample header: Username,Project,ParticipationScore,TotalScore,AffiliationPct,AffiliationType,DriveBy
+        Sample header: Username,Project,ParticipationScore,TotalScore,AffiliationPct,RowCount,AffiliationType,DriveBy
+
+All steps are column operations: the primary affiliation of every developer is found with one lexicographic sort
+(AffiliationPct, RowCount, ParticipationScore descending, then project name), so the runtime grows with the number
+of rows rather than with a Python call per developer. benchmarks/bench_affiliation.py compares it with the former
+per-developer groupby/apply implementation.
 """
 
+import numpy as np
 import pandas as pd
 
+import columnar
+import identity
+import instrumentation
+
 # Weights for each participation type
 WEIGHTS = {
     "PR-author": 4,
@@ -40,121 +50,121 @@ OUTPUT_CSV = '../data/dev_affiliations_v2.csv'
 # 1. LOAD DATA
 # ---------------------------------------------------------
 
-df = pd.read_csv(INPUT_CSV)
+@instrumentation.timed()
+def load_developer_info(path):
+    # The CSV, or its DATA_FORMAT version (see columnar.py), whose role flags are stored as real booleans
+    df = columnar.read_stage(path)
 
-# Convert boolean-like strings to real booleans
-for col in ["PR-author", "BugReport-author", "Commented", "Reviewer"]:
-    df[col] = df[col].astype(str).str.lower().isin(["true", "1", "yes"])
+    # Convert boolean-like strings to real booleans
+    for col in ["PR-author", "BugReport-author", "Commented", "Reviewer"]:
+        if df[col].dtype != bool:
+            df[col] = df[col].astype(str).str.lower().isin(["true", "1", "yes"])
+    return df
 
 
 # ---------------------------------------------------------
-# 2. EXTRACT PROJECT FROM ISSUE FIELD
-# Issue format: "owner/repo/#1234"
-# We extract "owner/repo" as the project ID
+# 2. COMPUTE PARTICIPATION SCORES PER DEVELOPER PER PROJECT
+# Issue format: "owner/repo#1234"; the project is the lowercased "owner/repo" (see identity.py).
+# Usernames and projects are grouped as their interned integer IDs.
 # ---------------------------------------------------------
 
-def extract_project(issue_str):
-    try:
-        parts = issue_str.split("#")[0]  # "owner/repo/"
-        return parts.strip("/").lower()  # "owner/repo"
-    except:
-        return None
-
-df["Project"] = df["Issue"].apply(extract_project)
+@instrumentation.timed()
+def compute_scores(df):
+    ids = identity.identities()
+    rows = pd.DataFrame({
+        "Username": ids.users.encode(df["Username"]),
+        "Project": identity.project_ids(df["Issue"], ids.projects),
+        # Compute weighted score for each row
+        "ParticipationScore": (
+            df["PR-author"] * WEIGHTS["PR-author"] +
+            df["Reviewer"] * WEIGHTS["Reviewer"] +
+            df["BugReport-author"] * WEIGHTS["BugReport-author"] +
+            df["Commented"] * WEIGHTS["Commented"]
+        ).to_numpy(),
+    })
+    # Rows without a username or issue have no group, as with a groupby on the strings
+    rows = rows[(rows["Username"].to_numpy() >= 0) & (rows["Project"].to_numpy() >= 0)]
+
+    # Aggregate scores and raw row counts per developer per project in one groupby
+    scores = (
+        rows.groupby(["Username", "Project"], sort=False)["ParticipationScore"]
+            .agg(ParticipationScore="sum", RowCount="size")
+            .reset_index()
+    )
+
+    # Total score per developer
+    scores.insert(3, "TotalScore", scores.groupby("Username", sort=False)["ParticipationScore"].transform("sum"))
+
+    # Compute normalised affiliation percentage
+    scores.insert(4, "AffiliationPct", scores["ParticipationScore"] / scores["TotalScore"])
+
+    # Back to names, ordered by (Username, Project) as strings
+    order = np.lexsort((ids.projects.collation()[scores["Project"].to_numpy()],
+                        ids.users.collation()[scores["Username"].to_numpy()]))
+    scores = scores.take(order).reset_index(drop=True)
+    scores["Username"] = ids.users.decode(scores["Username"].to_numpy())
+    scores["Project"] = ids.projects.decode(scores["Project"].to_numpy())
+    return scores
 
 
 # ---------------------------------------------------------
-# 3. COMPUTE PARTICIPATION SCORES PER DEVELOPER PER PROJECT
+# 3. DETERMINE AFFILIATION CATEGORY
 # ---------------------------------------------------------
 
-# Compute weighted score for each row
-df["ParticipationScore"] = (
-    df["PR-author"] * WEIGHTS["PR-author"] +
-    df["Reviewer"] * WEIGHTS["Reviewer"] +
-    df["BugReport-author"] * WEIGHTS["BugReport-author"] +
-    df["Commented"] * WEIGHTS["Commented"]
-)
-
-# Aggregate scores per developer per project
-scores = (
-    df.groupby(["Username", "Project"])["ParticipationScore"]
-      .sum()
-      .reset_index()
-)
-
-# Total score per developer
-total_scores = (
-    scores.groupby("Username")["ParticipationScore"]
-          .sum()
-          .rename("TotalScore")
-)
-scores = scores.merge(total_scores, on="Username")
-
-# Compute normalised affiliation percentage
-scores["AffiliationPct"] = scores["ParticipationScore"] / scores["TotalScore"]
+def primary_mask(scores):
+    """
+    True for exactly one project per developer: highest AffiliationPct, then most raw rows,
+    then highest ParticipationScore, then lexicographically smallest project name.
+    """
+    ranked = scores.sort_values(
+        ["Username", "AffiliationPct", "RowCount", "ParticipationScore", "Project"],
+        ascending=[True, False, False, False, True],
+        kind="stable",
+    )
+    first = ~ranked["Username"].duplicated()
+    return first.reindex(scores.index)
+
+
+@instrumentation.timed()
+def assign_affiliation_types(scores):
+    is_primary = primary_mask(scores).to_numpy()
+    pct = scores["AffiliationPct"].to_numpy()
+    types = np.select(
+        [is_primary, pct >= SECONDARY_THRESHOLD, pct < INCIDENTAL_THRESHOLD],
+        ["primary", "secondary", "incidental"],
+        default="other",
+    )
+    return pd.Series(types, index=scores.index)
+
+
+@instrumentation.timed()
+def derive_affiliations(df):
+    scores = compute_scores(df)
+    scores["AffiliationType"] = assign_affiliation_types(scores)
+
+    # ---------------------------------------------------------
+    # 4. FILTER DRIVE-BY CONTRIBUTORS
+    # Developers with very low total activity
+    # ---------------------------------------------------------
+
+    scores["DriveBy"] = scores["TotalScore"] < 3  # threshold adjustable
+    return scores
 
 
 # ---------------------------------------------------------
-# 4. DETERMINE AFFILIATION CATEGORY
+# 5. SAVE RESULTS
 # ---------------------------------------------------------
 
-def affiliation_label(row, max_pct):
-    if row["AffiliationPct"] == max_pct:
-        return "primary"
-    elif row["AffiliationPct"] >= SECONDARY_THRESHOLD:
-        return "secondary"
-    elif row["AffiliationPct"] < INCIDENTAL_THRESHOLD:
-        return "incidental"
-    else:
-        return "other"
-
-
-# --- Ensure only one primary affiliation per developer with deterministic tie-breaking ---
-# 1. Count number of raw participation rows per user-project
-row_counts = (
-    df.groupby(["Username", "Project"]).size().rename("RowCount").reset_index()
-)
-scores = scores.merge(row_counts, on=["Username", "Project"], how="left")
-
-# 2. For each developer, find all projects with max AffiliationPct
-def assign_affiliation_types(subdf):
-    max_pct = subdf["AffiliationPct"].max()
-    tied = subdf[subdf["AffiliationPct"] == max_pct].copy()
-    # Tie-break 1: most raw rows
-    tied = tied[tied["RowCount"] == tied["RowCount"].max()]
-    # Tie-break 2: highest ParticipationScore
-    tied = tied[tied["ParticipationScore"] == tied["ParticipationScore"].max()]
-    # Tie-break 3: lex smallest project name
-    primary_project = tied.sort_values("Project").iloc[0]["Project"]
-    # Assign types
-    types = []
-    for _, row in subdf.iterrows():
-        if row["Project"] == primary_project:
-            types.append("primary")
-        elif row["AffiliationPct"] >= SECONDARY_THRESHOLD:
-            types.append("secondary")
-        elif row["AffiliationPct"] < INCIDENTAL_THRESHOLD:
-            types.append("incidental")
-        else:
-            types.append("other")
-    return pd.Series(types, index=subdf.index)
-
-scores["AffiliationType"] = scores.groupby("Username", group_keys=False).apply(assign_affiliation_types)
+def main():
+    scores = derive_affiliations(load_developer_info(INPUT_CSV))
+    with instrumentation.timer('write_affiliations'):
+        output_path = columnar.write_stage(scores, OUTPUT_CSV)
+    instrumentation.count('affiliation_rows', len(scores))
 
+    print(f"Affiliation scores computed and saved to {output_path}")
+    print(scores.head(10))
 
-# ---------------------------------------------------------
-# 5. FILTER DRIVE-BY CONTRIBUTORS
-# Developers with very low total activity
-# ---------------------------------------------------------
-
-scores["DriveBy"] = scores["TotalScore"] < 3  # threshold adjustable
-
-
-# ---------------------------------------------------------
-# 6. SAVE RESULTS
-# ---------------------------------------------------------
-
-scores.to_csv(OUTPUT_CSV, index=False)
 
-print(f"Affiliation scores computed and saved to {OUTPUT_CSV}")
-print(scores.head(10))
+if __name__ == "__main__":
+    with instrumentation.stage('derive_dev_affiliation'):
+        main()
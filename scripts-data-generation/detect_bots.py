@@ -14,6 +14,8 @@ Output: ../data/suspicious_bots.csv (flagged suspicious/bot accounts)
 import csv
 import re
 
+import columnar
+
 INPUT_FILE = "../data/developer_info.csv"
 OUTPUT_FILE = "../data/suspicious_bots.csv"
 
@@ -42,15 +44,14 @@ def is_suspicious(username: str) -> bool:
 def main():
     suspicious_rows = []
 
-    # Read input CSV
-    with open(INPUT_FILE, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        header = reader.fieldnames
+    # Read input CSV (or its DATA_FORMAT version, see columnar.py)
+    rows = columnar.read_records(INPUT_FILE)
+    header = list(rows[0]) if rows else []
 
-        for row in reader:
-            username = row["Username"].strip()
-            if is_suspicious(username):
-                suspicious_rows.append(row)
+    for row in rows:
+        username = row["Username"].strip()
+        if is_suspicious(username):
+            suspicious_rows.append(row)
 
     # Write output CSV
     if suspicious_rows:
@@ -4,24 +4,54 @@ Extract GitHub Issues from CPCB Pattern Excel Workbook
 This script extracts and consolidates GitHub issue references from an Excel workbook containing multiple sheets, each categorized by CPCB pattern structures.
 
 For each relevant sheet (those starting with 'PS', except PS8, PS9, PS11), the script:
-    - Reads the sheet into a DataFrame
+    - Reads the sheet into a DataFrame (pandas' openpyxl reader, which streams the sheet in read-only mode)
     - Identifies and skips columns with empty, NaN, or 'Unnamed' headers
-    - Iterates over rows, extracting issue references and associated metadata (fix type, pattern structure, scenario, etc.)
-    - Excludes rows/columns that do not represent actionable issues (e.g., 'PF9' fix type, columns with 'commit' in the value)
+    - Extracts the issue references of every row with their metadata (fix type, pattern structure, scenario, etc.) as
+      one array operation over the sheet's cells, in row-major order
+    - Excludes rows/columns that do not represent actionable issues (e.g., 'PF9' fix type, cells with 'commit' in the value)
+
+Sheets are parsed in parallel worker processes, each opening the workbook and streaming only its own sheet. The
+extracted rows of every sheet are cached in ../data/extract_issues_cache/, keyed by the content of the sheet: its XML
+part in the workbook archive, the shared strings it references and the styles. When the workbook's mtime and SHA-256
+are unchanged nothing is re-read; after an edit only the sheets whose content changed are parsed again.
 
 The result is a deduplicated CSV file (`../data/combined_issues.csv`) containing all extracted issues and their context, suitable for further analysis or enrichment.
+
+Usage:
+    python extract_issues.py [--workbook PATH] [--output PATH] [--workers N] [--no-cache]
 """
 
+import os
+import re
+import json
+import hashlib
+import zipfile
+import argparse
+import posixpath
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+import columnar
+import instrumentation
 
+WORKBOOK = "../data/CPCB_patterns_final.xlsx"
+OUTPUT_CSV = "../data/combined_issues.csv"
+CACHE_DIR = "../data/extract_issues_cache"
+CACHE_INDEX = "index.json"
 
-# Load the Excel file with multiple sheets
-xls = pd.ExcelFile("../data/CPCB_patterns_final.xlsx")
+# 3-project cases with 2 solution types
+SKIPPED_SHEETS = ['PS8', 'PS9', 'PS11']
+FIX_COL = 'Fix-type'
+METADATA_COLUMNS = ['#', FIX_COL, 'Scenario', 'Pattern-Structure']
+NO_FIX = 'PF9'
+DOWNSTREAM_FIXES = ['PF1', 'PF4', 'PF5']
+OUTPUT_COLUMNS = ['GitHub-Issue', 'PR', 'Fix-type', 'Pattern-Structure', 'Downstream-driven-fix', 'Scenario', 'ID']
 
-# Empty list to store results
+HASH_CHUNK = 1 << 20
 
-all_issues = []
 
 def is_valid_header(col):
     """
@@ -34,41 +64,227 @@ def is_valid_header(col):
         return False
     return True
 
-for sheet_name in xls.sheet_names:
-    #IF sheet_name starts with 'PS', process it and is not PS8, PS9, PS11 (3-project cases with 2 solution types)
-    if sheet_name.startswith('PS') and sheet_name not in ['PS8', 'PS9', 'PS11']:
-        df = pd.read_excel(xls, sheet_name=sheet_name)
-        df['Pattern-Structure'] = sheet_name  # Add PS tag
-
-        # Identify the Fix-type column
-        fix_col = 'Fix-type'
-
-        # Loop through each row
-        for _, row in df.iterrows():
-            fix_type = row[fix_col]
-            pattern = row['Pattern-Structure']
-            if fix_type != 'PF9': # Exclude No fix pattern
-                for col in df.columns:
-                    # skip columns with empty/NaN/Unnamed header (usually just annotations)
-                    if col not in ['#', fix_col, 'Scenario', 'Pattern-Structure'] \
-                    and is_valid_header(col) \
-                    and pd.notna(row[col]) \
-                    and 'commit' not in str(row[col]).lower():
-                        all_issues.append({
-                            'GitHub-Issue': row[col],
-                            'PR': 'PR' in col or 'Pull Request' in col,
-                            'Fix-type': fix_type,
-                            'Pattern-Structure': pattern,
-                            'Downstream-driven-fix': fix_type == 'PF1' or fix_type == 'PF4' or fix_type == 'PF5', 
-                            'Scenario': row['Scenario'],
-                            'ID': f"{pattern}-{row['#']}"
-                        })
-
-# Combine into one dataframe
-combined = pd.DataFrame(all_issues)
-
-# Drop duplicates if needed
-combined = combined.drop_duplicates()
-
-# Save result in a csv file
-combined.to_csv("../data/combined_issues.csv", index=False)
\ No newline at end of file
+
+def is_relevant(sheet_name):
+    return sheet_name.startswith('PS') and sheet_name not in SKIPPED_SHEETS
+
+
+# --- Extraction ---
+
+def extract_sheet(df, sheet_name):
+    """
+    Issue rows of one sheet, in the order of a row-by-row, column-by-column scan.
+
+    Cells are taken from the object array of the sheet (the same values iterrows() yields), so issue references,
+    scenarios and '#' numbers keep their types; columns are typed together after all sheets are combined.
+    """
+    df = df.copy()
+    df['Pattern-Structure'] = sheet_name  # Add PS tag
+    columns = list(df.columns)
+    values = df.values
+
+    fix_type = values[:, columns.index(FIX_COL)]
+    rows = np.flatnonzero(fix_type != NO_FIX)  # Exclude No fix pattern
+    # skip columns with empty/NaN/Unnamed header (usually just annotations)
+    cols = [k for k, col in enumerate(columns) if col not in METADATA_COLUMNS and is_valid_header(col)]
+    if not len(rows) or not cols:
+        return pd.DataFrame({name: np.empty(0, dtype=object) for name in OUTPUT_COLUMNS})
+
+    cells = values[np.ix_(rows, cols)]
+    keep = pd.notna(cells)
+    text = pd.Series(cells[keep]).astype(str).str.lower()
+    keep[keep] = ~text.str.contains('commit', regex=False).to_numpy()
+    r, c = np.nonzero(keep)  # row-major, like the scan
+
+    row_values = values[rows]
+    fix_type = row_values[:, columns.index(FIX_COL)]
+    numbers = row_values[:, columns.index('#')]
+    is_pr = np.array([isinstance(columns[k], str) and ('PR' in columns[k] or 'Pull Request' in columns[k])
+                      for k in cols], dtype=object)
+    downstream = np.array([f in DOWNSTREAM_FIXES for f in fix_type], dtype=object)
+    ids = np.array([f"{sheet_name}-{number}" for number in numbers], dtype=object)
+    return pd.DataFrame({
+        'GitHub-Issue': cells[r, c],
+        'PR': is_pr[c],
+        'Fix-type': fix_type[r],
+        'Pattern-Structure': np.full(len(r), sheet_name, dtype=object),
+        'Downstream-driven-fix': downstream[r],
+        'Scenario': row_values[r, columns.index('Scenario')],
+        'ID': ids[r],
+    })
+
+
+def parse_sheet(workbook, sheet_name):
+    return extract_sheet(pd.read_excel(workbook, sheet_name=sheet_name), sheet_name)
+
+
+@instrumentation.timed()
+def combine(sheets):
+    """One table of the sheets' rows, typed as a DataFrame built from the rows would be, without duplicates."""
+    combined = pd.concat(sheets, ignore_index=True) if sheets else pd.DataFrame(columns=OUTPUT_COLUMNS)
+    combined = combined.astype(object).infer_objects()
+    return combined.drop_duplicates()
+
+
+# --- Sheet fingerprints ---
+
+_NS = {'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+       'rel': 'http://schemas.openxmlformats.org/package/2006/relationships'}
+_R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_SHARED_STRING_REF = re.compile(rb'<(?:\w+:)?c\b[^>]*\bt="s"[^>]*>\s*<(?:\w+:)?v>(\d+)</')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _part(archive, name):
+    try:
+        return archive.read(name)
+    except KeyError:
+        return b''
+
+
+@instrumentation.timed()
+def sheet_fingerprints(workbook):
+    """
+    {sheet name: digest of everything its cell values depend on}, in workbook order.
+
+    Shared strings are hashed per referenced entry, so strings added to the workbook by an edit of another sheet
+    leave the fingerprint unchanged.
+    """
+    with zipfile.ZipFile(workbook) as archive:
+        book = ET.fromstring(archive.read('xl/workbook.xml'))
+        rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.findall('rel:Relationship', _NS)}
+        shared = _part(archive, 'xl/sharedStrings.xml')
+        strings = [ET.tostring(si) for si in ET.fromstring(shared).findall('main:si', _NS)] if shared else []
+        styles = hashlib.sha256(_part(archive, 'xl/styles.xml')).digest()
+
+        fingerprints = {}
+        for sheet in book.findall('main:sheets/main:sheet', _NS):
+            target = targets[sheet.get(_R_ID)]
+            part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            xml = archive.read(part)
+            digest = hashlib.sha256(styles)
+            digest.update(xml)
+            for index in sorted({int(i) for i in _SHARED_STRING_REF.findall(xml)}):
+                digest.update(strings[index] if index < len(strings) else b'')
+            fingerprints[sheet.get('name')] = digest.hexdigest()
+    return fingerprints
+
+
+# --- Cache ---
+
+class SheetCache:
+    """Extracted rows per sheet on disk, with the workbook identity and sheet fingerprints they came from."""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, CACHE_INDEX), encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {'workbook': {}, 'sheets': {}}
+
+    def _path(self, sheet_name):
+        return os.path.join(self.directory, hashlib.sha1(sheet_name.encode('utf-8')).hexdigest() + '.pkl')
+
+    def workbook_sha256(self, workbook):
+        """SHA-256 of the workbook, reused from the index while its size and mtime are unchanged."""
+        stat = os.stat(workbook)
+        known = self.index['workbook']
+        if known.get('size') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns:
+            return known['sha256']
+        return file_sha256(workbook)
+
+    def get(self, sheet_name, fingerprint):
+        if self.index['sheets'].get(sheet_name) != fingerprint or not os.path.exists(self._path(sheet_name)):
+            return None
+        return pd.read_pickle(self._path(sheet_name))
+
+    def put(self, sheet_name, fingerprint, df):
+        os.makedirs(self.directory, exist_ok=True)
+        df.to_pickle(self._path(sheet_name))
+        self.index['sheets'][sheet_name] = fingerprint
+
+    def save(self, workbook, sha256, sheet_names):
+        stat = os.stat(workbook)
+        self.index['workbook'] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256,
+                                  'sheets': list(sheet_names)}
+        self.index['sheets'] = {name: self.index['sheets'][name] for name in sheet_names}
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, CACHE_INDEX), 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2)
+
+
+# --- Workbook ---
+
+@instrumentation.timed()
+def parse_sheets(workbook, sheet_names, workers=None):
+    """{sheet name: extracted rows}, sheets parsed in parallel processes."""
+    workers = min(workers or os.cpu_count() or 1, len(sheet_names))
+    if workers <= 1:
+        return {name: parse_sheet(workbook, name) for name in sheet_names}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(sheet_names, pool.map(parse_sheet, [workbook] * len(sheet_names), sheet_names)))
+
+
+def extract_workbook(workbook=WORKBOOK, workers=None, cache_dir=CACHE_DIR):
+    """Combined issue table of the workbook's relevant sheets; cache_dir=None parses every sheet."""
+    if cache_dir is None:
+        sheet_names = [name for name in pd.ExcelFile(workbook).sheet_names if is_relevant(name)]
+        sheets = parse_sheets(workbook, sheet_names, workers)
+        return combine([sheets[name] for name in sheet_names])
+
+    cache = SheetCache(cache_dir)
+    sha256 = cache.workbook_sha256(workbook)
+    known = cache.index['workbook']
+    if known.get('sha256') == sha256:
+        # Unchanged workbook: the fingerprints in the index are current
+        sheet_names = known['sheets']
+        fingerprints = {name: cache.index['sheets'].get(name) for name in sheet_names}
+    else:
+        fingerprints = {name: digest for name, digest in sheet_fingerprints(workbook).items() if is_relevant(name)}
+        sheet_names = list(fingerprints)
+
+    sheets = {name: cache.get(name, fingerprints[name]) for name in sheet_names}
+    stale = [name for name in sheet_names if sheets[name] is None]
+    if stale and known.get('sha256') == sha256:
+        # Cached rows went missing: fingerprint the workbook again before parsing
+        fingerprints = {name: digest for name, digest in sheet_fingerprints(workbook).items() if is_relevant(name)}
+    if stale:
+        print(f"Parsing {len(stale)} of {len(sheet_names)} sheets: {', '.join(stale)}")
+        for name, df in parse_sheets(workbook, stale, workers).items():
+            sheets[name] = df
+            cache.put(name, fingerprints[name], df)
+    else:
+        print(f"All {len(sheet_names)} sheets unchanged, using cached rows")
+    cache.save(workbook, sha256, sheet_names)
+    return combine([sheets[name] for name in sheet_names])
+
+
+def main(workbook=WORKBOOK, output_csv=OUTPUT_CSV, workers=None, cache_dir=CACHE_DIR):
+    combined = extract_workbook(workbook, workers, cache_dir)
+    # Save result in a csv file (or in the DATA_FORMAT storage format, see columnar.py)
+    path = columnar.write_stage(combined, output_csv)
+    print(f"✅ {len(combined)} issues saved to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract the GitHub issues of the CPCB pattern workbook.")
+    parser.add_argument("--workbook", default=WORKBOOK)
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--workers", type=int, default=None, help="sheet parsing processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="parse every sheet, ignoring and keeping the cache")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('extract_issues'):
+        main(args.workbook, args.output, args.workers, None if args.no_cache else CACHE_DIR)
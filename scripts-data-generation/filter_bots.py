@@ -0,0 +1,185 @@
+"""
+filter_bots.py
+
+Single streaming stage replacing detect_bots.py followed by remove_devs_from_list.py.
+
+Reads ../data/developer_info.csv once, row by row. The verdict for a username is computed the first time it is seen,
+by running the detectors in order until one flags it, and memoized for every later row of that user. Rows of
+unflagged users go to ../data/developer_info_cleaned.csv; rows of flagged users go to the audit file
+../data/suspicious_bots.csv, with the name of the detector that flagged them in an extra Detector column. Both files
+are written during the same pass.
+
+Detectors (choose with --detectors, in order of precedence):
+    known:        usernames in detect_bots.KNOWN_BOTS
+    app-suffix:   GitHub App accounts, whose login ends in "[bot]"
+    account-type: accounts whose type is "Bot" in the mined GitHub payloads: a UserType column in the input, or the
+                  username,type CSV mine_dev_info.py writes (../data/account_types.csv, or --user-types)
+    name-regex:   usernames matching detect_bots.BOT_REGEX ("bot", any casing)
+Further detectors subclass Detector and implement flags().
+
+The cleaned file is identical to the one produced by the two-step detect_bots.py / remove_devs_from_list.py run,
+which remains available when the list of suspicious accounts is to be reviewed by hand before removal.
+
+Usage:
+    python filter_bots.py [--input PATH] [--output PATH] [--audit PATH]
+                          [--detectors known app-suffix account-type name-regex] [--user-types PATH]
+"""
+
+import os
+import csv
+import argparse
+from abc import ABC, abstractmethod
+
+import columnar
+import instrumentation
+from detect_bots import KNOWN_BOTS, BOT_REGEX
+from identity import ACCOUNT_TYPES_CSV
+
+INPUT_CSV = "../data/developer_info.csv"
+OUTPUT_CSV = "../data/developer_info_cleaned.csv"
+AUDIT_CSV = "../data/suspicious_bots.csv"
+USER_TYPES_CSV = ACCOUNT_TYPES_CSV
+
+
+# --- Detectors ---
+
+class Detector(ABC):
+    """Decides whether an account is a bot, from its username and the first row it appears in."""
+
+    name = "detector"
+
+    @abstractmethod
+    def flags(self, username, row):
+        """Whether the account is a bot."""
+
+
+class KnownBotsDetector(Detector):
+    name = "known"
+
+    def __init__(self, usernames=KNOWN_BOTS):
+        self.usernames = set(usernames)
+
+    def flags(self, username, row):
+        return username in self.usernames
+
+
+class AppSuffixDetector(Detector):
+    name = "app-suffix"
+
+    def flags(self, username, row):
+        return username.endswith("[bot]")
+
+
+class AccountTypeDetector(Detector):
+    name = "account-type"
+
+    def __init__(self, user_types=None):
+        self.user_types = user_types or {}
+
+    def flags(self, username, row):
+        return (row.get("UserType") or self.user_types.get(username, "")).strip().lower() == "bot"
+
+
+class NameRegexDetector(Detector):
+    name = "name-regex"
+
+    def __init__(self, regex=BOT_REGEX):
+        self.regex = regex
+
+    def flags(self, username, row):
+        return self.regex.search(username) is not None
+
+
+DETECTORS = {cls.name: cls for cls in (KnownBotsDetector, AppSuffixDetector, AccountTypeDetector, NameRegexDetector)}
+DEFAULT_DETECTORS = ("known", "app-suffix", "account-type", "name-regex")
+
+
+def read_user_types(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["username"].strip(): row["type"] for row in csv.DictReader(f)}
+
+
+# --- The filter ---
+
+class BotFilter:
+    """Memoized verdicts: each distinct username goes through the detectors once."""
+
+    def __init__(self, detectors):
+        self.detectors = list(detectors)
+        self.verdicts = {}  # username -> name of the flagging detector, or None
+        self.rows = 0
+        self.removed = 0
+
+    def verdict(self, row):
+        username = row["Username"].strip()
+        try:
+            return self.verdicts[username]
+        except KeyError:
+            pass
+        verdict = next((d.name for d in self.detectors if d.flags(username, row)), None)
+        self.verdicts[username] = verdict
+        return verdict
+
+    def filter(self, rows, audit_writer):
+        """Yield the rows of unflagged users; write the others to the audit as they stream past."""
+        for row in rows:
+            self.rows += 1
+            detector = self.verdict(row)
+            if detector is None:
+                yield row
+            else:
+                self.removed += 1
+                audit_writer.writerow({**row, "Detector": detector})
+
+    def flagged(self):
+        return {username: name for username, name in self.verdicts.items() if name}
+
+
+def main(input_csv=INPUT_CSV, output_csv=OUTPUT_CSV, audit_csv=AUDIT_CSV, detector_names=DEFAULT_DETECTORS,
+         user_types_csv=USER_TYPES_CSV):
+    user_types = None
+    if "account-type" in detector_names and user_types_csv:
+        if os.path.exists(user_types_csv):
+            user_types = read_user_types(user_types_csv)
+        else:
+            print(f"⚠️ {user_types_csv} not found: account types only come from a UserType column")
+    detectors = [DETECTORS[name](user_types) if name == "account-type" else DETECTORS[name]()
+                 for name in detector_names]
+    bot_filter = BotFilter(detectors)
+
+    # One pass: kept rows stream into the cleaned table, flagged rows into the audit
+    fieldnames, rows = columnar.stream_records(input_csv)
+    with open(audit_csv, "w", newline="", encoding="utf-8") as f:
+        audit_writer = csv.DictWriter(f, fieldnames=fieldnames + ["Detector"])
+        audit_writer.writeheader()
+        output_path = columnar.write_records(bot_filter.filter(rows, audit_writer), fieldnames, output_csv)
+
+    flagged = bot_filter.flagged()
+    instrumentation.count('rows_checked', bot_filter.rows)
+    for name in flagged.values():
+        instrumentation.count('accounts_flagged', detector=name)
+    instrumentation.count('rows_removed', bot_filter.removed)
+    print(f"Checked {len(bot_filter.verdicts)} distinct accounts in {bot_filter.rows} rows.")
+    for detector in detectors:
+        accounts = sorted(u for u, name in flagged.items() if name == detector.name)
+        if accounts:
+            print(f"  {detector.name}: {len(accounts)} ({', '.join(accounts)})")
+    print(f"Removed {bot_filter.removed} rows of {len(flagged)} suspicious accounts (audit: {audit_csv}). "
+          f"Kept {bot_filter.rows - bot_filter.removed} rows. Cleaned file written to {output_path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Remove bot accounts from developer info in one streaming pass.")
+    parser.add_argument("--input", default=INPUT_CSV)
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--audit", default=AUDIT_CSV, help="rows of flagged accounts, with the flagging detector")
+    parser.add_argument("--detectors", nargs="+", choices=list(DETECTORS), default=list(DEFAULT_DETECTORS))
+    parser.add_argument("--user-types", default=USER_TYPES_CSV,
+                        help="CSV of username,type from the mined GitHub payloads (written by mine_dev_info.py)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with instrumentation.stage('filter_bots'):
+        main(args.input, args.output, args.audit, args.detectors, args.user_types)
@@ -0,0 +1,394 @@
+"""
+github_api.py
+
+Shared GitHub API access for the mining scripts (mine_dev_info.py, bot_comment_parser.py).
+
+Every request goes through a single RateLimitScheduler, which:
+    - rotates across all configured personal access tokens, preferring the one with the most budget left,
+    - reads X-RateLimit-Limit / X-RateLimit-Remaining / X-RateLimit-Reset from every response,
+    - paces requests once a token's budget runs low, so the remaining requests are spread until the reset
+      instead of hitting the wall,
+    - honours secondary-limit Retry-After headers, and retries rate-limited requests on another token (or after
+      the reset) instead of dropping them; GraphQL rate-limit refusals (HTTP 200 with a RATE_LIMITED error) count
+      as rate-limited too.
+
+List endpoints are read with paginate(), which asks for the maximum page size, follows the Link header and, as soon
+as the last page number is known, fetches the remaining pages concurrently while yielding items in order.
+
+Responses are cached on disk (see response_cache.py): fresh entries are served without a request, stale ones are
+revalidated with ETag / Last-Modified (304 answers are free), and offline mode serves from the cache only. The cache
+is configured with GITHUB_CACHE (path, empty to disable), GITHUB_CACHE_TTL (seconds), GITHUB_CACHE_MAX_MB and
+GITHUB_OFFLINE, or with configure_cache().
+
+Tokens are read from the .env file: PAC may hold one token or a comma-separated list, and PAC_2, PAC_3, ...
+add further tokens. Without any token the scheduler still paces unauthenticated requests.
+
+Set GITHUB_API_URL to point the scripts at another API root (e.g. the local mock in mock_github_server.py).
+
+Request latencies, status codes, retries, cache hits and rate-limit waits, and every token's remaining budget are
+recorded in the instrumentation.py registry (github_* metrics), so they appear in the run report of the calling script.
+"""
+
+import os
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qs, urlencode
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+from response_cache import ResponseCache, build_response
+
+load_dotenv()  # Loads variables from .env into environment
+
+API_ROOT = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+# Start pacing once a token has less than this fraction of its hourly budget left
+PACE_THRESHOLD = 0.10
+# Attempts per request before giving up on rate-limit responses
+MAX_RETRIES = 5
+# Seconds a token rests after a rate-limit answer that says nothing about when to retry
+RATE_LIMIT_BACKOFF = 60
+# Seconds before retrying a GraphQL server error, doubled on every attempt
+SERVER_ERROR_BACKOFF = 2
+# Largest page size accepted by the REST API
+PER_PAGE = 100
+# Concurrent page requests once the last page of a list is known
+PREFETCH_WORKERS = 4
+
+# Response cache settings
+CACHE_PATH = os.getenv('GITHUB_CACHE', '../data/github_cache.sqlite')
+CACHE_TTL = int(os.getenv('GITHUB_CACHE_TTL', 24 * 3600))
+CACHE_MAX_MB = int(os.getenv('GITHUB_CACHE_MAX_MB', 512))
+OFFLINE = os.getenv('GITHUB_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+def load_tokens():
+    """Return the list of personal access tokens configured in the environment (PAC, PAC_2, PAC_3, ...)."""
+    tokens = [t.strip() for t in (os.getenv('PAC') or '').split(',') if t.strip()]
+    n = 2
+    while os.getenv(f'PAC_{n}'):
+        tokens.append(os.getenv(f'PAC_{n}').strip())
+        n += 1
+    return tokens or [None]
+
+
+def token_scope(tokens):
+    """
+    Cache scope of a set of tokens: "authenticated" or "anonymous". Requests rotate across the tokens and every
+    token sees the same public repositories, so one fixed scope keeps the cached entries and their ETags when a
+    token is added or rotated; the tokens themselves never reach the disk.
+    """
+    return 'authenticated' if any(tokens) else 'anonymous'
+
+
+def make_session(pool_size=8):
+    """Create a Session with a keep-alive connection pool sized for pool_size concurrent workers."""
+    session = requests.Session()
+    session.headers.update({'Accept': 'application/vnd.github+json'})
+    # Workers may have a couple of requests in flight each (e.g. comments and reviews of one issue),
+    # plus prefetched pages; connections are only opened when needed
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size * (2 + PREFETCH_WORKERS))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _int_header(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenState:
+    """Budget bookkeeping for one token."""
+
+    __slots__ = ('token', 'limit', 'remaining', 'reset', 'blocked_until', 'next_slot')
+
+    def __init__(self, token):
+        self.token = token
+        self.limit = None          # hourly budget, unknown until the first response
+        self.remaining = None      # requests left in the current window
+        self.reset = None          # epoch seconds at which the window resets
+        self.blocked_until = 0.0   # set by Retry-After / exhausted budget
+        self.next_slot = 0.0       # earliest time of the next paced request
+
+    @property
+    def auth_headers(self):
+        return {'Authorization': f'token {self.token}'} if self.token else {}
+
+    def headroom(self):
+        return float('inf') if self.remaining is None else self.remaining
+
+
+class RateLimitScheduler:
+    """Thread-safe request scheduler shared by all workers of a run."""
+
+    def __init__(self, tokens, pace_threshold=PACE_THRESHOLD, clock=time.time, sleep=time.sleep, api='rest'):
+        self.states = [TokenState(t) for t in tokens]
+        self.api = api  # label of this scheduler's metrics
+        self.pace_threshold = pace_threshold
+        self.clock = clock
+        self.sleep = sleep
+        self._cond = threading.Condition()
+
+    def _refresh(self, now):
+        for st in self.states:
+            if st.reset is not None and now >= st.reset:
+                st.remaining = st.limit
+                st.reset = None
+            elif st.reset is None and st.remaining == 0:
+                st.remaining = None  # no reset time known: probe again
+
+    def acquire(self):
+        """Block until a request may be sent; return the TokenState to send it with."""
+        with self._cond:
+            while True:
+                now = self.clock()
+                self._refresh(now)
+                ready = [st for st in self.states if st.blocked_until <= now and st.headroom() > 0]
+                if ready:
+                    st = max(ready, key=TokenState.headroom)
+                    wait = self._pace(st, now)
+                    if st.remaining is not None:
+                        st.remaining -= 1  # account for the request before its response arrives
+                    break
+                # Every token is blocked or exhausted: sleep until the first one frees up
+                wake = min(max(st.blocked_until, st.reset or 0) for st in self.states)
+                print(f"⏳ All tokens rate limited, waiting {max(0, wake - now):.0f} seconds...")
+                self._cond.wait(timeout=max(0.05, wake - now))
+                instrumentation.count('github_ratelimit_wait_seconds', self.clock() - now, api=self.api, reason='blocked')
+        if wait > 0:
+            instrumentation.count('github_ratelimit_wait_seconds', wait, api=self.api, reason='paced')
+            self.sleep(wait)
+        return st
+
+    def _pace(self, st, now):
+        """Return how long to wait before using st, spreading a low budget evenly until the reset."""
+        if st.limit is None or st.remaining is None or st.reset is None:
+            return 0.0
+        if st.remaining > st.limit * self.pace_threshold:
+            return 0.0
+        interval = max(0.0, st.reset - now) / max(st.remaining, 1)
+        slot = max(now, st.next_slot)
+        st.next_slot = slot + interval
+        return slot - now
+
+    def update(self, st, response, limited=False):
+        """
+        Record the rate-limit headers of a response; return True if the request should be retried.
+        `limited` marks a rate-limit answer that does not say so in its status (GraphQL's RATE_LIMITED).
+        """
+        headers = response.headers
+        limit = _int_header(headers, 'X-RateLimit-Limit')
+        remaining = _int_header(headers, 'X-RateLimit-Remaining')
+        reset = _int_header(headers, 'X-RateLimit-Reset')
+        retry_after = _int_header(headers, 'Retry-After')
+
+        with self._cond:
+            now = self.clock()
+            if response.status_code == 304 and st.remaining is not None:
+                st.remaining += 1  # conditional hits are not charged
+            if limit is not None:
+                st.limit = limit
+            if remaining is not None:
+                if reset is not None and reset != st.reset:
+                    st.reset, st.remaining = reset, remaining   # new window
+                elif st.remaining is None:
+                    st.remaining = remaining
+                else:
+                    # responses of concurrent requests arrive out of order: keep the lowest count
+                    st.remaining = min(st.remaining, remaining)
+            self._record_budget(st)
+
+            retry = False
+            if response.status_code in (403, 429) or limited:
+                if retry_after is not None:
+                    # Secondary rate limit
+                    st.blocked_until = now + retry_after
+                    retry = True
+                elif remaining == 0:
+                    # Primary rate limit exhausted for this token
+                    st.blocked_until = (reset if reset is not None else now + 60) + 1
+                    retry = True
+                elif limited:
+                    st.blocked_until = now + RATE_LIMIT_BACKOFF
+                    retry = True
+            self._cond.notify_all()
+        return retry
+
+    def _record_budget(self, st):
+        """Rate-limit gauges of a token (tokens are labelled by position, never by value)."""
+        token = self.states.index(st) + 1
+        for name, value in (('limit', st.limit), ('remaining', st.remaining), ('reset_timestamp', st.reset)):
+            if value is not None:
+                instrumentation.gauge(f'github_ratelimit_{name}', value, api=self.api, token=token)
+
+    def request(self, session, url, max_retries=MAX_RETRIES, headers=None, method='GET', rate_limited=None,
+                **kwargs):
+        """
+        Send a request through the scheduler, retrying rate-limited responses on the next available token;
+        rate_limited(response) recognizes rate-limit answers that have a success status.
+        """
+        for attempt in range(max_retries):
+            st = self.acquire()
+            start = time.perf_counter()
+            response = session.request(method, url, headers={**(headers or {}), **st.auth_headers}, **kwargs)
+            instrumentation.observe('github_request_seconds', time.perf_counter() - start, api=self.api)
+            instrumentation.count('github_requests', api=self.api, method=method, status=response.status_code)
+            instrumentation.count('github_response_bytes', len(response.content), api=self.api)
+            if not self.update(st, response, bool(rate_limited and rate_limited(response))):
+                return response
+            instrumentation.count('github_retries', api=self.api, status=response.status_code)
+            print(f"Rate limited on {url}, rescheduling (attempt {attempt + 1}/{max_retries})...")
+        return response
+
+
+TOKENS = load_tokens()
+SCHEDULER = RateLimitScheduler(TOKENS)
+# GraphQL has its own point budget, tracked separately from the REST one
+GRAPHQL_SCHEDULER = RateLimitScheduler(TOKENS, api='graphql')
+SCOPE = token_scope(TOKENS)
+
+CACHE = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def configure_cache(path=CACHE_PATH, ttl=CACHE_TTL, max_mb=CACHE_MAX_MB, offline=OFFLINE):
+    """(Re)configure the shared response cache; an empty path disables caching."""
+    global CACHE, _cache_configured
+    with _cache_lock:
+        if CACHE is not None:
+            CACHE.close()
+        CACHE = ResponseCache(path, ttl, max_mb * 1024 * 1024, offline) if path else None
+        _cache_configured = True
+    return CACHE
+
+
+def _cache():
+    if not _cache_configured:
+        configure_cache()
+    return CACHE
+
+
+def get(url, session, params=None, **kwargs):
+    """GET url with the shared scheduler, going through the response cache when it is enabled."""
+    cache = _cache()
+    if cache is None:
+        return SCHEDULER.request(session, url, params=params, **kwargs)
+
+    full_url = requests.Request('GET', url, params=params).prepare().url
+    entry = cache.lookup(SCOPE, full_url)
+    if entry is not None and (cache.offline or cache.is_fresh(entry)):
+        cache.count('hits')
+        instrumentation.count('github_cache', result='hit')
+        return build_response(full_url, entry.status, entry.headers, entry.body)
+    if cache.offline:
+        cache.count('misses')
+        instrumentation.count('github_cache', result='offline_miss')
+        return build_response(full_url, 504, {}, b'{"message": "Not in cache (offline mode)"}')
+
+    response = SCHEDULER.request(session, full_url, headers=entry.validators() if entry else None, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        cache.touch(SCOPE, full_url)
+        cache.count('revalidated')
+        instrumentation.count('github_cache', result='revalidated')
+        return build_response(full_url, entry.status, entry.headers, entry.body)
+    cache.count('misses')
+    instrumentation.count('github_cache', result='miss')
+    cache.store(SCOPE, full_url, response)
+    return response
+
+
+def graphql_rate_limited(response):
+    """Whether a GraphQL response is a rate-limit refusal, which GitHub sends as HTTP 200 with a RATE_LIMITED error."""
+    if response.status_code != 200:
+        return False
+    try:
+        errors = response.json().get('errors') or []
+    except ValueError:
+        return False
+    return any(error.get('type') == 'RATE_LIMITED' for error in errors)
+
+
+def graphql(query, session, variables=None, max_retries=MAX_RETRIES):
+    """
+    POST a GraphQL query (never cached); returns the raw response. Rate-limit refusals are waited out on
+    GRAPHQL_SCHEDULER and server errors retried with a growing delay; the last response is returned if they persist.
+    """
+    payload = {'query': query, 'variables': variables or {}}
+    for attempt in range(max_retries):
+        response = GRAPHQL_SCHEDULER.request(session, f"{API_ROOT}/graphql", method='POST', json=payload,
+                                             rate_limited=graphql_rate_limited)
+        if response.status_code < 500:
+            return response
+        wait = SERVER_ERROR_BACKOFF * 2 ** attempt
+        instrumentation.count('github_retries', api='graphql', status=response.status_code)
+        print(f"⚠️ GraphQL server error {response.status_code}, retrying in {wait} seconds "
+              f"(attempt {attempt + 1}/{max_retries})...")
+        GRAPHQL_SCHEDULER.sleep(wait)
+    return response
+
+
+def cache_summary():
+    """One-line report of the cache activity of this run."""
+    cache = CACHE
+    if cache is None:
+        return "Response cache disabled"
+    return (f"Response cache: {cache.hits} fresh hits, {cache.revalidated} revalidated (304), "
+            f"{cache.misses} fetched{' [offline]' if cache.offline else ''}")
+
+
+# --- Pagination ---
+
+def _page_url(url, page):
+    """Return url with its page query parameter set to page."""
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    query['page'] = [str(page)]
+    return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def _page_number(url):
+    return int(parse_qs(urlsplit(url).query).get('page', ['1'])[0])
+
+
+def _page_items(response):
+    response.raise_for_status()
+    return response.json()
+
+
+def paginate(url, session, params=None):
+    """
+    Yield every item of a paginated list endpoint, in order.
+
+    Pages are requested with per_page=100. When the first response announces the last page
+    (Link: rel="last"), the remaining pages are fetched concurrently; otherwise rel="next" links are
+    followed one by one. Raises requests.HTTPError if any page fails.
+    """
+    params = dict(params or {}, per_page=PER_PAGE)
+    response = get(url, session, params=params)
+    yield from _page_items(response)
+
+    last = response.links.get('last')
+    if last:
+        first = _page_number(response.url)
+        urls = [_page_url(last['url'], page) for page in range(first + 1, _page_number(last['url']) + 1)]
+        if len(urls) == 1:
+            yield from _page_items(get(urls[0], session))
+            return
+        with ThreadPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(urls))) as pool:
+            # map() submits every page up front and hands the responses back in page order
+            for page_response in pool.map(lambda u: get(u, session), urls):
+                yield from _page_items(page_response)
+        return
+
+    next_link = response.links.get('next')
+    while next_link:
+        response = get(next_link['url'], session)
+        yield from _page_items(response)
+        next_link = response.links.get('next')
@@ -0,0 +1,271 @@
+"""
+graphql_miner.py
+
+GraphQL backend for mine_dev_info.py (python mine_dev_info.py --backend graphql).
+
+Instead of 2-3 REST calls per issue, the issues are packed into aliased GraphQL queries. Each alias asks for one
+issue or pull request, with its author and creation time, the authors and creation times of its comments and (for
+pull requests) the authors and submission times of its reviews, the times the REST backend records:
+
+    i0: repository(owner: "joblib", name: "joblib") { issueOrPullRequest(number: 105) { __typename ... } }
+
+Comment and review lists longer than one page are continued with cursor pagination (after: endCursor); the
+continuations are batched into aliased queries too. The result maps into the same dev_roles structure as
+mine_dev_info.process_issue, in the same order (author, commenters, reviewers), so developer_info.csv keeps its schema
+and contents.
+
+The BatchSizer keeps every query inside GitHub's GraphQL limits: the estimated point cost (one request per 100-item
+connection, divided by 100) stays within QUERY_POINT_BUDGET and the node count below NODE_LIMIT. Batches that the API
+still rejects (node limit, timeouts) are split in half and retried. Rate-limit refusals and server errors are waited
+out and retried by github_api.graphql instead; issues whose query still gets no answer are reported as failed (None
+instead of their participation), so a journaled run does not record them and mines them again next time.
+"""
+
+import json
+import math
+
+import github_api
+from identity import DevRoles, account_types, parse_issue_ref, PR_AUTHOR, BUG_REPORT_AUTHOR, COMMENTED, REVIEWER
+
+# Items per connection page (GraphQL maximum)
+PAGE_SIZE = 100
+# Largest estimated point cost allowed for one query
+QUERY_POINT_BUDGET = 1
+# GitHub rejects queries that could return more nodes than this
+NODE_LIMIT = 500_000
+# Upper bound on aliases per query, to keep responses and server time reasonable
+MAX_ALIASES = 100
+
+# __typename: GraphQL gives app accounts their bare login ("dependabot"), REST suffixes it ("dependabot[bot]")
+ACTOR_FIELDS = "author { __typename login }"
+# Time of each participation, as REST reports it: a comment's creation, a review's submission
+TIME_FIELDS = {"comments": "createdAt", "reviews": "submittedAt"}
+
+
+# --- Query building ---
+
+def _connection(field, cursor=None):
+    after = f", after: {json.dumps(cursor)}" if cursor else ""
+    page_fields = f"pageInfo {{ hasNextPage endCursor }} nodes {{ {ACTOR_FIELDS} {TIME_FIELDS[field]} }}"
+    return f"{field}(first: {PAGE_SIZE}{after}) {{ {page_fields} }}"
+
+
+def _login(actor):
+    """
+    The REST login of a GraphQL author: Bot (GitHub App) logins get the "[bot]" suffix REST shows. The account type
+    (__typename, named like REST's user.type) is recorded in identity.account_types.
+    """
+    if not actor or not actor.get('login'):
+        return None
+    login = f"{actor['login']}[bot]" if actor.get('__typename') == 'Bot' else actor['login']
+    account_types().note(login, actor.get('__typename'))
+    return login
+
+
+def _alias_block(alias, owner, repo, number, body):
+    return (f"{alias}: repository(owner: {json.dumps(owner)}, name: {json.dumps(repo)}) "
+            f"{{ issueOrPullRequest(number: {number}) {{ __typename {body} }} }}")
+
+
+class IssueTask:
+    """One issue being mined, and the participation collected for it so far."""
+
+    __slots__ = ('ref', 'owner', 'repo', 'number', 'is_pr', 'found', 'failed', 'typename', 'author', 'created_at',
+                 'commenters', 'reviewers', 'cursors')
+
+    def __init__(self, ref, is_pr):
+        self.ref = ref
+        self.owner, self.repo, number = parse_issue_ref(ref)
+        self.number = int(number) if number and number.isdigit() else None
+        self.is_pr = is_pr
+        self.found = False
+        self.failed = False  # a query for it got no answer: its participation is incomplete
+        self.typename = None
+        self.author = None
+        self.created_at = None
+        self.commenters = []  # (login, time)
+        self.reviewers = []
+        self.cursors = {}  # field -> endCursor of a connection with more pages
+
+    @property
+    def valid(self):
+        return self.owner is not None and self.number is not None
+
+    def connection_count(self):
+        return 2 if self.is_pr else 1
+
+    def first_query(self, alias):
+        """Alias block fetching the author and the first page of every connection."""
+        fields = [f"{ACTOR_FIELDS} createdAt", _connection("comments")]
+        pr_fields = fields + ([_connection("reviews")] if self.is_pr else [])
+        body = f"... on Issue {{ {' '.join(fields)} }} ... on PullRequest {{ {' '.join(pr_fields)} }}"
+        return _alias_block(alias, self.owner, self.repo, self.number, body)
+
+    def continuation_query(self, alias, field):
+        """Alias block fetching the next page of one connection."""
+        body = f"... on {self.typename} {{ {_connection(field, self.cursors[field])} }}"
+        return _alias_block(alias, self.owner, self.repo, self.number, body)
+
+    def add_page(self, field, connection):
+        logins = [(_login(n['author']), n.get(TIME_FIELDS[field]))
+                  for n in connection.get('nodes') or [] if n and _login(n.get('author'))]
+        (self.commenters if field == 'comments' else self.reviewers).extend(logins)
+        page_info = connection.get('pageInfo') or {}
+        if page_info.get('hasNextPage'):
+            self.cursors[field] = page_info['endCursor']
+        else:
+            self.cursors.pop(field, None)
+
+    def fail(self):
+        self.failed = True
+        self.cursors.clear()
+
+    def dev_roles(self):
+        """Participation in the same structure and order as mine_dev_info.process_issue."""
+        dev_roles = DevRoles()
+        if not self.found:
+            return dev_roles
+        if self.author:
+            dev_roles.add(self.author, PR_AUTHOR if self.is_pr else BUG_REPORT_AUTHOR, self.created_at)
+        for username, created_at in self.commenters:
+            dev_roles.add(username, COMMENTED, created_at)
+        for username, created_at in self.reviewers:
+            dev_roles.add(username, REVIEWER, created_at)
+        return dev_roles
+
+
+# --- Batching ---
+
+class BatchSizer:
+    """Pack work items (each with a number of 100-item connections) into queries that respect the API limits."""
+
+    def __init__(self, point_budget=QUERY_POINT_BUDGET, node_limit=NODE_LIMIT, max_aliases=MAX_ALIASES):
+        self.point_budget = point_budget
+        self.node_limit = node_limit
+        self.max_aliases = max_aliases
+
+    @staticmethod
+    def estimated_cost(connections):
+        """GitHub's point estimate: one request per connection page, divided by 100, at least 1."""
+        return max(1, math.ceil(connections / 100))
+
+    def fits(self, aliases, connections):
+        return (aliases <= self.max_aliases
+                and self.estimated_cost(connections) <= self.point_budget
+                and connections * PAGE_SIZE <= self.node_limit)
+
+    def batches(self, items, connections_of):
+        batch, connections = [], 0
+        for item in items:
+            n = connections_of(item)
+            if batch and not self.fits(len(batch) + 1, connections + n):
+                yield batch
+                batch, connections = [], 0
+            batch.append(item)
+            connections += n
+        if batch:
+            yield batch
+
+
+# --- Execution ---
+
+def run_query(blocks, session):
+    """
+    Send one aliased query; return (data, errors, False), or (None, message, rejected) if the whole query failed,
+    where rejected says the API refused the query itself (too large, timed out) rather than left it unanswered.
+    """
+    query = "query { rateLimit { cost remaining } " + " ".join(blocks) + " }"
+    response = github_api.graphql(query, session)
+    if github_api.graphql_rate_limited(response):
+        return None, "still rate limited after retries", False
+    if response.status_code in (403, 429):
+        return None, f"HTTP {response.status_code}", False
+    if response.status_code != 200:
+        return None, f"HTTP {response.status_code}", True
+    payload = response.json()
+    if payload.get('data') is None:
+        return None, "; ".join(e.get('message', '?') for e in payload.get('errors', [])) or "no data", True
+    return payload['data'], payload.get('errors', []), False
+
+
+def run_batch(items, build_block, handle, fail, session):
+    """
+    Query a batch of items, splitting it in half whenever the API rejects the whole query; items whose query is
+    not answered are passed to fail().
+    """
+    blocks = [build_block(f"i{k}", item) for k, item in enumerate(items)]
+    data, errors, rejected = run_query(blocks, session)
+    if data is None:
+        if rejected and len(items) > 1:
+            print(f"⚠️ GraphQL batch of {len(items)} rejected ({errors}), splitting...")
+            middle = len(items) // 2
+            return (run_batch(items[:middle], build_block, handle, fail, session)
+                    + run_batch(items[middle:], build_block, handle, fail, session))
+        print(f"⚠️ GraphQL query for {len(items)} issue(s) failed ({errors}), leaving them for a later run")
+        for item in items:
+            fail(item)
+        return 0
+    for k, item in enumerate(items):
+        handle(item, data.get(f"i{k}"))
+    return (data.get('rateLimit') or {}).get('cost', 0)
+
+
+def _handle_first(task, node):
+    issue = (node or {}).get('issueOrPullRequest')
+    if issue is None:
+        print(f"⚠️ Not found: {task.ref}")
+        return
+    task.found = True
+    task.typename = issue['__typename']
+    task.author = _login(issue.get('author'))
+    task.created_at = issue.get('createdAt')
+    task.add_page('comments', issue.get('comments') or {})
+    if task.is_pr and issue.get('reviews') is not None:
+        task.add_page('reviews', issue['reviews'])
+
+
+def _handle_continuation(item, node):
+    task, field = item
+    issue = (node or {}).get('issueOrPullRequest')
+    if issue is None or issue.get(field) is None:
+        task.cursors.pop(field, None)  # cannot continue; keep what was collected
+        return
+    task.add_page(field, issue[field])
+
+
+def mine_issues(refs, session, sizer=None):
+    """Mine {(ref, is_pr): IssueTask} for the given (ref, is_pr) pairs."""
+    sizer = sizer or BatchSizer()
+    tasks = {key: IssueTask(*key) for key in dict.fromkeys(refs)}
+    valid = [t for t in tasks.values() if t.valid]
+    points = batches = 0
+
+    for batch in sizer.batches(valid, IssueTask.connection_count):
+        print(f"Processing GraphQL batch of {len(batch)} issues ({batch[0].ref} ...)")
+        points += run_batch(batch, lambda alias, t: t.first_query(alias), _handle_first, IssueTask.fail, session)
+        batches += 1
+
+    # Follow cursors until every comment and review list is complete
+    pending = [(t, f) for t in valid for f in list(t.cursors)]
+    while pending:
+        for batch in sizer.batches(pending, lambda item: 1):
+            points += run_batch(batch, lambda alias, item: item[0].continuation_query(alias, item[1]),
+                                _handle_continuation, lambda item: item[0].fail(), session)
+            batches += 1
+        pending = [(t, f) for t in valid for f in list(t.cursors)]
+
+    failed = sum(t.failed for t in tasks.values())
+    print(f"GraphQL: {batches} batches, {points} points for {len(tasks)} issues"
+          + (f", {failed} failed" if failed else ""))
+    return tasks
+
+
+def mine_rows(rows, session):
+    """
+    Mine every input row and yield (row, dev_roles) in input order, like mine_dev_info.mine_rows; dev_roles is None
+    for issues whose query failed.
+    """
+    keys = [(row['GitHub-Issue'].strip(), row['PR'].strip().lower() == 'true') for row in rows]
+    tasks = mine_issues(keys, session)
+    for row, key in zip(rows, keys):
+        yield row, None if tasks[key].failed else tasks[key].dev_roles()
@@ -0,0 +1,355 @@
+"""
+identity.py
+
+Interned identities shared by the scripts: usernames, projects and issues are mapped to dense integer IDs
+(0, 1, 2, ... in order of first appearance), so rows, joins and group-bys carry small integers instead of repeated
+strings.
+
+    - Interner:   one value <-> ID dictionary, thread-safe; encode() / decode() convert whole columns at once, and
+                  collation() gives every ID its rank in string order, for sorting by IDs as by the strings.
+    - Identities: the users, projects and issues interners, persisted in ../data/identities.json so that IDs stay
+                  the same across stages and runs (mine_dev_info.py saves it; the other stages load it and only add
+                  new values in memory).
+    - AccountTypes: the GitHub account type ("User", "Bot", "Organization", ...) of every login seen in the mined
+                  payloads, persisted in ../data/account_types.csv (username,type) for filter_bots.py.
+
+Issue references ("owner/repo#123") are parsed once per distinct string (parse_issue_ref is cached). The project of
+an issue is its lowercased "owner/repo", since GitHub repository names are case-insensitive; project_of and
+project_ids are the only place the scripts derive projects, so every stage agrees on them.
+
+The four participation roles are packed into a bitmask (PR_AUTHOR | COMMENTED, ...). DevRoles holds the participants
+of one issue as two arrays, user IDs and role masks, in the order the users were first seen. It also keeps the
+timestamped events behind them (the issue's creation, each comment, each review) as three arrays: user IDs, roles and
+seconds since the epoch (parse_time / format_time convert GitHub's "2015-01-01T12:00:00Z").
+"""
+
+import os
+import csv
+import json
+import threading
+import functools
+from array import array
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+IDENTITIES_JSON = '../data/identities.json'
+ACCOUNT_TYPES_CSV = '../data/account_types.csv'
+
+# Participation roles, in the column order of developer_info.csv
+ROLES = ('PR-author', 'BugReport-author', 'Commented', 'Reviewer')
+PR_AUTHOR, BUG_REPORT_AUTHOR, COMMENTED, REVIEWER = (1 << k for k in range(len(ROLES)))
+ROLE_BITS = dict(zip(ROLES, (PR_AUTHOR, BUG_REPORT_AUTHOR, COMMENTED, REVIEWER)))
+
+
+# --- Interning ---
+
+class Interner:
+    """Dense integer IDs for the distinct values (strings) of one kind."""
+
+    __slots__ = ('ids', 'values', '_lock')
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.ids = {value: k for k, value in enumerate(self.values)}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, value):
+        return value in self.ids
+
+    def __getitem__(self, id_):
+        return self.values[id_]
+
+    def id(self, value):
+        """The ID of a value, assigning the next one to a new value."""
+        try:
+            return self.ids[value]
+        except KeyError:
+            pass
+        with self._lock:
+            id_ = self.ids.get(value)
+            if id_ is None:
+                id_ = self.ids[value] = len(self.values)
+                self.values.append(value)
+            return id_
+
+    def get(self, value, default=-1):
+        """The ID of a value, or `default` if it was never interned."""
+        return self.ids.get(value, default)
+
+    def encode(self, values):
+        """IDs of a column (int32 array); missing values get -1. Each distinct value is looked up once."""
+        codes, uniques = pd.factorize(values)
+        ids = np.fromiter((self.id(value) for value in uniques), dtype=np.int32, count=len(uniques))
+        return _take(ids, codes)
+
+    def decode(self, ids):
+        """Values of an array of IDs (object array); -1 decodes to NaN."""
+        ids = np.asarray(ids)
+        values = np.empty(len(self.values) + 1, dtype=object)
+        values[:-1] = self.values
+        values[-1] = np.nan
+        return values.take(np.where(ids < 0, len(self.values), ids))
+
+    def collation(self):
+        """rank[id]: the position of every value in string order, so sorting by rank[ids] sorts by the values."""
+        order = np.argsort(np.asarray(self.values, dtype=object), kind='stable')
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        return rank
+
+
+def _take(ids, codes):
+    result = ids.take(codes) if len(ids) else np.full(len(codes), -1, dtype=np.int32)
+    result[codes < 0] = -1
+    return result
+
+
+class Identities:
+    """The users, projects and issues interners, saved together."""
+
+    __slots__ = ('users', 'projects', 'issues', 'path')
+
+    def __init__(self, users=(), projects=(), issues=(), path=None):
+        self.users = Interner(users)
+        self.projects = Interner(projects)
+        self.issues = Interner(issues)
+        self.path = path
+
+    @classmethod
+    def load(cls, path=IDENTITIES_JSON):
+        """The saved dictionary, or an empty one if there is none yet."""
+        if not os.path.exists(path):
+            return cls(path=path)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('users', ()), data.get('projects', ()), data.get('issues', ()), path)
+
+    def save(self, path=None):
+        """Write the dictionary atomically; IDs are list positions, so later saves only append."""
+        path = path or self.path or IDENTITIES_JSON
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'users': self.users.values, 'projects': self.projects.values,
+                       'issues': self.issues.values}, f)
+        os.replace(tmp_path, path)
+        return path
+
+    def add_issue(self, ref):
+        """Intern an issue reference and its project; returns the issue ID."""
+        project = project_of(ref)
+        if project:
+            self.projects.id(project)
+        return self.issues.id(ref)
+
+
+_IDENTITIES = None
+_IDENTITIES_LOCK = threading.Lock()
+
+
+def identities():
+    """The process-wide Identities, loaded from IDENTITIES_JSON on first use."""
+    global _IDENTITIES
+    with _IDENTITIES_LOCK:
+        if _IDENTITIES is None:
+            _IDENTITIES = Identities.load()
+        return _IDENTITIES
+
+
+class AccountTypes:
+    """GitHub account types by login; a later run adds to (and updates) the types saved by earlier ones."""
+
+    __slots__ = ('types', 'path', '_lock')
+
+    def __init__(self, types=None, path=None):
+        self.types = dict(types or {})
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=ACCOUNT_TYPES_CSV):
+        """The saved types, or none if there are none yet."""
+        if not os.path.exists(path):
+            return cls(path=path)
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls({row['username']: row['type'] for row in csv.DictReader(f)}, path)
+
+    def __len__(self):
+        return len(self.types)
+
+    def note(self, login, account_type):
+        """Record the type of an account (REST user.type, or the GraphQL __typename of an actor)."""
+        if login and account_type:
+            with self._lock:
+                self.types[login] = account_type
+
+    def save(self, path=None):
+        """Write username,type rows sorted by username, atomically."""
+        path = path or self.path or ACCOUNT_TYPES_CSV
+        tmp_path = path + '.tmp'
+        with self._lock:
+            rows = sorted(self.types.items())
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['username', 'type'])
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
+        return path
+
+
+_ACCOUNT_TYPES = None
+
+
+def account_types():
+    """The process-wide AccountTypes, loaded from ACCOUNT_TYPES_CSV on first use."""
+    global _ACCOUNT_TYPES
+    with _IDENTITIES_LOCK:
+        if _ACCOUNT_TYPES is None:
+            _ACCOUNT_TYPES = AccountTypes.load()
+        return _ACCOUNT_TYPES
+
+
+# --- Issue references ---
+
+IssueRef = namedtuple('IssueRef', ['owner', 'repo', 'number'])
+INVALID_REF = IssueRef(None, None, None)
+
+
+@functools.lru_cache(maxsize=None)
+def parse_issue_ref(issue_ref):
+    """
+    "owner/repo#123" -> IssueRef('owner', 'repo', '123'); INVALID_REF (all None) if it is not of that form.
+    The number is kept as a string, as it goes into URLs.
+    """
+    try:
+        repo_path, issue_num = issue_ref.split('#')
+        owner, repo = repo_path.split('/')
+        return IssueRef(owner, repo, issue_num)
+    except (ValueError, AttributeError):
+        return INVALID_REF
+
+
+@functools.lru_cache(maxsize=None)
+def project_of(issue_ref):
+    """The lowercased "owner/repo" of "Owner/Repo#1234"; None for a missing reference."""
+    if not isinstance(issue_ref, str):
+        return None
+    return issue_ref.split('#')[0].strip('/').lower()
+
+
+def project_ids(issues, interner):
+    """Project IDs of a column of issue references (-1 where the issue is missing); each issue is parsed once."""
+    codes, uniques = pd.factorize(issues)
+    ids = np.fromiter((interner.id(project_of(ref)) for ref in uniques), dtype=np.int32, count=len(uniques))
+    return _take(ids, codes)
+
+
+def projects(issues):
+    """Projects of a column of issue references, as a Series of strings aligned with it (NaN where missing)."""
+    codes, uniques = pd.factorize(issues)
+    names = np.array([project_of(ref) for ref in uniques] + [np.nan], dtype=object)
+    return pd.Series(names.take(np.where(codes < 0, len(uniques), codes)), index=issues.index, dtype=object)
+
+
+# --- Participation roles ---
+
+class DevRoles:
+    """
+    The participants of one issue: user IDs and role bitmasks, in the order the users were first seen, and the
+    timestamped events (user ID, role, seconds) they were derived from.
+    """
+
+    __slots__ = ('user_ids', 'masks', 'users', 'event_users', 'event_roles', 'event_times')
+
+    def __init__(self, users=None):
+        self.users = users if users is not None else identities().users
+        self.user_ids = array('i')
+        self.masks = bytearray()
+        self.event_users = array('i')
+        self.event_roles = bytearray()
+        self.event_times = array('q')
+
+    def add(self, username, role, created_at=None):
+        """Give a user a role (a ROLE_BITS value); with the time it happened (GitHub timestamp), record the event."""
+        user_id = self.users.id(username)
+        try:
+            k = self.user_ids.index(user_id)  # threads have few participants: a scan beats a dict here
+        except ValueError:
+            self.user_ids.append(user_id)
+            self.masks.append(role)
+        else:
+            self.masks[k] |= role
+        seconds = parse_time(created_at)
+        if seconds is not None:
+            self.record(username, role, seconds)
+
+    def record(self, username, role, seconds):
+        """Record an event without touching the roles (used when the roles are restored separately)."""
+        self.event_users.append(self.users.id(username))
+        self.event_roles.append(role)
+        self.event_times.append(seconds)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def items(self):
+        """(username, role mask) pairs."""
+        return ((self.users[user_id], mask) for user_id, mask in zip(self.user_ids, self.masks))
+
+    def flags(self):
+        """(username, {role: bool}) pairs."""
+        return ((username, role_flags(mask)) for username, mask in self.items())
+
+    def events(self):
+        """(username, role, seconds) triples, in the order they were recorded."""
+        return ((self.users[user_id], role, seconds)
+                for user_id, role, seconds in zip(self.event_users, self.event_roles, self.event_times))
+
+    @classmethod
+    def from_flags(cls, entries, users=None, events=()):
+        """
+        From [username, bool, bool, bool, bool] lists in ROLES order and [username, role, seconds] events (the mining
+        journal's format).
+        """
+        dev_roles = cls(users)
+        for username, *flags in entries:
+            dev_roles.add(username, role_mask(flags))
+        for username, role, seconds in events:
+            dev_roles.record(username, role, seconds)
+        return dev_roles
+
+
+def role_mask(flags):
+    """Bitmask of a sequence of booleans in ROLES order."""
+    return sum(bit for bit, flag in zip(ROLE_BITS.values(), flags) if flag)
+
+
+def role_flags(mask):
+    """{role: bool} of a bitmask."""
+    return {role: bool(mask & bit) for role, bit in ROLE_BITS.items()}
+
+
+def role_name(role):
+    """The ROLES name of a single role bit."""
+    return ROLES[role.bit_length() - 1]
+
+
+# --- Timestamps ---
+
+def parse_time(value):
+    """Seconds since the epoch of a GitHub timestamp ("2015-01-01T12:00:00Z"); None if missing or malformed."""
+    try:
+        # fromisoformat only takes the trailing "Z" from Python 3.11 on
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def format_time(seconds):
+    """The GitHub timestamp of seconds since the epoch."""
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -0,0 +1,338 @@
+"""
+instrumentation.py
+
+Lightweight, thread-safe instrumentation shared by the pipeline scripts.
+
+Metrics live in one process-wide registry:
+    - counters:   count('github_requests', status=200)
+    - gauges:     gauge('github_ratelimit_remaining', 4321, token=1)
+    - histograms: observe('github_request_seconds', 0.12), with Prometheus-style cumulative buckets
+    - timers:     `with timer('load'):` or `@timed('load')` (a decorator works on plain and generator functions);
+                  every timed step is observed in the step_seconds histogram, labelled with the step name.
+
+A script wraps its main in `with stage('mine_dev_info'):`. When the stage ends (normally or with an error), a JSON run
+report (script, arguments, duration, status, every metric) and a Prometheus textfile (for node_exporter's textfile
+collector) are written to ../data/run_reports/<stage>.json and <stage>.prom.
+
+Profiling is switched on per stage in .env or the environment, with a comma-separated list of stage names (or "all"):
+    PROFILE_STAGES=derive_dev_affiliation      cProfile of the stage's main thread -> run_reports/<stage>.prof, and
+                                               the top functions by cumulative time in the JSON report
+    TRACEMALLOC_STAGES=data_analysis           tracemalloc peak and top allocation sites in the JSON report
+RUN_REPORTS sets the report directory; an empty value disables the reports (metrics are still collected).
+
+Usage:
+    python instrumentation.py REPORT.json ...     # print the slowest steps and the counters of saved reports
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import inspect
+import pstats
+import cProfile
+import functools
+import threading
+import contextlib
+import tracemalloc
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_DIR = os.getenv('RUN_REPORTS', os.path.normpath(os.path.join(SCRIPT_DIR, '..', 'data', 'run_reports')))
+PROFILE_STAGES = {s.strip() for s in os.getenv('PROFILE_STAGES', '').split(',') if s.strip()}
+TRACEMALLOC_STAGES = {s.strip() for s in os.getenv('TRACEMALLOC_STAGES', '').split(',') if s.strip()}
+
+METRIC_PREFIX = 'cpcb_'
+# Upper bounds of the histogram buckets, in seconds (Prometheus' defaults)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROFILE_TOP = 25
+TRACEMALLOC_TOP = 15
+
+
+# --- Registry ---
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'max')
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        for k, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[k] += 1
+                break
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        total, result = 0, []
+        for bound, n in zip(self.buckets, self.counts):
+            total += n
+            result.append((bound, total))
+        return result
+
+
+class Registry:
+    """Counters, gauges and histograms keyed by (name, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def count(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Every metric as JSON-ready lists of {name, labels, ...}."""
+        with self._lock:
+            return {
+                'counters': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in sorted(self.counters.items())],
+                'gauges': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in sorted(self.gauges.items())],
+                'histograms': [{'name': n, 'labels': dict(l), 'count': h.count, 'sum': h.sum, 'max': h.max,
+                                'mean': h.sum / h.count if h.count else 0.0,
+                                'buckets': {str(b): c for b, c in h.cumulative()}}
+                               for (n, l), h in sorted(self.histograms.items())],
+            }
+
+    def prometheus(self, extra_labels=None):
+        """The metrics in the Prometheus text exposition format."""
+        extra = dict(extra_labels or {})
+        snapshot = self.snapshot()
+        lines = []
+        for kind, entries in (('counter', snapshot['counters']), ('gauge', snapshot['gauges'])):
+            for name in sorted({e['name'] for e in entries}):
+                metric = METRIC_PREFIX + name + ('_total' if kind == 'counter' else '')
+                lines.append(f"# TYPE {metric} {kind}")
+                for e in entries:
+                    if e['name'] == name:
+                        lines.append(f"{metric}{_labels({**extra, **e['labels']})} {_number(e['value'])}")
+        for name in sorted({e['name'] for e in snapshot['histograms']}):
+            metric = METRIC_PREFIX + name
+            lines.append(f"# TYPE {metric} histogram")
+            for e in snapshot['histograms']:
+                if e['name'] != name:
+                    continue
+                labels = {**extra, **e['labels']}
+                for bound, n in e['buckets'].items():
+                    lines.append(f"{metric}_bucket{_labels({**labels, 'le': bound})} {n}")
+                lines.append(f"{metric}_bucket{_labels({**labels, 'le': '+Inf'})} {e['count']}")
+                lines.append(f"{metric}_sum{_labels(labels)} {_number(e['sum'])}")
+                lines.append(f"{metric}_count{_labels(labels)} {e['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+count = REGISTRY.count
+gauge = REGISTRY.gauge
+observe = REGISTRY.observe
+
+
+# --- Timers ---
+
+class timer(contextlib.ContextDecorator):
+    """Time a block (or, as a decorator, every call) into step_seconds{step=...}; `.elapsed` holds the last time."""
+
+    def __init__(self, step, registry=REGISTRY, **labels):
+        self.step = step
+        self.registry = registry
+        self.labels = labels
+        self.elapsed = 0.0
+        self._start = threading.local()
+
+    def __enter__(self):
+        # A stack per thread: decorated functions may run concurrently or recursively
+        if not hasattr(self._start, 'stack'):
+            self._start.stack = []
+        self._start.stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start.stack.pop()
+        self.registry.observe('step_seconds', self.elapsed, step=self.step, **self.labels)
+        if exc_type is not None:
+            self.registry.count('step_errors', step=self.step, error=exc_type.__name__)
+        return False
+
+
+def timed(step=None, **labels):
+    """
+    Decorator: time every call of the function as step_seconds{step=...} (default step: module.function).
+
+    For generator functions the time runs from the first item to exhaustion (or until the consumer stops).
+    """
+    def decorate(fn):
+        module = fn.__module__
+        if module == '__main__':
+            # The script run directly: name its steps after the file, as when it is imported
+            module = os.path.splitext(os.path.basename(fn.__globals__.get('__file__', module)))[0]
+        name = step or f"{module}.{fn.__qualname__}"
+        if not inspect.isgeneratorfunction(fn):
+            return functools.wraps(fn)(timer(name, **labels)(fn))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                yield from fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --- Stage reports ---
+
+@contextlib.contextmanager
+def _profiled(name, report):
+    """cProfile and/or tracemalloc around a stage, as configured; results go into the report."""
+    profiler = cProfile.Profile() if name in PROFILE_STAGES or 'all' in PROFILE_STAGES else None
+    trace = (name in TRACEMALLOC_STAGES or 'all' in TRACEMALLOC_STAGES) and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            report['profile'] = _profile_summary(profiler, name)
+        if trace:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report['tracemalloc'] = {
+                'current_mb': current / 2 ** 20, 'peak_mb': peak / 2 ** 20,
+                'top': [{'where': str(s.traceback), 'size_mb': s.size / 2 ** 20, 'blocks': s.count}
+                        for s in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]],
+            }
+
+
+def _profile_summary(profiler, name):
+    summary = {}
+    if REPORT_DIR:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        summary['file'] = os.path.join(REPORT_DIR, f"{name}.prof")
+        profiler.dump_stats(summary['file'])
+    stats = pstats.Stats(profiler, stream=io.StringIO()).sort_stats('cumulative')
+    summary['top'] = [{'function': f"{path}:{line}({func})", 'calls': nc, 'total_s': tt, 'cumulative_s': ct}
+                      for (path, line, func), (_, nc, tt, ct, _) in
+                      sorted(stats.stats.items(), key=lambda item: -item[1][3])[:PROFILE_TOP]]
+    return summary
+
+
+def _write_atomic(path, text):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_reports(name, report, registry=REGISTRY, directory=None):
+    """Write <name>.json and <name>.prom; returns the JSON path (None when reports are disabled)."""
+    directory = REPORT_DIR if directory is None else directory
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    report = dict(report, metrics=registry.snapshot())
+    json_path = os.path.join(directory, f"{name}.json")
+    _write_atomic(json_path, json.dumps(report, indent=2, default=str))
+    prom = registry.prometheus({'stage': name})
+    prom += (f"# TYPE {METRIC_PREFIX}stage_duration_seconds gauge\n"
+             f"{METRIC_PREFIX}stage_duration_seconds{_labels({'stage': name})} {report['duration_s']!r}\n"
+             f"# TYPE {METRIC_PREFIX}stage_success gauge\n"
+             f"{METRIC_PREFIX}stage_success{_labels({'stage': name})} {int(report['status'] == 'ok')}\n"
+             f"# TYPE {METRIC_PREFIX}stage_last_run_timestamp_seconds gauge\n"
+             f"{METRIC_PREFIX}stage_last_run_timestamp_seconds{_labels({'stage': name})} {report['finished']!r}\n")
+    _write_atomic(os.path.join(directory, f"{name}.prom"), prom)
+    return json_path
+
+
+@contextlib.contextmanager
+def stage(name, registry=REGISTRY):
+    """Instrument a whole script run: total time, optional profiling, and the run reports at the end."""
+    report = {'stage': name, 'script': os.path.basename(sys.argv[0]), 'argv': sys.argv[1:],
+              'pid': os.getpid(), 'started': time.time(), 'status': 'ok'}
+    start = time.perf_counter()
+    try:
+        with _profiled(name, report), timer(name, registry):
+            yield report
+    except BaseException as e:
+        report['status'] = f"error: {type(e).__name__}: {e}"
+        raise
+    finally:
+        report['finished'] = time.time()
+        report['duration_s'] = time.perf_counter() - start
+        path = write_reports(name, report, registry)
+        if path:
+            print(f"📈 Run report: {path}")
+
+
+# --- Reading reports ---
+
+def summarize(report, top=10):
+    """Lines describing a saved JSON report: duration, slowest steps, counters."""
+    lines = [f"{report['stage']}: {report['status']} in {report['duration_s']:.2f}s"]
+    steps = [h for h in report['metrics']['histograms'] if h['name'] == 'step_seconds']
+    for h in sorted(steps, key=lambda h: -h['sum'])[:top]:
+        lines.append(f"  {h['labels'].get('step', ''):<55} {h['sum']:>9.3f}s total  {h['count']:>7} calls  "
+                     f"max {h['max']:.3f}s")
+    for c in report['metrics']['counters']:
+        labels = ','.join(f"{k}={v}" for k, v in c['labels'].items())
+        lines.append(f"  {c['name']}{{{labels}}} = {c['value']}")
+    for g in report['metrics']['gauges']:
+        labels = ','.join(f"{k}={v}" for k, v in g['labels'].items())
+        lines.append(f"  {g['name']}{{{labels}}} = {g['value']}")
+    return lines
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    for path in sys.argv[1:]:
+        with open(path, encoding='utf-8') as f:
+            print("\n".join(summarize(json.load(f))))
@@ -1,149 +1,387 @@
 """
 Mine Developer Information from GitHub Issues
 
-This script loads a GitHub personal access token from a .env file, reads a CSV of combined issues, and uses the GitHub API 
-to fetch additional information about repositories or issues. It is designed to automate the enrichment of issue data with 
+This script loads a GitHub personal access token from a .env file, reads a CSV of combined issues, and uses the GitHub API
+to fetch additional information about repositories or issues. It is designed to automate the enrichment of issue data with
 live GitHub metadata for further analysis.
+
+Issues are mined concurrently by a bounded thread pool sharing one keep-alive connection pool. For each issue, the
+comments and reviews are fetched in parallel once the issue itself is known. Rows are written in the order of the input
+CSV, so the output is identical to a sequential run (use --workers 1 to mine one issue at a time). Comment and review
+lists are read in full through github_api.paginate (100 items per page, following the Link header).
+
+Usage:
+    python mine_dev_info.py [--workers N] [--input PATH] [--output PATH] [--backend rest|graphql]
+                            [--journal [PATH]] [--delta] [--retry-empty]
+                            [--offline] [--no-cache] [--cache-ttl SECONDS]
+
+With --journal, every finished issue is checkpointed (see mining_journal.py) and a restarted run skips the issues
+already done; --delta additionally reports which issues of combined_issues.csv are new since the journal was written
+and mines only those. Issues whose thread could not be fetched completely are left out of the journal and mined again
+by the next run. With --backend graphql, issues are mined in batches of aliased GraphQL queries instead (see
+graphql_miner.py).
+
+Requests are scheduled by github_api.py, which paces them against the GitHub rate limit and rotates across every
+token configured in .env (PAC, PAC_2, ...). Set GITHUB_API_URL to point the miner at another API root (e.g. the local
+mock in mock_github_server.py). Responses are cached in ../data/github_cache.sqlite and revalidated with ETags, so
+reruns only pay for what changed; --offline mines from the cache alone.
+
+Participants are kept as interned user IDs with role bitmasks (identity.DevRoles), and the users, issues and projects
+seen are saved to the identity dictionary identities.json next to the output (see identity.py).
+
+The time of every participation event is kept too: developer_events.csv, next to the output, has one row per
+authored issue or pull request (created_at), comment (created_at) and review (submitted_at) of the developers in
+developer_info.csv, with the scenario columns of the input row. network-analysis/temporal_network.py builds
+collaboration networks over time windows from it.
+
+The GitHub account type of every login seen ("User", "Bot", "Organization") is saved to account_types.csv next to the
+output, merged with the types saved by earlier runs; filter_bots.py flags the "Bot" accounts.
+
+Each run writes a run report (request and outcome counters, per-step timings, rate-limit budgets) to
+../data/run_reports/mine_dev_info.json and .prom; see instrumentation.py.
 """
 
 import os
-import csv
+import argparse
 import requests
-from dotenv import load_dotenv
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()  # Loads variables from .env into environment
-GITHUB_TOKEN = os.getenv('PAC') # Get Personal Access Token
-HEADERS = {'Authorization': f'token {GITHUB_TOKEN}'}
+import columnar
+import github_api
+import instrumentation
+from identity import (DevRoles, identities, account_types, ACCOUNT_TYPES_CSV, parse_issue_ref, format_time, role_name,
+                      PR_AUTHOR, BUG_REPORT_AUTHOR, COMMENTED, REVIEWER)
+from mining_journal import MiningJournal
 
 # GitHub API URL
-API_URL = "https://api.github.com/repos/"
+API_URL = f"{github_api.API_ROOT}/repos/"
 
 # Input and Output file paths
 INPUT_CSV = '../data/combined_issues.csv'
 OUTPUT_CSV = '../data/developer_info.csv'
+EVENTS_CSV = '../data/developer_events.csv'
+JOURNAL_PATH = '../data/developer_info.journal.jsonl'
+
+OUTPUT_FIELDS = [
+    'Username', 'Issue', 'PR-author', 'BugReport-author', 'Commented', 'Reviewer', 'Fix-type', 'Pattern-Structure', 'Downstream-driven-fix', 'Scenario'
+]
+EVENT_FIELDS = ['Username', 'Issue', 'Role', 'Created-at', 'Downstream-driven-fix', 'Scenario']
+
+# Concurrency settings
+MAX_WORKERS = 8  # issues mined in parallel
+JOURNAL_CHUNK = 200  # issues per checkpoint with the GraphQL backend
+
+# Shared keep-alive session
+SESSION = github_api.make_session(MAX_WORKERS)
 
 # --- Helper Functions ---
 
-def parse_issue_ref(issue_ref):
-    """Parse the issue reference to extract owner, repo, and issue number."""
+def _outcome(status):
+    return 'ok' if status == 200 else 'forbidden' if status in (403, 429) else 'not_found' if status == 404 else 'error'
+
+
+@instrumentation.timed()
+def safe_request(url, session=None, not_found=None):
+    """
+    Perform a safe GET request; rate limits are waited out by the shared scheduler.
+
+    Returns None (and reports) on errors, or not_found if the resource does not exist (404).
+    """
+    response = github_api.get(url, session or SESSION)
+    instrumentation.count('safe_request', outcome=_outcome(response.status_code))
+    if response.status_code in (403, 429):
+        print(f"⚠️ Forbidden or still rate limited after retries: {url}")
+        return None
+    elif response.status_code == 404:
+        print(f"⚠️ Not found: {url}")
+        return not_found
+    elif response.status_code != 200:
+        print(f"⚠️ Error {response.status_code} on {url}")
+        return None
+    else:
+        return response.json()
+
+@instrumentation.timed()
+def safe_paginate(url, session=None, not_found=None):
+    """Fetch every page of a list endpoint; like safe_request, return None (and report) on errors, not_found on a 404."""
     try:
-        repo_path, issue_num = issue_ref.split('#')
-        owner, repo = repo_path.split('/')
-        return owner, repo, issue_num
-    except ValueError:
-        return None, None, None
-
-
-def safe_request(url):
-    """Perform a safe GET request with basic rate-limit handling."""
-    while True:
-        response = requests.get(url, headers=HEADERS)
-        # if response.status_code == 403 and 'X-RateLimit-Remaining' in response.headers:
-        #     reset_time = int(response.headers.get('X-RateLimit-Reset', time.time() + 60))
-        #     wait_for = max(0, reset_time - int(time.time()) + 5)
-        #     print(f"Rate limit reached, waiting {wait_for} seconds...")
-        #     time.sleep(wait_for)
-        if response.status_code == 403:
-            print(f"Rate limit exceeded. Try again later.")
-            return None
-        elif response.status_code == 404:
+        items = list(github_api.paginate(url, session or SESSION))
+        instrumentation.count('safe_paginate', outcome='ok')
+        instrumentation.count('list_items', len(items))
+        return items
+    except requests.HTTPError as e:
+        status = e.response.status_code
+        instrumentation.count('safe_paginate', outcome=_outcome(status))
+        if status in (403, 429):
+            print(f"⚠️ Forbidden or still rate limited after retries: {url}")
+        elif status == 404:
             print(f"⚠️ Not found: {url}")
-            return None
-        elif response.status_code != 200:
-            print(f"⚠️ Error {response.status_code} on {url}")
-            return None
+            return not_found
         else:
-            return response.json()
-        
+            print(f"⚠️ Error {status} on {url}")
+        return None
+
 # --- Get developer participation per issue ---
-def process_issue(issue_ref, is_pr):
+@instrumentation.timed()
+def fetch_issue_thread(issue_ref, is_pr, executor=None, session=None):
+    """
+    Fetch an issue, its comments and (for PRs) its reviews; return (issue_data, comments, reviews).
+
+    Parts that could not be fetched are None. Parts that do not exist are empty: an unknown or missing (404) issue is {}
+    with no comments or reviews, and an issue has no reviews unless it is a PR. Comments and reviews are only requested
+    once the issue itself is known. When an executor is given, the comments and reviews requests are issued in
+    parallel on it.
+    """
     owner, repo, issue_num = parse_issue_ref(issue_ref)
     if not owner:
-        return {}
+        return {}, [], []
 
     issue_url = f"{API_URL}{owner}/{repo}/issues/{issue_num}"
-    issue_data = safe_request(issue_url)
+    issue_data = safe_request(issue_url, session, not_found={})
+    if not issue_data:
+        return issue_data, [], []
+
+    comments_url = issue_data.get('comments_url')
+    pr_reviews_url = f"{API_URL}{owner}/{repo}/pulls/{issue_num}/reviews" if is_pr else None
+
+    # --- Fetch comments and reviews (in parallel when possible) ---
+    if executor is not None:
+        comments_future = executor.submit(safe_paginate, comments_url, session, []) if comments_url else None
+        reviews_future = executor.submit(safe_paginate, pr_reviews_url, session, []) if pr_reviews_url else None
+        comments = comments_future.result() if comments_future else []
+        reviews = reviews_future.result() if reviews_future else []
+    else:
+        comments = safe_paginate(comments_url, session, []) if comments_url else []
+        reviews = safe_paginate(pr_reviews_url, session, []) if pr_reviews_url else []
+
+    if comments is not None:
+        instrumentation.count('comments_fetched', len(comments))
+    return issue_data, comments, reviews
+
+
+def thread_complete(issue_data, comments, reviews):
+    """Whether every part of a fetched issue thread was read (see fetch_issue_thread)."""
+    return issue_data is not None and comments is not None and reviews is not None
+
+
+def thread_roles(issue_data, comments, reviews, is_pr):
+    """Return the DevRoles (participants and their role bitmasks) of a fetched issue thread."""
+    dev_roles = DevRoles()
     if not issue_data:
-        return {}
+        return dev_roles
 
-    # dictionary {username: {'PR-author': bool, 'BugReport-author': bool, 'commented': bool, 'reviewer': bool}}
-    dev_roles = defaultdict(lambda: {
-        'PR-author': False,
-        'BugReport-author': False,
-        'Commented': False,
-        'Reviewer': False
-    })
+    types = account_types()
 
     # --- Author ---
     if issue_data.get('user'):
-        username = issue_data['user']['login']
-        if is_pr:
-            dev_roles[username]['PR-author'] = True
-        else:
-            dev_roles[username]['BugReport-author'] = True
+        types.note(issue_data['user']['login'], issue_data['user'].get('type'))
+        dev_roles.add(issue_data['user']['login'], PR_AUTHOR if is_pr else BUG_REPORT_AUTHOR,
+                      issue_data.get('created_at'))
 
     # --- Commenters ---
-    comments_url = issue_data.get('comments_url')
-    if comments_url:
-        comments = safe_request(comments_url)
-        if comments:
-            for c in comments:
-                if c.get('user'):
-                    username = c['user']['login']
-                    dev_roles[username]['Commented'] = True
+    if comments:
+        for c in comments:
+            if c.get('user'):
+                types.note(c['user']['login'], c['user'].get('type'))
+                dev_roles.add(c['user']['login'], COMMENTED, c.get('created_at'))
 
     # --- Reviewers (PR only) ---
-    if is_pr:
-        pr_reviews_url = f"{API_URL}{owner}/{repo}/pulls/{issue_num}/reviews"
-        reviews = safe_request(pr_reviews_url)
-        if reviews:
-            for r in reviews:
-                if r.get('user'):
-                    username = r['user']['login']
-                    dev_roles[username]['Reviewer'] = True
+    if reviews:
+        for r in reviews:
+            if r.get('user'):
+                types.note(r['user']['login'], r['user'].get('type'))
+                dev_roles.add(r['user']['login'], REVIEWER, r.get('submitted_at'))
 
     return dev_roles
 
 
+def process_issue(issue_ref, is_pr, executor=None, session=None):
+    """Return the DevRoles of one issue, or None if part of its thread could not be fetched."""
+    issue_data, comments, reviews = fetch_issue_thread(issue_ref, is_pr, executor, session)
+    if not thread_complete(issue_data, comments, reviews):
+        return None
+    return thread_roles(issue_data, comments, reviews, is_pr)
+
+
+def issue_rows(row, dev_roles):
+    """Build the developer_info.csv rows of one input row from its dev_roles."""
+    issue_ref = row['GitHub-Issue'].strip()
+    return [{
+        'Username': username,
+        'Issue': issue_ref,
+        'PR-author': bool(mask & PR_AUTHOR),
+        'BugReport-author': bool(mask & BUG_REPORT_AUTHOR),
+        'Commented': bool(mask & COMMENTED),
+        'Reviewer': bool(mask & REVIEWER),
+        'Fix-type': row['Fix-type'],
+        'Pattern-Structure': row['Pattern-Structure'],
+        'Downstream-driven-fix': row['Downstream-driven-fix'],
+        'Scenario': row['Scenario'],
+    } for username, mask in dev_roles.items()]
+
+
+def event_rows(row, dev_roles):
+    """Build the developer_events.csv rows of one input row from its dev_roles, in time order."""
+    issue_ref = row['GitHub-Issue'].strip()
+    return [{
+        'Username': username,
+        'Issue': issue_ref,
+        'Role': role_name(role),
+        'Created-at': format_time(seconds),
+        'Downstream-driven-fix': row['Downstream-driven-fix'],
+        'Scenario': row['Scenario'],
+    } for username, role, seconds in sorted(dev_roles.events(), key=lambda event: event[2])]
+
+
+def mine_rows(rows, workers=MAX_WORKERS, session=None):
+    """
+    Mine every input row and yield (row, dev_roles) in input order; dev_roles is None for issues whose thread could
+    not be fetched completely, so that a journaled run mines them again.
+
+    With workers > 1, issues are processed by a bounded thread pool; a second pool of the same
+    size serves the per-issue comments/reviews requests so that issue workers never wait on
+    tasks queued behind themselves.
+    """
+    def mine_one(row, detail_pool=None):
+        issue_ref = row['GitHub-Issue'].strip()
+        is_pr = row['PR'].strip().lower() == 'true'
+        print(f"Processing {issue_ref} (PR={is_pr})...")
+        return row, process_issue(issue_ref, is_pr, detail_pool, session)
+
+    if workers <= 1:
+        for row in rows:
+            yield mine_one(row)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as issue_pool, \
+         ThreadPoolExecutor(max_workers=workers) as detail_pool:
+        # map() yields results in submission order, which keeps the output deterministic
+        yield from issue_pool.map(lambda row: mine_one(row, detail_pool), rows)
+
+
+def write_developer_info(all_rows, output_csv):
+    """Write the rows as developer_info.csv, or in the DATA_FORMAT storage format; returns the path written."""
+    return columnar.write_records(all_rows, OUTPUT_FIELDS, output_csv)
+
+
+def write_developer_events(all_events, output_csv):
+    """Write the events as developer_events.csv next to output_csv (in the same storage format); returns the path."""
+    events_csv = os.path.join(os.path.dirname(output_csv), os.path.basename(EVENTS_CSV))
+    return columnar.write_records(all_events, EVENT_FIELDS, events_csv)
+
+
+def write_account_types(output_csv):
+    """Save the account types of the logins mined so far as account_types.csv next to output_csv; returns the path."""
+    return account_types().save(os.path.join(os.path.dirname(output_csv), os.path.basename(ACCOUNT_TYPES_CSV)))
+
+
+def issue_key(row):
+    """What determines the API calls for a row: the issue reference and whether it is a PR."""
+    return row['GitHub-Issue'].strip(), row['PR'].strip().lower() == 'true'
+
+
+def mine(rows, workers, backend, session):
+    if backend == 'graphql':
+        import graphql_miner
+        return graphql_miner.mine_rows(rows, session)
+    return mine_rows(rows, workers, session)
+
+
+def mine_journaled(rows, journal, workers, backend, session, delta=False, retry_empty=False):
+    """
+    Mine only the issues missing from the journal, recording each one as soon as it is done,
+    and yield (row, dev_roles) for every input row from the journal.
+    """
+    keys = [issue_key(row) for row in rows]
+    if delta:
+        new, removed, unchanged = journal.diff(keys)
+        print(f"Delta: {len(new)} new issues, {len(removed)} no longer listed, {len(unchanged)} already mined")
+        if removed:
+            journal.prune(keys)
+
+    pending = set(journal.pending(keys, retry_empty))
+    # One row per pending issue, even if the issue is listed in several scenarios
+    to_mine = []
+    for row, key in zip(rows, keys):
+        if key in pending:
+            pending.discard(key)
+            to_mine.append(row)
+    print(f"Journal {journal.path}: {len(journal)} issues recorded, {len(to_mine)} to mine")
+
+    # GraphQL results arrive per batch, so feed it slices to keep checkpoints frequent
+    chunk = JOURNAL_CHUNK if backend == 'graphql' else max(len(to_mine), 1)
+    for start in range(0, len(to_mine), chunk):
+        for row, dev_roles in mine(to_mine[start:start + chunk], workers, backend, session):
+            if dev_roles is not None:  # None: not fetched completely, mine it again next run
+                journal.record(issue_key(row), dev_roles)
+
+    for row, key in zip(rows, keys):
+        yield row, journal.dev_roles(key)
+
+
 # --- Main execution ---
-def main():
-    all_rows = []
-
-    with open(INPUT_CSV, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            issue_ref = row['GitHub-Issue'].strip()
-            is_pr = row['PR'].strip().lower() == 'true'
-            print(f"Processing {issue_ref} (PR={is_pr})...")
-
-            dev_roles = process_issue(issue_ref, is_pr)
-
-            for username, roles in dev_roles.items():
-                all_rows.append({
-                    'Username': username,
-                    'Issue': issue_ref,
-                    'PR-author': roles['PR-author'],
-                    'BugReport-author': roles['BugReport-author'],
-                    'Commented': roles['Commented'],
-                    'Reviewer': roles['Reviewer'],
-                    'Fix-type': row['Fix-type'],
-                    'Pattern-Structure': row['Pattern-Structure'],
-                    'Downstream-driven-fix': row['Downstream-driven-fix'],
-                    'Scenario': row['Scenario'],
-                })
+def main(input_csv=INPUT_CSV, output_csv=OUTPUT_CSV, workers=MAX_WORKERS, backend='rest',
+         journal_path=None, delta=False, retry_empty=False):
+    rows = columnar.read_records(input_csv)
+
+    session = github_api.make_session(workers) if workers != MAX_WORKERS else SESSION
 
+    if journal_path:
+        journal = MiningJournal(journal_path)
+        mined = mine_journaled(rows, journal, workers, backend, session, delta, retry_empty)
+    else:
+        mined = mine(rows, workers, backend, session)
+
+    all_rows, all_events = [], []
+    for row, dev_roles in mined:
+        if dev_roles is None:
+            instrumentation.count('issues_mined', developers='failed')
+            continue
+        instrumentation.count('issues_mined', developers='yes' if dev_roles else 'no')
+        identities().add_issue(row['GitHub-Issue'].strip())
+        all_rows.extend(issue_rows(row, dev_roles))
+        all_events.extend(event_rows(row, dev_roles))
+    instrumentation.count('developer_rows', len(all_rows))
+    instrumentation.count('developer_events', len(all_events))
 
     # --- Save combined results ---
-    with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'Username', 'Issue', 'PR-author', 'BugReport-author', 'Commented', 'Reviewer', 'Fix-type', 'Pattern-Structure', 'Downstream-driven-fix', 'Scenario'
-        ])
-        writer.writeheader()
-        writer.writerows(all_rows)
+    output_csv = write_developer_info(all_rows, output_csv)
+    events_csv = write_developer_events(all_events, output_csv)
+    identities().save(os.path.join(os.path.dirname(output_csv), 'identities.json'))
+    types_csv = write_account_types(output_csv)
+
+    print(f"✅ Developer information saved to {output_csv}")
+    print(f"✅ Developer events saved to {events_csv}")
+    print(f"✅ Account types saved to {types_csv}")
+    print(github_api.cache_summary())
+
 
-    print(f"✅ Developer information saved to {OUTPUT_CSV}")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mine developer participation from GitHub issues.")
+    parser.add_argument('--input', default=INPUT_CSV, help="combined issues CSV")
+    parser.add_argument('--output', default=OUTPUT_CSV, help="developer info CSV to write")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help="number of issues mined in parallel (1 = sequential)")
+    parser.add_argument('--backend', choices=['rest', 'graphql'], default='rest',
+                        help="REST (2-3 calls per issue) or batched GraphQL queries")
+    parser.add_argument('--journal', nargs='?', const=JOURNAL_PATH, default=None,
+                        help=f"record each mined issue in a checkpoint journal and skip issues already in it "
+                             f"(default path: {JOURNAL_PATH})")
+    parser.add_argument('--delta', action='store_true',
+                        help="journaled run that reports and mines only issues added since the last run")
+    parser.add_argument('--retry-empty', action='store_true',
+                        help="re-mine journaled issues that returned no developers")
+    parser.add_argument('--offline', action='store_true', default=github_api.OFFLINE,
+                        help="serve responses from the cache only")
+    parser.add_argument('--no-cache', action='store_true', help="disable the response cache")
+    parser.add_argument('--cache-ttl', type=int, default=github_api.CACHE_TTL,
+                        help="seconds a cached response is used without revalidation")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    github_api.configure_cache('' if args.no_cache else github_api.CACHE_PATH, args.cache_ttl, offline=args.offline)
+    journal_path = args.journal or (JOURNAL_PATH if args.delta else None)
+    with instrumentation.stage('mine_dev_info'):
+        main(args.input, args.output, args.workers, args.backend, journal_path, args.delta, args.retry_empty)
@@ -0,0 +1,108 @@
+"""
+mining_journal.py
+
+Checkpoint journal for mine_dev_info.py (--journal / --delta).
+
+Every mined issue is appended to a JSON-lines file as soon as it is finished, and flushed to disk, so an interrupted
+run loses at most the issues that were in flight. One line per issue:
+
+    {"issue": "joblib/joblib#105", "pr": false, "roles": [["bthirion", false, true, true, false], ...],
+     "events": [["bthirion", 2, 1318291200], ...]}
+
+with the role flags in the developer_info.csv column order (PR-author, BugReport-author, Commented, Reviewer) and the
+timestamped events (username, role bit, seconds since the epoch; see identity.DevRoles). Issues are keyed by
+(GitHub-Issue, PR), which is all that determines what is fetched; scenario metadata is taken from combined_issues.csv
+when developer_info.csv is written, so editing it never requires a re-mine.
+
+Issues that returned nothing (not found, or failed after retries) are journaled with an empty role list; pass
+retry_empty to mine them again. Entries journaled before events were recorded have no "events" field and are mined
+again, so developer_events.csv is complete (the response cache makes this cheap).
+"""
+
+import os
+import json
+import threading
+
+from identity import DevRoles
+
+
+class MiningJournal:
+    """Append-only, fsync'ed record of mined issues, loaded back on restart."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}  # (issue, pr) -> [[username, flags...], ...]
+        self.events = {}   # (issue, pr) -> [[username, role, seconds], ...], or None for entries without events
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        # A crash can leave a partial last line: cut it off so new entries start on a fresh line.
+        # That issue is simply mined again.
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            os.truncate(self.path, complete)
+        for line in data[:complete].decode('utf-8').splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self.entries[(entry['issue'], entry['pr'])] = entry['roles']
+            self.events[(entry['issue'], entry['pr'])] = entry.get('events')
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def pending(self, keys, retry_empty=False):
+        """Keys (deduplicated, in order) that still need mining."""
+        return [key for key in dict.fromkeys(keys)
+                if key not in self.entries or self.events.get(key) is None
+                or (retry_empty and not self.entries[key])]
+
+    def diff(self, keys):
+        """Compare the journal with the current issue list: (new, removed, unchanged) keys."""
+        current = dict.fromkeys(keys)
+        new = [key for key in current if key not in self.entries]
+        removed = [key for key in self.entries if key not in current]
+        unchanged = [key for key in current if key in self.entries]
+        return new, removed, unchanged
+
+    def record(self, key, dev_roles):
+        """Durably append the result of one issue."""
+        roles = [[username] + list(flags.values()) for username, flags in dev_roles.flags()]
+        events = [list(event) for event in dev_roles.events()]
+        line = json.dumps({'issue': key[0], 'pr': key[1], 'roles': roles, 'events': events}) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[key] = roles
+            self.events[key] = events
+
+    def dev_roles(self, key):
+        """The journaled result of one issue, as DevRoles in mining order."""
+        return DevRoles.from_flags(self.entries.get(key, []), events=self.events.get(key) or [])
+
+    def prune(self, keys):
+        """Rewrite the journal keeping only the given keys (atomically, via a temporary file)."""
+        keep = set(keys)
+        tmp_path = self.path + '.tmp'
+        with self._lock:
+            self.entries = {k: v for k, v in self.entries.items() if k in keep}
+            self.events = {k: v for k, v in self.events.items() if k in keep}
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for (issue, pr), roles in self.entries.items():
+                    entry = {'issue': issue, 'pr': pr, 'roles': roles}
+                    if self.events[(issue, pr)] is not None:
+                        entry['events'] = self.events[(issue, pr)]
+                    f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,418 @@
+"""
+mock_github_server.py
+
+A local stand-in for the GitHub REST API, used to exercise the mining scripts without a token or network access.
+
+The server answers the endpoints used by mine_dev_info.py with deterministic fake data derived from the owner, repo
+and issue number in the URL:
+    - GET /repos/{owner}/{repo}/issues/{number}
+    - GET /repos/{owner}/{repo}/issues/{number}/comments
+    - GET /repos/{owner}/{repo}/pulls/{number}/reviews
+    - POST /graphql, for the aliased issueOrPullRequest queries built by graphql_miner.py
+Whether a number is a pull request (has reviews) is also derived from the URL, so the REST and GraphQL views of an
+issue always agree.
+List endpoints are paginated like GitHub's (page/per_page, 30 items by default, at most 100, with a Link header), and
+every LONG_THREAD_EVERY-th issue has a long comment thread that spans several pages. Issue numbers divisible by
+NOT_FOUND_EVERY return 404, so error paths are covered too. An artificial per-request
+latency makes the effect of concurrency visible. With a rate limit set, every token gets that many requests per
+window, responses carry the X-RateLimit-* headers and exhausted tokens get 403 (GraphQL: 200 with a RATE_LIMITED
+error), like the real API. Successful responses carry an ETag; a matching If-None-Match gets a free 304.
+
+Running this file as a script is the harness for the miner: it mines ../data/combined_issues.csv against the mock
+sequentially and concurrently, then reruns it against the warm response cache (revalidating, then offline), checks
+that every run writes byte-identical developer_info.csv and developer_events.csv files, and prints timings and request
+counts. A last run mines through the GraphQL backend; the mock rejects GraphQL queries with more than 40 aliases, so
+batch splitting is covered.
+
+Usage:
+    python mock_github_server.py [--latency SECONDS] [--workers N] [--limit N] [--rate-limit N --rate-window SECONDS]
+"""
+
+import os
+import re
+import json
+import base64
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from urllib.parse import parse_qs, urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Issue numbers divisible by this value answer 404
+NOT_FOUND_EVERY = 97
+
+# Issues whose number is divisible by this value get a long comment thread
+LONG_THREAD_EVERY = 10
+
+# One thread in this many starts with a comment by a migration bot
+BOT_THREAD_EVERY = 5
+BOT_LOGIN = "numpy-gitbot"
+
+# One thread in this many ends with a comment by a GitHub App, which REST and GraphQL name differently
+APP_THREAD_EVERY = 7
+APP_LOGIN = "dependabot[bot]"
+
+# Pool of fake logins, so the same developer shows up across issues
+FAKE_USERS = [f"dev-{i:03d}" for i in range(60)]
+
+
+def _seed(*parts):
+    """Stable integer derived from the given parts."""
+    digest = hashlib.sha1("/".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return int(digest[:12], 16)
+
+
+def _user(seed):
+    return {"login": FAKE_USERS[seed % len(FAKE_USERS)], "type": "User"}
+
+
+def is_pull(owner, repo, number):
+    return _seed(owner, repo, number, "kind") % 4 != 0
+
+
+def fake_issue(base_url, owner, repo, number):
+    seed = _seed(owner, repo, number)
+    return {
+        "number": number,
+        "user": _user(seed),
+        "comments": len(fake_comments(owner, repo, number)),
+        "comments_url": f"{base_url}/repos/{owner}/{repo}/issues/{number}/comments",
+        "created_at": "2015-01-01T00:00:00Z",
+    }
+
+
+def fake_comments(owner, repo, number):
+    seed = _seed(owner, repo, number)
+    count = seed % 9
+    if number % LONG_THREAD_EVERY == 0:
+        count += 120 + seed % 150
+    comments = [{
+        "id": _seed(owner, repo, number, "comment", i),
+        "user": _user(_seed(seed, "comment", i)),
+        "body": f"Comment {i} on {owner}/{repo}#{number}",
+        "created_at": f"2015-01-{(i % 28) + 1:02d}T12:00:00Z",
+    } for i in range(count)]
+    # Some threads were migrated by a bot that mentions the original participants
+    if comments and seed % BOT_THREAD_EVERY == 0:
+        mentioned = _user(_seed(seed, "mention"))["login"]
+        comments[0].update(user={"login": BOT_LOGIN, "type": "User"},
+                           body=f"Original ticket reported by @{mentioned}\non the old tracker")
+    if comments and seed % APP_THREAD_EVERY == 0:
+        comments[-1].update(user={"login": APP_LOGIN, "type": "Bot"}, body="Bumps a dependency")
+    return comments
+
+
+def fake_reviews(owner, repo, number):
+    seed = _seed(owner, repo, number, "reviews")
+    return [{
+        "id": _seed(owner, repo, number, "review", i),
+        "user": _user(_seed(seed, "review", i)),
+        "state": "COMMENTED",
+        "submitted_at": f"2015-02-{(i % 28) + 1:02d}T12:00:00Z",
+    } for i in range(seed % 4)]
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    """Request handler; the owning server carries the configuration (latency, request counter)."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def log_message(self, format, *args):
+        pass  # keep the harness output readable
+
+    def _write(self, status, body, headers):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, extra_headers=None):
+        server = self.server
+        auth = self.headers.get("Authorization")
+        body = json.dumps(payload).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            # Conditional hit: like GitHub, not charged against the rate limit
+            server.count_not_modified()
+            return self._write(304, b"", {**server.consume_budget(auth, charge=False), "ETag": etag})
+
+        rate_headers = server.consume_budget(auth)
+        if rate_headers.get("X-RateLimit-Remaining") == -1:
+            rate_headers["X-RateLimit-Remaining"] = 0
+            if self.command == "POST":
+                # GraphQL refuses with a success status and a RATE_LIMITED error
+                return self._write(200, b'{"data": null, "errors": [{"type": "RATE_LIMITED", '
+                                        b'"message": "API rate limit exceeded"}]}', rate_headers)
+            return self._write(403, b'{"message": "API rate limit exceeded"}', rate_headers)
+
+        headers = {**rate_headers, **(extra_headers or {})}
+        if status == 200:
+            headers["ETag"] = etag
+        return self._write(status, body, headers)
+
+    def _send_page(self, items):
+        """Send one page of a list, with GitHub-style Link headers."""
+        path, _, query = self.path.partition("?")
+        params = parse_qs(query)
+        per_page = min(int(params.get("per_page", ["30"])[0]), 100)
+        page = int(params.get("page", ["1"])[0])
+        last = max(1, -(-len(items) // per_page))
+
+        def link(p, rel):
+            return f'<{self.server.base_url}{path}?{urlencode({"per_page": per_page, "page": p})}>; rel="{rel}"'
+
+        links = []
+        if page < last:
+            links += [link(page + 1, "next"), link(last, "last")]
+        if page > 1:
+            links += [link(1, "first"), link(page - 1, "prev")]
+        headers = {"Link": ", ".join(links)} if links else None
+        return self._send_json(200, items[(page - 1) * per_page:page * per_page], headers)
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = self.path.split("?")[0].strip("/").split("/")
+        # repos/{owner}/{repo}/(issues|pulls)/{number}[/comments|/reviews]
+        if len(parts) < 5 or parts[0] != "repos" or not parts[4].isdigit():
+            return self._send_json(404, {"message": "Not Found"})
+
+        owner, repo, kind, number = parts[1], parts[2], parts[3], int(parts[4])
+        if number % NOT_FOUND_EVERY == 0:
+            return self._send_json(404, {"message": "Not Found"})
+
+        tail = parts[5:]
+        if kind == "issues" and not tail:
+            return self._send_json(200, fake_issue(server.base_url, owner, repo, number))
+        if kind == "issues" and tail == ["comments"]:
+            return self._send_page(fake_comments(owner, repo, number))
+        if kind == "pulls" and tail == ["reviews"] and is_pull(owner, repo, number):
+            return self._send_page(fake_reviews(owner, repo, number))
+        return self._send_json(404, {"message": "Not Found"})
+
+
+    def do_POST(self):
+        server = self.server
+        server.count_request()
+        if server.latency:
+            time.sleep(server.latency)
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.split("?")[0].rstrip("/") != "/graphql":
+            return self._send_json(404, {"message": "Not Found"})
+        query = json.loads(body or b"{}").get("query", "")
+        return self._send_json(200, resolve_graphql(query, server.graphql_max_aliases))
+
+
+# --- GraphQL ---
+
+GRAPHQL_STRING = r'"(?:[^"\\]|\\.)*"'
+ALIAS_RE = re.compile(
+    rf'(\w+): repository\(owner: ({GRAPHQL_STRING}), name: ({GRAPHQL_STRING})\) '
+    rf'\{{ issueOrPullRequest\(number: (\d+)\) \{{ __typename (.*?) \}} \}}(?= \w+: repository\(| \}}$)')
+CONNECTION_RE = re.compile(rf'(comments|reviews)\(first: (\d+)(?:, after: ({GRAPHQL_STRING}))?\)')
+
+
+def _cursor(offset):
+    return base64.b64encode(f"cursor:{offset}".encode()).decode()
+
+
+def _offset(cursor):
+    return int(base64.b64decode(cursor).decode().split(":")[1]) if cursor else 0
+
+
+def graphql_actor(user):
+    """The GraphQL author of a REST user: apps are Bots, named without the "[bot]" suffix."""
+    if user["type"] == "Bot":
+        return {"__typename": "Bot", "login": user["login"].removesuffix("[bot]")}
+    return {"__typename": "User", "login": user["login"]}
+
+
+def graphql_node(item):
+    """The GraphQL node of a REST comment or review; a review was started (createdAt) before it was submitted."""
+    if "submitted_at" in item:
+        return {"author": graphql_actor(item["user"]), "createdAt": item["submitted_at"].replace("T12:", "T11:"),
+                "submittedAt": item["submitted_at"]}
+    return {"author": graphql_actor(item["user"]), "createdAt": item["created_at"]}
+
+
+def graphql_connection(items, first, after):
+    start = _offset(after)
+    page = items[start:start + first]
+    return {
+        "pageInfo": {"hasNextPage": start + first < len(items), "endCursor": _cursor(start + len(page))},
+        "nodes": [graphql_node(item) for item in page],
+    }
+
+
+def graphql_issue(owner, repo, number, selection):
+    """Resolve the issueOrPullRequest selection of one alias against the fake data."""
+    typename = "PullRequest" if is_pull(owner, repo, number) else "Issue"
+    # "... on Issue { ... } ... on PullRequest { ... }": keep the fragment matching the type
+    fragments = re.split(r"\.\.\. on (\w+) \{", selection)
+    fields = dict(zip(fragments[1::2], fragments[2::2])).get(typename, "")
+    issue = {"__typename": typename}
+    if fields.lstrip().startswith("author {"):
+        issue["author"] = graphql_actor(_user(_seed(owner, repo, number)))
+        issue["createdAt"] = fake_issue("", owner, repo, number)["created_at"]
+    for field, first, after in CONNECTION_RE.findall(fields):
+        items = fake_comments(owner, repo, number) if field == "comments" else fake_reviews(owner, repo, number)
+        issue[field] = graphql_connection(items, min(int(first), 100), json.loads(after) if after else None)
+    return issue
+
+
+def resolve_graphql(query, max_aliases=None):
+    """Answer an aliased query as GitHub would: data per alias, NOT_FOUND errors for missing issues."""
+    matches = ALIAS_RE.findall(query)
+    if max_aliases and len(matches) > max_aliases:
+        return {"data": None, "errors": [{"type": "MAX_NODE_LIMIT_EXCEEDED", "message": "Query too large"}]}
+    data, errors = {"rateLimit": {"cost": 1, "remaining": 4999}}, []
+    for alias, owner, repo, number, selection in matches:
+        owner, repo, number = json.loads(owner), json.loads(repo), int(number)
+        if number % NOT_FOUND_EVERY == 0:
+            data[alias] = {"issueOrPullRequest": None}
+            errors.append({"type": "NOT_FOUND", "path": [alias, "issueOrPullRequest"],
+                           "message": f"Could not resolve to an issue or pull request with the number of {number}."})
+        else:
+            data[alias] = {"issueOrPullRequest": graphql_issue(owner, repo, number, selection)}
+    return {"data": data, "errors": errors} if errors else {"data": data}
+
+
+class MockGitHubServer(ThreadingHTTPServer):
+    """
+    Threaded mock API server, usable as a context manager:
+
+        with MockGitHubServer(latency=0.05) as server:
+            os.environ['GITHUB_API_URL'] = server.base_url
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, port=0, rate_limit=None, rate_window=60, graphql_max_aliases=None):
+        super().__init__(("127.0.0.1", port), MockGitHubHandler)
+        self.latency = latency
+        self.graphql_max_aliases = graphql_max_aliases  # larger GraphQL queries are rejected
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.budgets = {}  # auth header -> [remaining, reset]
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified_count += 1
+
+    def consume_budget(self, auth, charge=True):
+        """Charge one request to the caller's token; return the rate-limit headers (Remaining -1 = refused)."""
+        if not self.rate_limit:
+            return {}
+        with self._lock:
+            now = time.time()
+            budget = self.budgets.get(auth)
+            if budget is None or now >= budget[1]:
+                budget = self.budgets[auth] = [self.rate_limit, int(now + self.rate_window) + 1]
+            if charge:
+                budget[0] -= 1
+            return {
+                "X-RateLimit-Limit": self.rate_limit,
+                "X-RateLimit-Remaining": max(budget[0], -1),
+                "X-RateLimit-Reset": budget[1],
+            }
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+# --- Harness ---
+
+def _run_miner(miner, input_csv, output_csv, workers, backend="rest"):
+    start = time.perf_counter()
+    miner.main(input_csv, output_csv, workers, backend)
+    return time.perf_counter() - start
+
+
+def run_harness(latency, workers, limit, rate_limit=None, rate_window=60):
+    with MockGitHubServer(latency=latency, rate_limit=rate_limit, rate_window=rate_window,
+                          graphql_max_aliases=40) as server:
+        # The API root is read at import time
+        os.environ["GITHUB_API_URL"] = server.base_url
+        import github_api
+        import mine_dev_info
+
+        with tempfile.TemporaryDirectory() as tmp:
+            input_csv = os.path.join(tmp, "combined_issues.csv")
+            with open("../data/combined_issues.csv", encoding="utf-8") as src, \
+                 open(input_csv, "w", encoding="utf-8") as dst:
+                for i, line in enumerate(src):
+                    if limit and i > limit:
+                        break
+                    dst.write(line)
+
+            # A private cache with TTL 0: every cached entry is revalidated
+            cache = github_api.configure_cache(os.path.join(tmp, "cache.sqlite"), ttl=0)
+            runs = [("Sequential", 1, "rest"), (f"Concurrent ({workers} workers)", workers, "rest"),
+                    (f"Revalidating rerun ({workers} workers)", workers, "rest"), ("Offline rerun", workers, "rest"),
+                    ("GraphQL batches", workers, "graphql")]
+            outputs, report = [], []
+            for i, (label, n, backend) in enumerate(runs):
+                if i == 1:
+                    cache.clear()  # the concurrent run starts cold, like the sequential one
+                if i == 3:
+                    cache.offline = True
+                output_csv = os.path.join(tmp, f"run{i}.csv")
+                before, before_304 = server.request_count, server.not_modified_count
+                elapsed = _run_miner(mine_dev_info, input_csv, output_csv, n, backend)
+                report.append(f"{label}: {elapsed:.2f}s ({server.request_count - before} requests, "
+                              f"{server.not_modified_count - before_304} answered 304)")
+                with open(output_csv, "rb") as f, open(os.path.join(tmp, "developer_events.csv"), "rb") as events:
+                    outputs.append(f.read() + events.read())
+            github_api.configure_cache("")
+
+    identical = all(output == outputs[0] for output in outputs)
+    print()
+    print("\n".join(report))
+    print(f"Outputs identical: {identical}")
+    return identical
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run mine_dev_info.py against a local mock GitHub API.")
+    parser.add_argument("--latency", type=float, default=0.02, help="artificial latency per request (seconds)")
+    parser.add_argument("--workers", type=int, default=8, help="workers for the concurrent run")
+    parser.add_argument("--limit", type=int, default=0, help="only mine the first N issues (0 = all)")
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests per token per window")
+    parser.add_argument("--rate-window", type=int, default=60, help="rate-limit window (seconds)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ok = run_harness(args.latency, args.workers, args.limit, args.rate_limit, args.rate_window)
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,417 @@
+"""
+pipeline.py
+
+Single entry point for the data pipeline. The scripts are modelled as a DAG of stages with declared inputs and outputs
+(paths in ../data); a stage depends on the stages producing its inputs:
+
+    extract_issues -> mine_dev_info -> filter_bots -+-> process_developer_involvement -+
+                                                    +-> derive_dev_affiliation --------+
+                                                    +-> data_analysis                  |
+         network_metrics, betweenness, communities, resampling (network-analysis/) <---+
+    mine_dev_info + filter_bots -> temporal_network (network-analysis/)
+
+A stage is skipped when the content hashes of its inputs, its script, the repo-local modules the script imports
+(directly or indirectly, e.g. columnar.py or dev_network.py) and its parameters (arguments and DATA_FORMAT) are the
+same as in its last successful run and its outputs are still the files that run wrote. Stages whose
+dependencies are done run concurrently (e.g. derive_dev_affiliation and process_developer_involvement, which both
+read developer_info_cleaned.csv). A stage whose inputs do not exist and are not produced by any stage of the run
+keeps its existing outputs (e.g. extract_issues without the Excel workbook).
+
+mine_dev_info is opt-in: it needs GitHub tokens and hours of API calls, so it only runs when named with --only or
+--force, and otherwise keeps its outputs like a stage without inputs. Stages with no recorded run whose outputs
+already exist (the data tracked in git, on a fresh checkout) adopt them as their last run instead of rebuilding
+them, unless a stage they depend on ran; stages that need an input only an opt-in stage produces are reported as
+unavailable.
+
+Each stage runs its script as a subprocess from the script's directory, so the scripts' ../data paths keep working;
+the output goes to ../data/pipeline_logs/<stage>.log. Hashes, parameters and per-stage timings are recorded in
+../data/pipeline_state.json, and a timing summary is printed at the end.
+
+Usage:
+    python pipeline.py [--jobs N] [--only STAGE ...] [--force STAGE ...] [--args STAGE "ARGS"] [--dry-run] [--list]
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import shlex
+import hashlib
+import argparse
+import functools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import columnar
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(REPO_ROOT, 'data')
+STATE_PATH = os.path.join(DATA_DIR, 'pipeline_state.json')
+LOG_DIR = os.path.join(DATA_DIR, 'pipeline_logs')
+
+HASH_CHUNK = 1 << 20
+
+
+class Stage:
+    """One script of the pipeline with the data files it reads and writes (names relative to ../data)."""
+
+    __slots__ = ('name', 'script', 'inputs', 'outputs', 'args', 'opt_in')
+
+    def __init__(self, name, script, inputs, outputs, args=(), opt_in=False):
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+        self.opt_in = opt_in  # only runs when asked for with --only/--force
+
+    @property
+    def script_path(self):
+        return os.path.join(REPO_ROOT, self.script)
+
+    def command(self):
+        return [sys.executable, os.path.basename(self.script_path)] + self.args
+
+    def params(self):
+        return {'args': self.args, 'data_format': columnar.DATA_FORMAT}
+
+
+STAGES = [
+    Stage('extract_issues', 'scripts-data-generation/extract_issues.py',
+          ['CPCB_patterns_final.xlsx'], ['combined_issues.csv']),
+    Stage('mine_dev_info', 'scripts-data-generation/mine_dev_info.py',
+          ['combined_issues.csv'], ['developer_info.csv', 'developer_events.csv', 'account_types.csv'], opt_in=True),
+    Stage('filter_bots', 'scripts-data-generation/filter_bots.py',
+          ['developer_info.csv', 'account_types.csv'], ['developer_info_cleaned.csv', 'suspicious_bots.csv']),
+    Stage('process_developer_involvement', 'scripts-data-generation/process_developer_involvement.py',
+          ['developer_info_cleaned.csv'], ['downstream_driven.csv', 'upstream_driven.csv']),
+    Stage('derive_dev_affiliation', 'scripts-data-generation/derive_dev_affiliation.py',
+          ['developer_info_cleaned.csv'], ['dev_affiliations_v2.csv']),
+    Stage('data_analysis', 'scripts-data-generation/data_analysis.py',
+          ['combined_issues.csv', 'developer_info_cleaned.csv'], ['data_analysis.json']),
+    Stage('network_metrics', 'network-analysis/network_metrics.py',
+          ['downstream_driven.csv', 'upstream_driven.csv'], ['network_metrics.json']),
+    Stage('betweenness', 'network-analysis/betweenness.py',
+          ['downstream_driven.csv', 'upstream_driven.csv'],
+          ['downstream_driven_betweenness.csv', 'upstream_driven_betweenness.csv']),
+    Stage('communities', 'network-analysis/communities.py',
+          ['downstream_driven.csv', 'upstream_driven.csv', 'dev_affiliations_v2.csv'],
+          ['downstream_driven_communities.csv', 'upstream_driven_communities.csv', 'community_stability.json'],
+          ['--affiliations', '../data/dev_affiliations_v2.csv']),
+    Stage('resampling', 'network-analysis/resampling.py',
+          ['downstream_driven.csv', 'upstream_driven.csv'], ['resampling_tests.json']),
+    Stage('temporal_network', 'network-analysis/temporal_network.py',
+          ['developer_events.csv', 'developer_info_cleaned.csv'], ['temporal_network_metrics.csv']),
+]
+
+
+# --- Content hashes ---
+
+def data_path(name, reading=True):
+    """Actual location of a data file: stage tables live wherever DATA_FORMAT puts them (see columnar.py)."""
+    path = os.path.join(DATA_DIR, name)
+    if not name.endswith('.csv'):
+        return path
+    return columnar.resolve(path) if reading else columnar.stage_path(path)
+
+
+def _file_digest(path, digest):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(block)
+
+
+class Hasher:
+    """sha256 of files and directories, reusing the hash recorded for a file whose size and mtime are unchanged."""
+
+    def __init__(self, known=None):
+        self.known = known or {}  # path -> {'size', 'mtime_ns', 'sha256'}
+
+    def _stat_key(self, path):
+        if os.path.isdir(path):
+            stats = [os.stat(os.path.join(path, f)) for f in sorted(os.listdir(path))]
+            return sum(s.st_size for s in stats), max((s.st_mtime_ns for s in stats), default=0)
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def hash(self, path):
+        """Content hash of a file or directory, or None if it does not exist."""
+        if not os.path.exists(path):
+            return None
+        size, mtime_ns = self._stat_key(path)
+        known = self.known.get(path)
+        if known and known['size'] == size and known['mtime_ns'] == mtime_ns:
+            return known['sha256']
+        digest = hashlib.sha256()
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                digest.update(name.encode('utf-8') + b'\0')
+                _file_digest(os.path.join(path, name), digest)
+        else:
+            _file_digest(path, digest)
+        self.known[path] = {'size': size, 'mtime_ns': mtime_ns, 'sha256': digest.hexdigest()}
+        return self.known[path]['sha256']
+
+
+# --- State ---
+
+def load_state(path=STATE_PATH):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {'stages': {}, 'files': {}}
+
+
+def save_state(state, path=STATE_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _imported_names(path):
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):  # also the imports inside functions
+        if isinstance(node, ast.Import):
+            yield from (alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            yield node.module.split('.')[0]
+
+
+@functools.lru_cache(maxsize=None)
+def local_modules(script_path):
+    """
+    Source files of the repo-local modules a script imports, directly or through other local modules. They are
+    looked up like the script finds them: next to it first, then in scripts-data-generation/.
+    """
+    search = [os.path.dirname(script_path), SCRIPT_DIR]
+    found, pending = set(), [script_path]
+    while pending:
+        for name in _imported_names(pending.pop()):
+            path = next((p for p in (os.path.join(d, name + '.py') for d in search) if os.path.exists(p)), None)
+            if path and path != script_path and path not in found:
+                found.add(path)
+                pending.append(path)
+    return tuple(sorted(found))
+
+
+def fingerprint(stage, hasher):
+    """Everything a stage's result depends on: input contents, source of the script and its modules, parameters."""
+    return {
+        'inputs': {name: hasher.hash(data_path(name)) for name in stage.inputs},
+        'script': hasher.hash(stage.script_path),
+        'modules': {os.path.relpath(path, REPO_ROOT): hasher.hash(path) for path in local_modules(stage.script_path)},
+        'params': stage.params(),
+    }
+
+
+def outputs_intact(stage, record, hasher):
+    return all(hasher.hash(data_path(name, reading=False)) == record['outputs'].get(name)
+               for name in stage.outputs)
+
+
+# --- Scheduling ---
+
+def select(stages, only=None):
+    if not only:
+        return list(stages)
+    unknown = set(only) - {s.name for s in stages}
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    return [s for s in stages if s.name in only]
+
+
+def dependencies(stages):
+    """stage name -> names of the stages (of this run) producing its inputs."""
+    producers = {output: s.name for s in stages for output in s.outputs}
+    return {s.name: {producers[i] for i in s.inputs if i in producers and producers[i] != s.name} for s in stages}
+
+
+def run_stage(stage):
+    """Run one stage's script; returns (returncode, seconds). Its output goes to the stage log."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    start = time.perf_counter()
+    with open(os.path.join(LOG_DIR, f"{stage.name}.log"), 'w', encoding='utf-8') as log:
+        process = subprocess.run(stage.command(), cwd=os.path.dirname(stage.script_path),
+                                 stdout=log, stderr=subprocess.STDOUT)
+    return process.returncode, time.perf_counter() - start
+
+
+# Stages decided without running: reason -> (status, message)
+SKIPS = {
+    None: ('skipped', "up to date"),
+    'adopted': ('skipped', "no recorded run, existing outputs adopted as up to date"),
+    'kept': ('kept', "inputs unavailable, keeping outputs"),
+    'opt-in': ('skipped', "opt-in stage, not run (run it with --only or --force {name})"),
+}
+
+
+class Pipeline:
+    def __init__(self, stages=STAGES, jobs=2, force=(), dry_run=False, state_path=STATE_PATH, only=()):
+        self.stages = {s.name: s for s in stages}
+        self.deps = dependencies(stages)
+        self.jobs = jobs
+        self.force = set(force)
+        self.requested = set(only) | self.force  # opt-in stages asked for
+        self.dry_run = dry_run
+        self.state_path = state_path
+        self.state = load_state(state_path)
+        self.hasher = Hasher(self.state.get('files'))
+        self.status = {}   # name -> 'ran' | 'skipped' | 'kept' | 'unavailable' | 'failed' | 'blocked' | 'would run'
+        self.timings = {}  # name -> seconds
+
+    def runs(self, stage):
+        return not stage.opt_in or stage.name in self.requested
+
+    def decide(self, stage):
+        """
+        Why a stage runs, or None if it can be skipped; a SKIPS reason if it does not run for another reason, or
+        'unavailable' if it has no outputs and an input that only a stage left out of the run produces is missing.
+        """
+        outputs = [os.path.exists(data_path(o, reading=False)) for o in stage.outputs]
+        if not self.runs(stage):
+            return 'opt-in'
+        produced = {o for s in self.stages.values() if self.runs(s) for o in s.outputs}
+        missing = [i for i in stage.inputs if i not in produced and not os.path.exists(data_path(i))]
+        if missing:
+            if any(outputs):
+                return 'kept'
+            if all(i in {o for s in self.stages.values() for o in s.outputs} for i in missing):
+                return 'unavailable'
+            raise FileNotFoundError(f"{stage.name}: missing input(s) {', '.join(missing)}")
+        if stage.name in self.force:
+            return 'forced'
+        record = self.state['stages'].get(stage.name)
+        if record is None:
+            # Adopt outputs present before any recorded run, unless a dependency ran and may have changed them
+            if all(outputs) and not any(self.status[d] in ('ran', 'would run') for d in self.deps[stage.name]):
+                self.record(stage, None)
+                return 'adopted'
+            return 'never run'
+        current = fingerprint(stage, self.hasher)
+        for key, reason in (('script', 'script changed'), ('modules', 'imported modules changed'),
+                            ('params', 'parameters changed'), ('inputs', 'inputs changed')):
+            if record.get(key) != current[key]:
+                return reason
+        if not outputs_intact(stage, record, self.hasher):
+            return 'outputs changed'
+        return None
+
+    def record(self, stage, seconds):
+        entry = fingerprint(stage, self.hasher)
+        entry['outputs'] = {name: self.hasher.hash(data_path(name, reading=False)) for name in stage.outputs}
+        entry['seconds'] = None if seconds is None else round(seconds, 3)  # None: adopted, not run
+        entry['finished_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.state['stages'][stage.name] = entry
+        self.state['files'] = self.hasher.known
+        if not self.dry_run:
+            save_state(self.state, self.state_path)
+
+    def start(self, pool, name):
+        """Decide on a stage whose dependencies are done; return a future if it has to run."""
+        stage = self.stages[name]
+        if any(self.status[d] in ('failed', 'blocked') for d in self.deps[name]):
+            self.status[name] = 'blocked'
+            print(f"⏭️  {name}: blocked by a failed dependency")
+            return None
+        try:
+            if self.dry_run and any(self.status[d] == 'would run' for d in self.deps[name]):
+                reason = 'a dependency would run'
+            else:
+                reason = self.decide(stage)
+        except FileNotFoundError as e:
+            self.status[name] = 'failed'
+            print(f"❌ {e}")
+            return None
+        if reason in SKIPS:
+            self.status[name], message = SKIPS[reason]
+            print(f"⏭️  {name}: " + message.format(name=name))
+            return None
+        if reason == 'unavailable':
+            self.status[name] = 'unavailable'
+            print(f"⏭️  {name}: inputs unavailable (produced by a stage that did not run), no outputs")
+            return None
+        if self.dry_run:
+            self.status[name] = 'would run'
+            print(f"▶️  {name}: would run ({reason})")
+            return None
+        print(f"▶️  {name}: running ({reason})")
+        return pool.submit(run_stage, stage)
+
+    def run(self):
+        pending = dict(self.deps)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                # Stages decided without running (skipped, blocked) can make further stages ready at once
+                ready = True
+                while ready:
+                    ready = [n for n, deps in pending.items() if all(d in self.status for d in deps)]
+                    for name in ready:
+                        del pending[name]
+                        future = self.start(pool, name)
+                        if future is not None:
+                            running[future] = name
+                if not running:
+                    if pending:  # cannot happen with a DAG; guards against a cycle in the declarations
+                        raise RuntimeError(f"Unschedulable stages: {', '.join(pending)}")
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    returncode, seconds = future.result()
+                    self.timings[name] = seconds
+                    if returncode == 0:
+                        self.status[name] = 'ran'
+                        self.record(self.stages[name], seconds)
+                        print(f"✅ {name}: done in {seconds:.2f}s")
+                    else:
+                        self.status[name] = 'failed'
+                        print(f"❌ {name}: exit code {returncode}, see {os.path.join(LOG_DIR, name + '.log')}")
+        return all(status != 'failed' for status in self.status.values())
+
+    def summary(self):
+        print(f"\n{'stage':<32} {'status':<10} {'seconds':>8}   (last run)")
+        for name in self.stages:
+            last = self.state['stages'].get(name, {}).get('seconds')
+            seconds = f"{self.timings[name]:.2f}" if name in self.timings else '-'
+            print(f"{name:<32} {self.status.get(name, '-'):<10} {seconds:>8}   "
+                  f"({'-' if last is None else f'{last:.2f}s'})")
+        print(f"Total stage time this run: {sum(self.timings.values()):.2f}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the data pipeline, skipping stages whose inputs are unchanged.")
+    parser.add_argument('--jobs', type=int, default=2, help="stages run concurrently")
+    parser.add_argument('--only', nargs='+', metavar='STAGE', help="run only these stages (their inputs as given)")
+    parser.add_argument('--force', nargs='+', metavar='STAGE', default=[], help="rerun these stages regardless")
+    parser.add_argument('--args', nargs=2, action='append', metavar=('STAGE', 'ARGS'), default=[],
+                        help="extra command-line arguments for a stage, e.g. --args mine_dev_info '--workers 4'")
+    parser.add_argument('--dry-run', action='store_true', help="only report what would run")
+    parser.add_argument('--list', action='store_true', help="list the stages and their inputs and outputs")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    stages = {s.name: s for s in STAGES}
+    if args.list:
+        for s in STAGES:
+            print(f"{s.name}: {', '.join(s.inputs) or '-'} -> {', '.join(s.outputs) or '(console)'}")
+        return 0
+    for name, extra in args.args:
+        if name not in stages:
+            raise SystemExit(f"Unknown stage: {name}")
+        stages[name].args += shlex.split(extra)
+
+    pipeline = Pipeline(select(STAGES, args.only), args.jobs, args.force, args.dry_run, only=args.only or ())
+    ok = pipeline.run()
+    pipeline.summary()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,60 +3,111 @@ Script to process developer_info_cleaned.csv and generate two separate CSVs:
 - downstream_driven.csv: scenarios with Downstream-driven-fix = True
 - upstream_driven.csv: scenarios with Downstream-driven-fix = False
 
-Groups by Username + Scenario + Project (derived from Issue field)
+Groups by Username + Scenario + Project (the lowercased owner/repo of the Issue field, see identity.py)
 Computes max_inv (maximum involvement score) for each group.
+
+With --chunksize N the input is streamed N rows at a time: each chunk is reduced to its per-group maxima, which are
+merged into a running aggregate, so memory is bounded by the number of groups rather than the size of the input.
+Both modes write the same files. Chunked streaming applies to CSV input; with DATA_FORMAT=columnar (see columnar.py)
+the input columns are memory-mapped and the outputs are written in that format.
+
+Usage:
+    python process_developer_involvement.py [--input PATH] [--output-dir DIR] [--chunksize N]
 """
 
-import pandas as pd
 import os
+import argparse
+
+import pandas as pd
+
+import columnar
+import identity
+import instrumentation
+
+ROLE_COLUMNS = ['PR-author', 'BugReport-author', 'Commented', 'Reviewer']
+GROUP_COLUMNS = ['Username', 'Scenario', 'project', 'Downstream-driven-fix']
+# Only these columns are read from the input
+INPUT_COLUMNS = ['Username', 'Issue', 'Scenario', 'Downstream-driven-fix'] + ROLE_COLUMNS
+OUTPUT_COLUMNS = ['username', 'project', 'scenario', 'max_inv']
+# Flag values as written in the tables (compared lowercased); anything else, missing values included, is neither
+TRUE_TEXT = ['true', '1', 'yes']
+FALSE_TEXT = ['false', '0', 'no']
 
 
-def calculate_involvement(row):
+def flags(column, text=TRUE_TEXT):
+    """Boolean array of a flag column: where its value is one of `text` (True/False for a boolean column)."""
+    if column.dtype == bool:
+        values = column.to_numpy()
+        return values if text is TRUE_TEXT else ~values
+    return column.astype(str).str.strip().str.lower().isin(text).to_numpy()
+
+
+@instrumentation.timed()
+def calculate_involvement(df):
     """
-    Calculate involvement score for a row.
+    Calculate the involvement score of every row.
     - If PR-author is True: score = 3
     - If PR-author is False and any of (BugReport-author, Commented, Reviewer) is True: score = 2
     - Otherwise: score = 0
     """
-    if row['PR-author']:
-        return 3
-    elif row['BugReport-author'] or row['Commented'] or row['Reviewer']:
-        return 2
-    else:
-        return 0
+    pr_author = flags(df['PR-author'])
+    other_role = flags(df['BugReport-author']) | flags(df['Commented']) | flags(df['Reviewer'])
+    return pd.Series(3 * pr_author + 2 * (~pr_author & other_role), index=df.index)
 
 
-def extract_project(issue):
+@instrumentation.timed()
+def max_involvement(df):
     """
-    Extract project name from Issue field.
-    Project is the string before the # character.
-    Example: 'joblib/joblib#105' -> 'joblib/joblib'
+    Maximum involvement score per (Username, Scenario, project, Downstream-driven-fix), as a Series.
+    Usernames and projects are interned IDs (see identity.py); the project of 'JOBLIB/joblib#105' is 'joblib/joblib'.
     """
-    return issue.split('#')[0]
+    ids = identity.identities()
+    df = df.assign(Username=ids.users.encode(df['Username']), project=identity.project_ids(df['Issue'], ids.projects),
+                   involvement=calculate_involvement(df))
+    # Rows without a username or issue have no group, as with a groupby on the strings
+    df = df[(df['Username'].to_numpy() >= 0) & (df['project'].to_numpy() >= 0)]
+    return df.groupby(GROUP_COLUMNS, sort=False)['involvement'].max()
 
 
-def process_developer_info(input_file, output_dir):
+@instrumentation.timed()
+def stream_max_involvement(input_file, chunksize):
+    """max_involvement of the whole file, computed chunk by chunk."""
+    running = None
+    for chunk in pd.read_csv(input_file, usecols=INPUT_COLUMNS, chunksize=chunksize):
+        instrumentation.count('input_chunks')
+        partial = max_involvement(chunk)
+        if running is None:
+            running = partial
+        else:
+            # Groups seen in several chunks keep the largest of their partial maxima
+            running = pd.concat([running, partial]).groupby(level=GROUP_COLUMNS, sort=False).max()
+    return running
+
+
+def process_developer_info(input_file, output_dir, chunksize=None):
     """
     Process the developer_info_cleaned.csv file and generate two output CSVs.
     
     Args:
         input_file: Path to the input CSV file
         output_dir: Directory where output files will be saved
+        chunksize: If given, stream the input this many rows at a time instead of loading it whole
     """
-    # Read the input CSV
-    df = pd.read_csv(input_file)
-    
-    # Extract project from Issue field
-    df['project'] = df['Issue'].apply(extract_project)
-    
-    # Calculate involvement score for each row
-    df['involvement'] = df.apply(calculate_involvement, axis=1)
-    
-    # Group by Username, Scenario, Project, and Downstream-driven-fix
-    # Calculate the maximum involvement score for each group
-    grouped = df.groupby(['Username', 'Scenario', 'project', 'Downstream-driven-fix']).agg({
-        'involvement': 'max'
-    }).reset_index()
+    source = columnar.resolve(input_file)
+    if chunksize and columnar.format_of(source) == 'csv':
+        max_inv = stream_max_involvement(source, chunksize)
+    else:
+        max_inv = max_involvement(columnar.read_table(source, INPUT_COLUMNS))
+
+    # Sort the groups by Username, Scenario, Project, and Downstream-driven-fix (names as strings), as groupby does
+    ids = identity.identities()
+    grouped = max_inv.reset_index()
+    grouped = grouped.assign(
+        user_rank=ids.users.collation()[grouped['Username'].to_numpy()],
+        project_rank=ids.projects.collation()[grouped['project'].to_numpy()],
+    ).sort_values(['user_rank', 'Scenario', 'project_rank', 'Downstream-driven-fix'], ignore_index=True)
+    grouped['Username'] = ids.users.decode(grouped['Username'].to_numpy())
+    grouped['project'] = ids.projects.decode(grouped['project'].to_numpy())
     
     # Rename columns to match output format
     grouped = grouped.rename(columns={
@@ -65,16 +116,16 @@ def process_developer_info(input_file, output_dir):
         'Scenario': 'scenario'
     })
     
-    # Split into downstream-driven and upstream-driven
-    downstream_df = grouped[grouped['Downstream-driven-fix'] == True][['username', 'project', 'scenario', 'max_inv']]
-    upstream_df = grouped[grouped['Downstream-driven-fix'] == False][['username', 'project', 'scenario', 'max_inv']]
+    # Split into downstream-driven and upstream-driven; groups with a malformed flag go to neither
+    downstream_df = grouped.loc[flags(grouped['Downstream-driven-fix']), OUTPUT_COLUMNS]
+    upstream_df = grouped.loc[flags(grouped['Downstream-driven-fix'], FALSE_TEXT), OUTPUT_COLUMNS]
     
     # Save to CSV files
-    downstream_output = os.path.join(output_dir, 'downstream_driven.csv')
-    upstream_output = os.path.join(output_dir, 'upstream_driven.csv')
-    
-    downstream_df.to_csv(downstream_output, index=False)
-    upstream_df.to_csv(upstream_output, index=False)
+    with instrumentation.timer('write_involvement'):
+        downstream_output = columnar.write_stage(downstream_df, os.path.join(output_dir, 'downstream_driven.csv'))
+        upstream_output = columnar.write_stage(upstream_df, os.path.join(output_dir, 'upstream_driven.csv'))
+    instrumentation.count('involvement_rows', len(downstream_df), split='downstream')
+    instrumentation.count('involvement_rows', len(upstream_df), split='upstream')
     
     print(f"Processing complete!")
     print(f"Downstream-driven records: {len(downstream_df)}")
@@ -84,13 +135,24 @@ def process_developer_info(input_file, output_dir):
     print(f"  - {upstream_output}")
 
 
-if __name__ == "__main__":
+def parse_args():
     # Define paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
     data_dir = os.path.join(project_root, 'data')
-    
-    input_file = os.path.join(data_dir, 'developer_info_cleaned.csv')
-    
+
+    parser = argparse.ArgumentParser(description="Compute max involvement per developer, scenario and project.")
+    parser.add_argument('--input', default=os.path.join(data_dir, 'developer_info_cleaned.csv'),
+                        help="cleaned developer info CSV")
+    parser.add_argument('--output-dir', default=data_dir, help="directory for the two output CSVs")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="stream the input this many rows at a time (default: load it whole)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
     # Process the data
-    process_developer_info(input_file, data_dir)
+    with instrumentation.stage('process_developer_involvement'):
+        process_developer_info(args.input, args.output_dir, args.chunksize)
@@ -0,0 +1,494 @@
+"""
+query_store.py
+
+An indexed in-memory store over the mined dataset, to answer "which issues did dev X touch", "who participated in
+scenario 33" or "which developers span joblib and scikit-learn" without rescanning the CSVs for every question.
+
+The tables are loaded once (developer_info_cleaned.csv, combined_issues.csv and dev_affiliations_primary.csv, or
+their DATA_FORMAT versions, see columnar.py). Usernames, issues, projects and scenarios are interned into dense IDs
+(identity.Interner), and every index is a hash map from an ID to a bitmap of IDs, held as a Python int (bit k set:
+ID k is in the set):
+
+    developer -> issues, projects, scenarios     issue -> developers      project -> developers, issues
+    scenario -> developers, issues               role -> developers       primary affiliation -> developers
+    fix type / pattern / downstream-driven -> issues
+
+plus developer -> affiliation rows and the role mask of every (issue, developer). A lookup is one dict access, and
+intersections, unions and differences are one big-integer &, |, & ~ over (number of IDs / 64) machine words, so set
+queries take microseconds; bitmaps are only decoded to names for the answer.
+
+Set expressions combine terms with & (and), | (or) and - (and not), separated by spaces and evaluated left to right:
+
+    developers  project:joblib/joblib & project:scikit-learn/scikit-learn - affiliation:joblib/joblib
+    issues      developer:ogrisel & developer:GaelVaroquaux & downstream:true
+
+Developer terms: all, developer:NAME, issue:REF, project:OWNER/REPO, scenario:N, affiliation:OWNER/REPO (primary
+affiliation), role:ROLE (PR-author, BugReport-author, Commented, Reviewer). Issue terms: all, issue:REF,
+developer:NAME, project:OWNER/REPO, scenario:N, fix-type:PF8, pattern:PS1, downstream:true|false. Unknown values
+select nobody and are listed in the answer.
+
+Usage:
+    python query_store.py developer NAME | issue REF | scenario N | project OWNER/REPO
+    python query_store.py developers EXPR | issues EXPR
+    python query_store.py shell                      # one query per line, e.g. "developers scenario:33 & role:Reviewer"
+    python query_store.py serve [--host HOST] [--port PORT]
+        GET /developer/NAME, /issue/OWNER/REPO%23N, /scenario/N, /project/OWNER/REPO,
+            /developers?q=EXPR, /issues?q=EXPR, /stats
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import columnar
+import identity
+import instrumentation
+
+INFO_CSV = '../data/developer_info_cleaned.csv'
+ISSUES_CSV = '../data/combined_issues.csv'
+AFFILIATIONS_CSV = '../data/dev_affiliations_primary.csv'
+
+DEFAULT_PORT = 8765
+
+OPERATORS = ('&', '|', '-')
+DOMAINS = ('developers', 'issues')
+LOOKUPS = ('developer', 'issue', 'scenario', 'project')
+
+
+# --- Bitmaps ---
+
+def bitmaps(keys, members):
+    """{key: bitmap} of parallel arrays of key and member IDs: bit m of a key's bitmap is set for each member m."""
+    keys = np.asarray(keys, dtype=np.int64)
+    members = np.asarray(members, dtype=np.int64)
+    if not len(keys):
+        return {}
+    order = np.lexsort((members, keys))
+    keys, members = keys[order], members[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    result = {}
+    for key, start, end in zip(keys[starts].tolist(), starts.tolist(), ends.tolist()):
+        ids = members[start:end]
+        packed = np.zeros(ids[-1] // 8 + 1, dtype=np.uint8)
+        np.bitwise_or.at(packed, ids >> 3, np.left_shift(1, ids & 7).astype(np.uint8))
+        result[key] = int.from_bytes(packed.tobytes(), 'little')
+    return result
+
+
+def members(bitmap):
+    """The IDs in a bitmap, ascending."""
+    if not bitmap:
+        return np.empty(0, dtype=np.int64)
+    packed = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(packed, bitorder='little'))
+
+
+def full(n):
+    """The bitmap of IDs 0 .. n-1."""
+    return (1 << n) - 1
+
+
+# --- Store ---
+
+def _scenario(value):
+    return str(value).strip()
+
+
+def _lower(value):
+    return value.strip().lower()
+
+
+def _strip(value):
+    return value.strip()
+
+
+def _label(prefix):
+    return lambda value: prefix + _lower(value)
+
+
+# domain -> term kind -> (interner attribute, index of the domain, key normalization); index None: the element itself
+TERMS = {
+    'developers': {
+        'developer': ('users', None, _strip),
+        'issue': ('issues', 'issue', _strip),
+        'project': ('projects', 'project', _lower),
+        'scenario': ('scenarios', 'scenario', _scenario),
+        'affiliation': ('projects', 'affiliation', _lower),
+        'role': ('roles', 'role', _lower),
+    },
+    'issues': {
+        'issue': ('issues', None, _strip),
+        'developer': ('users', 'developer', _strip),
+        'project': ('projects', 'project', _lower),
+        'scenario': ('scenarios', 'scenario', _scenario),
+        'fix-type': ('labels', 'label', _label('fix-type:')),
+        'pattern': ('labels', 'label', _label('pattern:')),
+        'downstream': ('labels', 'label', _label('downstream:')),
+    },
+}
+
+
+class QueryStore:
+    """The loaded tables and their bitmap indexes (see the module docstring)."""
+
+    __slots__ = ('users', 'issues', 'projects', 'scenarios', 'roles', 'labels', 'index', 'issue_project',
+                 'issue_records', 'affiliations', 'pair_issues', 'pair_users', 'pair_masks')
+
+    def __init__(self, info, issues, affiliations):
+        self.users = identity.Interner()
+        self.issues = identity.Interner()
+        self.projects = identity.Interner()
+        self.scenarios = identity.Interner()
+        self.roles = identity.Interner(role.lower() for role in identity.ROLES)
+        self.labels = identity.Interner()  # "fix-type:PF8", "pattern:PS1", "downstream:true"
+
+        info_users = self.users.encode(info['Username'])
+        info_issues = self.issues.encode(info['Issue'])
+        info_scenarios = self.scenarios.encode(info['Scenario'].map(_scenario))
+        issue_ids = self.issues.encode(issues['GitHub-Issue'])
+        issue_scenarios = self.scenarios.encode(issues['Scenario'].map(_scenario))
+        affiliation_users = self.users.encode(affiliations['Username'])
+        affiliation_projects = self.projects.encode(affiliations['Project'].str.lower())
+        self.issue_project = identity.project_ids(pd.Series(self.issues.values, dtype=object), self.projects)
+        info_projects = self.issue_project[info_issues]
+
+        # Role mask of every (issue, developer), OR-ed over the scenarios an issue is listed under
+        masks = sum(np.where(info[role].to_numpy(dtype=bool), bit, 0) for role, bit in identity.ROLE_BITS.items())
+        pairs, inverse = np.unique(info_issues.astype(np.int64) * len(self.users) + info_users, return_inverse=True)
+        self.pair_masks = np.zeros(len(pairs), dtype=np.uint8)
+        np.bitwise_or.at(self.pair_masks, inverse, masks.astype(np.uint8))
+        self.pair_issues, self.pair_users = np.divmod(pairs, len(self.users))
+        role_users = [self.pair_users[self.pair_masks & bit > 0] for bit in identity.ROLE_BITS.values()]
+
+        label_ids = [self.labels.encode(prefix + issues[column].astype(str).str.lower())
+                     for prefix, column in (('fix-type:', 'Fix-type'), ('pattern:', 'Pattern-Structure'),
+                                            ('downstream:', 'Downstream-driven-fix'))]
+        primary = (affiliations['AffiliationType'] == 'primary').to_numpy()
+        known = self.issue_project >= 0
+
+        self.index = {
+            'developers': {
+                'issue': bitmaps(info_issues, info_users),
+                'project': bitmaps(info_projects, info_users),
+                'scenario': bitmaps(info_scenarios, info_users),
+                'affiliation': bitmaps(affiliation_projects[primary], affiliation_users[primary]),
+                'role': bitmaps(np.repeat(np.arange(len(role_users)), [len(u) for u in role_users]),
+                                np.concatenate(role_users)),
+            },
+            'issues': {
+                'developer': bitmaps(info_users, info_issues),
+                'project': bitmaps(self.issue_project[known], np.flatnonzero(known)),
+                'scenario': bitmaps(np.r_[issue_scenarios, info_scenarios], np.r_[issue_ids, info_issues]),
+                'label': bitmaps(np.concatenate(label_ids), np.tile(issue_ids, len(label_ids))),
+            },
+            'projects': {'developer': bitmaps(info_users, info_projects)},
+            'scenarios': {'developer': bitmaps(info_users, info_scenarios)},
+        }
+
+        self.issue_records = {}
+        for ref, record in zip(issue_ids.tolist(), issues.to_dict('records')):
+            self.issue_records.setdefault(ref, []).append(record)
+        self.affiliations = {}
+        for user, record in zip(affiliation_users.tolist(), affiliations.drop(columns='Username').to_dict('records')):
+            self.affiliations.setdefault(user, []).append(record)
+
+        instrumentation.gauge('query_store_developers', len(self.users))
+        instrumentation.gauge('query_store_issues', len(self.issues))
+
+    @classmethod
+    @instrumentation.timed()
+    def load(cls, info_csv=INFO_CSV, issues_csv=ISSUES_CSV, affiliations_csv=AFFILIATIONS_CSV):
+        info = columnar.read_stage(info_csv)
+        for role in identity.ROLES:
+            if info[role].dtype != bool:
+                info[role] = info[role].astype(str).str.lower().isin(["true", "1", "yes"])
+        return cls(info, columnar.read_stage(issues_csv), columnar.read_stage(affiliations_csv))
+
+    # --- Terms and expressions ---
+
+    def _term(self, domain, term):
+        """The bitmap of one term of a set expression; None if its value is unknown."""
+        if term == 'all':
+            return full(len(self.users if domain == 'developers' else self.issues))
+        kind, sep, value = term.partition(':')
+        kind = kind.lower()
+        if not sep:
+            raise ValueError(f"expected KIND:VALUE or 'all', got {term!r}")
+        name, index, key = TERMS[domain].get(kind, (None, None, None))
+        if name is None:
+            raise ValueError(f"unknown {domain} term {kind!r}")
+        id_ = getattr(self, name).get(key(value))
+        if id_ < 0:
+            return None
+        if index is None:
+            return 1 << id_  # the element itself
+        return self.index[domain][index].get(id_, 0)
+
+    def evaluate(self, domain, expression):
+        """Bitmap of a set expression and the terms whose values are unknown."""
+        if domain not in DOMAINS:
+            raise ValueError(f"unknown domain {domain!r}, expected one of {DOMAINS}")
+        tokens = expression.split()
+        if not tokens or len(tokens) % 2 == 0 or any(op not in OPERATORS for op in tokens[1::2]):
+            raise ValueError(f"expected TERM [OP TERM ...] with OP one of {' '.join(OPERATORS)}, got {expression!r}")
+        unknown = []
+
+        def term(text):
+            bitmap = self._term(domain, text)
+            if bitmap is None:
+                unknown.append(text)
+                return 0
+            return bitmap
+
+        result = term(tokens[0])
+        for op, text in zip(tokens[1::2], tokens[2::2]):
+            bitmap = term(text)
+            if op == '&':
+                result &= bitmap
+            elif op == '|':
+                result |= bitmap
+            else:
+                result &= ~bitmap
+        return result, unknown
+
+    def query(self, domain, expression):
+        """Answer to a set expression: {"query", "count", domain: [names], "unknown", "elapsed_us"}."""
+        start = time.perf_counter()
+        bitmap, unknown = self.evaluate(domain, expression)
+        elapsed = time.perf_counter() - start
+        instrumentation.observe('query_seconds', elapsed, kind=domain)
+        return {'query': expression, 'count': bitmap.bit_count(), domain: self._names(domain, bitmap),
+                'unknown': unknown, 'elapsed_us': round(elapsed * 1e6, 1)}
+
+    def _names(self, domain, bitmap):
+        interner = {'developers': self.users, 'issues': self.issues, 'projects': self.projects,
+                    'scenarios': self.scenarios, 'roles': self.roles}[domain]
+        return sorted(interner[k] for k in members(bitmap).tolist())
+
+    # --- Lookups ---
+
+    def developer(self, name):
+        """Issues, projects, scenarios, roles and affiliation rows of a developer; None if unknown."""
+        user = self.users.get(name.strip())
+        if user < 0:
+            return None
+        bit = 1 << user
+        roles = self.index['developers']['role']
+        return {
+            'developer': self.users[user],
+            'issues': self._names('issues', self.index['issues']['developer'].get(user, 0)),
+            'projects': self._names('projects', self.index['projects']['developer'].get(user, 0)),
+            'scenarios': sorted(self._names('scenarios', self.index['scenarios']['developer'].get(user, 0)),
+                                key=lambda s: (len(s), s)),
+            'roles': [role for k, role in enumerate(identity.ROLES) if roles.get(k, 0) & bit],
+            'affiliations': self.affiliations.get(user, []),
+        }
+
+    def issue(self, ref):
+        """Combined-issues rows and participants (with their roles) of an issue; None if unknown."""
+        issue = self.issues.get(ref.strip())
+        if issue < 0:
+            return None
+        start, end = np.searchsorted(self.pair_issues, [issue, issue + 1])
+        project = self.issue_project[issue]
+        return {
+            'issue': self.issues[issue],
+            'project': self.projects[project] if project >= 0 else None,
+            'records': self.issue_records.get(issue, []),
+            'developers': [{'username': self.users[user], 'roles': [identity.role_name(bit) for bit in
+                                                                     identity.ROLE_BITS.values() if mask & bit]}
+                           for user, mask in zip(self.pair_users[start:end].tolist(),
+                                                 self.pair_masks[start:end].tolist())],
+        }
+
+    def scenario(self, scenario):
+        """Issues and developers of a scenario; None if unknown."""
+        scenario_id = self.scenarios.get(_scenario(scenario))
+        if scenario_id < 0:
+            return None
+        return {
+            'scenario': self.scenarios[scenario_id],
+            'issues': self._names('issues', self.index['issues']['scenario'].get(scenario_id, 0)),
+            'developers': self._names('developers', self.index['developers']['scenario'].get(scenario_id, 0)),
+        }
+
+    def project(self, project):
+        """Issues, developers and primarily affiliated developers of a project; None if unknown."""
+        project_id = self.projects.get(_lower(project))
+        if project_id < 0:
+            return None
+        return {
+            'project': self.projects[project_id],
+            'issues': self._names('issues', self.index['issues']['project'].get(project_id, 0)),
+            'developers': self._names('developers', self.index['developers']['project'].get(project_id, 0)),
+            'affiliated': self._names('developers', self.index['developers']['affiliation'].get(project_id, 0)),
+        }
+
+    def lookup(self, kind, key):
+        """One of the LOOKUPS, timed; None if the key is unknown."""
+        if kind not in LOOKUPS:
+            raise ValueError(f"unknown lookup {kind!r}, expected one of {LOOKUPS}")
+        start = time.perf_counter()
+        answer = getattr(self, kind)(key)
+        instrumentation.observe('query_seconds', time.perf_counter() - start, kind=kind)
+        return answer
+
+    def stats(self):
+        return {'developers': len(self.users), 'issues': len(self.issues), 'projects': len(self.projects),
+                'scenarios': len(self.scenarios), 'participations': len(self.pair_masks)}
+
+    def answer(self, line):
+        """Answer a "KIND ARGUMENT" query line (a lookup or a set expression), as the CLI, shell and server do."""
+        kind, _, argument = line.strip().partition(' ')
+        if kind in DOMAINS:
+            return self.query(kind, argument)
+        if kind == 'stats':
+            return self.stats()
+        answer = self.lookup(kind, argument)
+        if answer is None:
+            raise KeyError(f"unknown {kind} {argument.strip()!r}")
+        return answer
+
+
+# --- HTTP ---
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """GET-only JSON interface to the server's store (routes in the module docstring)."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # one line per query would drown the console
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        kind, _, key = url.path.strip("/").partition("/")
+        if kind in DOMAINS:
+            line = f"{kind} {parse_qs(url.query).get('q', [''])[0]}"
+        else:
+            line = f"{kind} {unquote(key)}"
+        try:
+            return self._send_json(200, self.server.store.answer(line))
+        except KeyError as e:
+            return self._send_json(404, {"message": e.args[0]})
+        except ValueError as e:
+            return self._send_json(400, {"message": str(e)})
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Threaded HTTP server over a loaded store; a context manager like MockGitHubServer."""
+
+    daemon_threads = True
+
+    def __init__(self, store, host="127.0.0.1", port=DEFAULT_PORT):
+        super().__init__((host, port), QueryHandler)
+        self.store = store
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+# --- CLI ---
+
+def _print(answer):
+    print(json.dumps(answer, indent=2, default=str))
+
+
+def shell(store):
+    """Read query lines from stdin until EOF (or "quit") and print the answers."""
+    interactive = sys.stdin.isatty()
+    while True:
+        try:
+            line = input("query> " if interactive else "")
+        except EOFError:
+            break
+        if line.strip() in ("quit", "exit"):
+            break
+        if not line.strip():
+            continue
+        try:
+            _print(store.answer(line))
+        except (KeyError, ValueError) as e:
+            print(f"⚠️  {e.args[0]}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Indexed in-memory queries over the mined dataset.")
+    parser.add_argument("--info", default=INFO_CSV, help="developer participation table")
+    parser.add_argument("--issues", default=ISSUES_CSV, help="combined issues table")
+    parser.add_argument("--affiliations", default=AFFILIATIONS_CSV, help="developer affiliations table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for kind, metavar in zip(LOOKUPS, ("NAME", "OWNER/REPO#N", "N", "OWNER/REPO")):
+        commands.add_parser(kind, help=f"look up one {kind}").add_argument("key", metavar=metavar)
+    for domain in DOMAINS:
+        commands.add_parser(domain, help=f"{domain} matching a set expression").add_argument(
+            "expression", nargs="+", metavar="EXPR")
+    commands.add_parser("stats", help="sizes of the loaded store")
+    commands.add_parser("shell", help="answer query lines from stdin")
+    serve = commands.add_parser("serve", help="serve the queries over local HTTP")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    return parser.parse_args()
+
+
+def serve(store, host, port):
+    server = QueryServer(store, host, port)
+    stats = store.stats()
+    print(f"✅ Serving {stats['developers']} developers and {stats['issues']} issues on {server.base_url} "
+          f"(Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    args = parse_args()
+    if args.command in ("shell", "serve"):
+        # Sessions get a run report; one-shot lookups leave stdout to the JSON answer
+        with instrumentation.stage('query_store'):
+            store = QueryStore.load(args.info, args.issues, args.affiliations)
+            if args.command == "shell":
+                return shell(store)
+            return serve(store, args.host, args.port)
+    store = QueryStore.load(args.info, args.issues, args.affiliations)
+    argument = " ".join(args.expression) if args.command in DOMAINS else getattr(args, "key", "")
+    try:
+        _print(store.answer(f"{args.command} {argument}"))
+    except (KeyError, ValueError) as e:
+        raise SystemExit(f"⚠️  {e.args[0]}")
+
+
+if __name__ == "__main__":
+    main()
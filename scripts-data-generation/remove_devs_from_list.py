@@ -3,10 +3,14 @@ remove_devs_from_list.py
 
 Removes rows from ../data/developer_info.csv if their Username appears in ../data/suspicious_bots.csv.
 Writes the filtered developer info to ../data/developer_info_cleaned.csv.
+Developer info is read and written in the DATA_FORMAT storage format (see columnar.py); the reviewed list of suspicious
+accounts stays a CSV.
 """
 
 import csv
 
+import columnar
+
 DEVINFO_CSV = "../data/developer_info.csv"
 SUSPICIOUS_CSV = "../data/suspicious_bots.csv"
 OUTPUT_CSV = "../data/developer_info_cleaned.csv"
@@ -17,18 +21,10 @@ with open(SUSPICIOUS_CSV, newline="", encoding="utf-8") as f:
 	suspicious_usernames = {row["Username"].strip() for row in reader}
 
 # Filter developer_info.csv
-with open(DEVINFO_CSV, newline="", encoding="utf-8") as f_in, \
-	 open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f_out:
-	reader = csv.DictReader(f_in)
-	writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames)
-	writer.writeheader()
-	removed = 0
-	kept = 0
-	for row in reader:
-		if row["Username"].strip() not in suspicious_usernames:
-			writer.writerow(row)
-			kept += 1
-		else:
-			removed += 1
+rows = columnar.read_records(DEVINFO_CSV)
+kept_rows = [row for row in rows if row["Username"].strip() not in suspicious_usernames]
+removed = len(rows) - len(kept_rows)
+kept = len(kept_rows)
+output_path = columnar.write_records(kept_rows, list(rows[0]) if rows else [], OUTPUT_CSV)
 
-print(f"Removed {removed} suspicious developers. Kept {kept} developers. Cleaned file written to {OUTPUT_CSV}")
+print(f"Removed {removed} suspicious developers. Kept {kept} developers. Cleaned file written to {output_path}")
@@ -0,0 +1,157 @@
+"""
+response_cache.py
+
+Persistent on-disk cache of GitHub API responses, used by github_api.get.
+
+Responses are stored in a SQLite file keyed by (token scope, full URL), together with their ETag / Last-Modified
+validators and the headers the scripts rely on (Link, for pagination). On a lookup:
+    - entries younger than the TTL are served without any request,
+    - older entries are revalidated with If-None-Match / If-Modified-Since; GitHub answers 304 for unchanged
+      resources, and 304 responses do not count against the rate limit,
+    - in offline mode only cached entries are served, and misses come back as 504 responses.
+The file is bounded in size: the least recently used entries are evicted once it grows past max_bytes.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers kept in the cache (everything else is dropped)
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+# Status codes worth caching: successful bodies and stable "not found" answers
+CACHEABLE_STATUS = (200, 404)
+
+
+def build_response(url, status, headers, body):
+    """Materialize a requests.Response from cached parts, so callers cannot tell it apart from a live one."""
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.encoding = 'utf-8'
+    return response
+
+
+class CacheEntry:
+    __slots__ = ('status', 'headers', 'body', 'fetched_at')
+
+    def __init__(self, status, headers, body, fetched_at):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fetched_at = fetched_at
+
+    def validators(self):
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+
+class ResponseCache:
+    """Thread-safe SQLite response cache with TTL, LRU size bound and an offline mode."""
+
+    def __init__(self, path, ttl=24 * 3600, max_bytes=512 * 1024 * 1024, offline=False, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.clock = clock
+        self.hits = self.revalidated = self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                scope       TEXT NOT NULL,
+                url         TEXT NOT NULL,
+                status      INTEGER NOT NULL,
+                headers     TEXT NOT NULL,
+                body        BLOB NOT NULL,
+                fetched_at  REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size        INTEGER NOT NULL,
+                PRIMARY KEY (scope, url)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._db.commit()
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, scope, url):
+        """Return the CacheEntry for (scope, url), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, body, fetched_at FROM responses WHERE scope = ? AND url = ?",
+                (scope, url)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE scope = ? AND url = ?",
+                             (self.clock(), scope, url))
+            self._db.commit()
+        return CacheEntry(row[0], json.loads(row[1]), row[2], row[3])
+
+    def count(self, outcome):
+        """Bump one of the hits / revalidated / misses counters."""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def is_fresh(self, entry):
+        return self.clock() - entry.fetched_at < self.ttl
+
+    def store(self, scope, url, response):
+        """Store a live response (if cacheable) and evict old entries past the size bound."""
+        if response.status_code not in CACHEABLE_STATUS:
+            return
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        body = response.content
+        size = len(body) + len(url)
+        now = self.clock()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE scope = ? AND url = ?",
+                                   (scope, url)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (scope, url, response.status_code, json.dumps(headers), body, now, now, size))
+            self._size += size - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def touch(self, scope, url):
+        """Mark an entry as just revalidated (after a 304)."""
+        with self._lock:
+            now = self.clock()
+            self._db.execute("UPDATE responses SET fetched_at = ?, last_access = ? WHERE scope = ? AND url = ?",
+                             (now, now, scope, url))
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes. Caller holds the lock."""
+        while self._size > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT scope, url, size FROM responses ORDER BY last_access LIMIT 100").fetchall()
+            if not rows:
+                break
+            for scope, url, size in rows:
+                self._db.execute("DELETE FROM responses WHERE scope = ? AND url = ?", (scope, url))
+                self._size -= size
+                if self._size <= self.max_bytes:
+                    break
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
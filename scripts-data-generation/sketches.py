@@ -0,0 +1,141 @@
+"""
+sketches.py
+
+Bounded-memory summaries of a stream of strings (or tuples of strings), used by data_analysis.py on inputs too large
+to keep every distinct value in memory:
+
+    - HyperLogLog: approximate number of distinct values, with 2^precision one-byte registers
+      (relative standard error about 1.04 / sqrt(2^precision), 0.8% at the default precision 14).
+    - SpaceSaving: approximate most frequent values (Metwally et al., 2005) with a fixed number of counters; every
+      value occurring more than n / capacity times is kept, and each count overestimates by at most its error.
+
+ExactDistinct and ExactCounter have the same interface and keep everything, so callers choose with distinct_counter()
+and frequency_counter().
+"""
+
+import math
+import heapq
+import hashlib
+from collections import Counter
+
+
+def _hash64(value):
+    if isinstance(value, tuple):
+        value = '\0'.join(value)
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """Approximate distinct count of strings; two sketches of the same precision merge into one of the union."""
+
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1  # position of the leftmost 1 bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction: linear counting over the empty registers
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
+
+
+class ExactDistinct:
+    """Distinct count of strings, kept as a set."""
+
+    __slots__ = ('values',)
+
+    def __init__(self):
+        self.values = set()
+
+    def add(self, value):
+        self.values.add(value)
+
+    def count(self):
+        return len(self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class SpaceSaving:
+    """Approximate top-k of a stream of strings with `capacity` counters."""
+
+    __slots__ = ('capacity', 'counts', 'errors', 'heap', 'total')
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.heap = []  # (count when pushed, value): one entry per monitored value, refreshed lazily
+        self.total = 0
+
+    def add(self, value):
+        self.total += 1
+        if value in self.counts:
+            self.counts[value] += 1
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[value] = 1
+            self.errors[value] = 0
+            heapq.heappush(self.heap, (1, value))
+            return
+        # Replace the value with the smallest count; it becomes the new value's error
+        while True:
+            count, victim = heapq.heappop(self.heap)
+            if count == self.counts[victim]:
+                break
+            heapq.heappush(self.heap, (self.counts[victim], victim))
+        del self.counts[victim], self.errors[victim]
+        self.counts[value] = count + 1
+        self.errors[value] = count
+        heapq.heappush(self.heap, (count + 1, value))
+
+    def most_common(self, n=None):
+        """[(value, count)] by decreasing (over-estimated) count."""
+        return Counter(self.counts).most_common(n)
+
+    def error(self, value):
+        """Upper bound of the overestimate of a value's count."""
+        return self.errors.get(value, 0)
+
+
+class ExactCounter(Counter):
+    """Counter with the SpaceSaving interface."""
+
+    def add(self, value):
+        self[value] += 1
+
+    def error(self, value):
+        return 0
+
+
+def distinct_counter(approximate=False, precision=14):
+    return HyperLogLog(precision) if approximate else ExactDistinct()
+
+
+def frequency_counter(approximate=False, capacity=1000):
+    return SpaceSaving(capacity) if approximate else ExactCounter()